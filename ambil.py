@@ -0,0 +1,119 @@
+"""
+ambil.py
+Jalur pengambilan hasil query MySQL menjadi DataFrame.
+
+Ada dua jalur yang hasilnya sama:
+- "dbapi": pd.read_sql di atas koneksi mysql.connector. Setiap sel menjadi
+  objek Python di tuple baris, lalu pandas menebak tipe per kolom objek
+  (tanggal diubah ulang menjadi datetime64).
+- "arrow" (default bila pyarrow terpasang): cursor raw (nilai teks mentah
+  dari protokol MySQL, tanpa konversi per sel ke objek Python), baris
+  dipindah ke kolom per batch, lalu setiap kolom diurai sekaligus oleh Arrow
+  sesuai tipe kolom MySQL (INT -> int64, DECIMAL/DOUBLE -> float64,
+  DATE/DATETIME -> datetime64, NULL -> mask). DataFrame hasilnya sudah
+  memakai datetime64 native, sehingga pd.to_datetime di model.py tidak perlu
+  mem-parse ulang.
+
+Koneksi, pool, replika, dan retry tetap milik db.py; modul ini hanya
+mengganti cara hasil cursor diubah menjadi DataFrame.
+
+Jalur dipilih lewat pengaturan `fetch_backend` (lihat config.py), misalnya
+SEPERLIMA_FETCH_BACKEND=dbapi.
+"""
+
+from __future__ import annotations
+
+from operator import itemgetter
+
+import pandas as pd
+from mysql.connector import FieldType
+
+from config import get_setting
+from offline import KoneksiOffline
+
+try:
+    import pyarrow as pa
+except ImportError:  # dependensi opsional
+    pa = None
+
+# Baris per fetchmany pada jalur arrow
+BATCH_AMBIL = 50_000
+
+# Kode tipe kolom MySQL (FieldType) -> nama tipe Arrow tujuan; lainnya teks
+_INTEGER = {FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG, FieldType.INT24, FieldType.YEAR}
+_PECAHAN = {FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL}
+_TANGGAL = {FieldType.DATE, FieldType.NEWDATE}
+_WAKTU = {FieldType.DATETIME, FieldType.TIMESTAMP}
+
+
+def backend_aktif() -> str:
+    """Nama jalur yang dipakai saat ini: 'arrow' atau 'dbapi'."""
+    if str(get_setting("fetch_backend", "arrow")).lower() == "arrow" and pa is not None:
+        return "arrow"
+    return "dbapi"
+
+
+def _tipe_arrow(kode: int):
+    if kode in _INTEGER:
+        return pa.int64()
+    if kode in _PECAHAN:
+        return pa.float64()
+    if kode in _TANGGAL:
+        return pa.date32()
+    if kode in _WAKTU:
+        return pa.timestamp("us")
+    return None
+
+
+def _kolom_arrow(nilai: list, kode: int) -> "pa.Array":
+    """
+    Satu kolom teks mentah protokol MySQL (bytes/None) menjadi array Arrow
+    bertipe sesuai kode kolom; konversi berjalan vektor di Arrow.
+    """
+    teks = pa.array(nilai, type=pa.binary()).cast(pa.string())
+    tujuan = _tipe_arrow(kode)
+    if tujuan is None:
+        return teks
+    try:
+        return teks.cast(tujuan)
+    except pa.ArrowInvalid:
+        # nilai yang tidak bisa diurai (mis. tanggal '0000-00-00') menjadi NULL
+        seri = teks.to_pandas()
+        if pa.types.is_integer(tujuan) or pa.types.is_floating(tujuan):
+            return pa.array(pd.to_numeric(seri, errors="coerce"), type=pa.float64())
+        return pa.array(pd.to_datetime(seri, errors="coerce")).cast(tujuan)
+
+
+def _baca_arrow(cur, batch: int = BATCH_AMBIL) -> pd.DataFrame:
+    """Hasil cursor raw yang sudah di-execute menjadi DataFrame lewat kolom Arrow."""
+    nama = [d[0] for d in cur.description]
+    kode = [d[1] for d in cur.description]
+    potongan: list[list] = [[] for _ in nama]
+    while True:
+        baris = cur.fetchmany(batch)
+        if not baris:
+            break
+        for i in range(len(nama)):
+            potongan[i].append(_kolom_arrow(list(map(itemgetter(i), baris)), kode[i]))
+    kolom = []
+    for p, k in zip(potongan, kode):
+        # tipe hanya bisa berbeda antar batch pada jalur cadangan (int -> float64)
+        tipe = {a.type for a in p} or {_tipe_arrow(k) or pa.string()}
+        tipe = tipe.pop() if len(tipe) == 1 else pa.float64()
+        kolom.append(pa.chunked_array([a.cast(tipe) for a in p], type=tipe))
+    return pa.table(kolom, names=nama).to_pandas(date_as_object=False)
+
+
+def baca_frame(sql: str, conn, params: tuple = ()) -> pd.DataFrame:
+    """Menjalankan `sql` di `conn` dan mengembalikan DataFrame lewat jalur aktif."""
+    if isinstance(conn, KoneksiOffline):
+        return conn.frame(sql, params)
+    if backend_aktif() == "dbapi":
+        return pd.read_sql(sql, conn, params=params or None)
+
+    cur = conn.cursor(raw=True)
+    try:
+        cur.execute(sql, params or None)
+        return _baca_arrow(cur)
+    finally:
+        cur.close()
@@ -15,6 +15,9 @@ Seluruh data diambil dari database MySQL 'seperlima' melalui modul db.py.
 import streamlit as st
 
 from db import (
+    cek_koneksi,
+    load_model,
+    sirkuit_terbuka,
     load_peminjaman_detail,
     load_anggota,
     load_buku,
@@ -27,19 +30,65 @@ from db import (
     load_klasifikasi,
 )
 
+from engine import filter_peminjaman, engine_aktif, hitung_per_grup
+from timeseries import agregat_waktu, periode_puncak
+from kpi import load_indeks_kpi, hitung_kpi, format_kpi
+from topk import load_indeks_topk, top_k_judul
+from histogram import load_indeks_histogram, histogram_durasi, titik_dalam_area
+from utilisasi import (
+    load_indeks_utilisasi,
+    utilisasi_judul,
+    utilisasi_kategori,
+    posisi_tidak_dipinjam,
+    halaman_tidak_dipinjam,
+)
+from kuantil import DIMENSI_KUANTIL, load_indeks_kuantil, ringkasan_durasi, ringkasan_durasi_dari_frame
+from denda import load_ledger_denda, total_denda, total_denda_dari_frame, rincian_denda, DIMENSI_DENDA
+from status import rekap_status, jumlah_terlambat, daftar_per_status
+from terlambat import (
+    kebijakan_aktif,
+    refresh_detik,
+    load_terlambat,
+    ringkasan_terlambat,
+)
+from live import load_feed, poll_peminjaman, potret_langsung, interval_langsung
+from memori import budget_byte, catat_sesi, laporan_cache, laporan_sesi, registri
+from tampilan import posisi_cocok, bentuk_tampilan, halaman, jumlah_halaman
+from hierarki import load_hierarki, posisi_pencarian, jumlah_per_daun, jumlah_per_status, data_treemap
+from tenant import daftar_tenant, tenant_aktif, pilih_tenant
+from offline import mode_offline, sumber_dump
+from impor import SKEMA_IMPOR, METODE_TULIS, UKURAN_POTONGAN, impor_berkas, invalidasi, sinkronkan_impor
+from cabang import kumpulkan_partisi, ringkasan_lintas_cabang, tren_lintas_cabang
+from kubus import (
+    load_kubus,
+    seleksi_dari_event,
+    per_fakultas,
+    per_kategori,
+    durasi_per_fakultas,
+    tren_bulanan,
+    label_rentang,
+    matriks_fakultas_kategori,
+    METRIK_MATRIKS,
+)
+
 from charts import (
     chart_tren_bulanan_status,
     chart_peminjaman_per_fakultas,
     chart_peminjaman_per_kategori,
     chart_durasi_rata_per_fakultas,
+    chart_heatmap_fakultas_kategori,
     chart_peminjaman_per_status,
     chart_top5_judul,
     chart_hist_durasi,
+    chart_box_durasi,
+    chart_scatter_durasi_denda,
     chart_anggota_per_status,
     chart_anggota_per_fakultas,
     chart_buku_per_kategori,
     chart_buku_per_status,
     chart_buku_per_tahun,
+    chart_pinjam_per_eksemplar,
+    chart_utilisasi_kategori,
 )
 
 # ======================================================
@@ -110,15 +159,65 @@ st.markdown(
 st.sidebar.title("🧭 Navigasi")
 page = st.sidebar.radio(
     "Pilih halaman",
-    ["Ringkasan", "Peminjaman", "Anggota", "Buku", "Referensi data"],
+    ["Ringkasan", "Peminjaman", "Keterlambatan", "Anggota", "Buku", "Referensi data", "Impor data"],
 )
 
+# Pilihan cabang hanya muncul bila ada lebih dari satu tenant
+tenant_list = list(daftar_tenant())
+if len(tenant_list) > 1:
+    tenant_pilih = st.sidebar.selectbox(
+        "Cabang perpustakaan",
+        tenant_list,
+        index=tenant_list.index(tenant_aktif()),
+    )
+    if tenant_pilih != tenant_aktif():
+        pilih_tenant(tenant_pilih)
+
+# Impor lewat CLI (impor.py) berjalan di proses lain: tabel yang berubah di
+# database dideteksi dari penanda versinya dan cache-nya dimuat ulang di sini
+if not mode_offline():
+    if st.sidebar.button("Muat ulang data", help="Membuang cache model dan indeks cabang ini"):
+        for tabel_impor in SKEMA_IMPOR:
+            invalidasi(tabel_impor, tenant_aktif())
+    try:
+        tabel_berubah = sinkronkan_impor()
+    except Exception as e:
+        st.sidebar.caption(f"Pemeriksaan versi data gagal: {e}")
+    else:
+        if tabel_berubah:
+            st.sidebar.info(f"Data {', '.join(tabel_berubah)} berubah di database; cache dimuat ulang.")
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("Tentang aplikasi")
 st.sidebar.caption(
     "Dashboard ini menggunakan database MySQL `seperlima` sebagai sumber data "
     "anggota, petugas, buku, dan transaksi peminjaman."
 )
+st.sidebar.caption(f"Mesin analitik: `{engine_aktif()}`")
+if mode_offline():
+    st.sidebar.info(f"Mode offline: data dibaca dari dump `{sumber_dump().name}`, bukan server MySQL.")
+if sirkuit_terbuka():
+    st.sidebar.warning("Database sedang lambat: sebagian angka memakai data terakhir yang berhasil dimuat.")
+
+with st.sidebar.expander("Koneksi database"):
+    # Pemeriksaan awal sekali per proses; tombol untuk mengukur ulang
+    if st.button("Periksa ulang koneksi"):
+        cek_koneksi.clear()
+    df_koneksi = cek_koneksi(tenant_aktif())
+    st.dataframe(df_koneksi.set_index("peran").T.astype(str), use_container_width=True)
+
+with st.sidebar.expander("Pemakaian memori"):
+    if st.checkbox("Tampilkan rincian memori"):
+        # Model dan indeks mendaftarkan diri saat dibangun; yang belum pernah
+        # dimuat tidak ikut dilaporkan (dan tidak dibangun hanya untuk diukur)
+        df_cache = laporan_cache()
+        st.caption(
+            f"Cache bersama: {df_cache.loc[df_cache['jenis'] != 'resource', 'mb'].sum():.1f} MB "
+            f"dari batas {budget_byte() / 2**20:.0f} MB ({registri().dibuang} entri dibuang)."
+        )
+        st.dataframe(df_cache, hide_index=True)
+        st.caption("Objek milik sesi ini (rerun terakhir):")
+        st.dataframe(laporan_sesi(), hide_index=True)
 
 
 def show_empty_message():
@@ -126,34 +225,8 @@ def show_empty_message():
     st.info("Data tidak tersedia untuk kombinasi filter yang dipilih.")
 
 
-# ======================================================
-# HALAMAN: RINGKASAN
-# ======================================================
-
-if page == "Ringkasan":
-    try:
-        with st.spinner("Memuat data peminjaman..."):
-            df_pinjam = load_peminjaman_detail()
-    except Exception as e:
-        st.error("Gagal memuat data peminjaman dari database. Periksa koneksi ke MySQL.")
-        st.exception(e)
-        st.stop()
-
-    if df_pinjam.empty:
-        st.warning("Belum ada data peminjaman pada database.")
-        st.stop()
-
-    st.write(
-        "Halaman ini menampilkan gambaran umum aktivitas perpustakaan berdasarkan "
-        "data peminjaman, anggota, dan koleksi buku."
-    )
-
-    # ----------------- Kartu ringkasan (KPI) -----------------
-    total_peminjaman = len(df_pinjam)
-    total_anggota_aktif = df_pinjam["id_anggota"].nunique()
-    total_buku_dipinjam = df_pinjam["id_buku"].nunique()
-    total_denda = int(df_pinjam["denda_buku"].sum())
-
+def tampilkan_kartu_kpi(total_peminjaman, anggota_aktif, buku_dipinjam, jumlah_denda):
+    """Empat kartu ringkasan halaman Ringkasan (nilai sudah siap tampil, kecuali denda)."""
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
@@ -166,60 +239,238 @@ if page == "Ringkasan":
     with col2:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Anggota aktif</div>', unsafe_allow_html=True)
-        st.markdown(f'<div class="metric-value">{total_anggota_aktif}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-value">{anggota_aktif}</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-sub">Pernah melakukan peminjaman</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col3:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Buku yang dipinjam</div>', unsafe_allow_html=True)
-        st.markdown(f'<div class="metric-value">{total_buku_dipinjam}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-value">{buku_dipinjam}</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-sub">Berdasarkan variasi ID buku</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col4:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Total denda</div>', unsafe_allow_html=True)
-        st.markdown(f'<div class="metric-value">Rp {total_denda:,.0f}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-value">Rp {jumlah_denda:,.0f}</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-sub">Akumulasi dari seluruh transaksi</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
+
+# ======================================================
+# HALAMAN: RINGKASAN
+# ======================================================
+
+if page == "Ringkasan":
+    try:
+        with st.spinner("Memuat data peminjaman..."):
+            df_pinjam = load_peminjaman_detail()
+    except Exception as e:
+        st.error("Gagal memuat data peminjaman dari database. Periksa koneksi ke MySQL.")
+        st.exception(e)
+        st.stop()
+
+    if df_pinjam.empty:
+        st.warning("Belum ada data peminjaman pada database.")
+        st.stop()
+
+    st.write(
+        "Halaman ini menampilkan gambaran umum aktivitas perpustakaan berdasarkan "
+        "data peminjaman, anggota, dan koleksi buku."
+    )
+
+    # ----------------- Kartu ringkasan (KPI) -----------------
+    mode_langsung = st.toggle(
+        "Mode langsung",
+        help="Menarik peminjaman baru dari database secara berkala dan memperbarui "
+        "kartu ringkasan serta tren bulanan tanpa memuat ulang halaman.",
+    )
+
+    if mode_langsung:
+        @st.fragment(run_every=interval_langsung())
+        def panel_langsung():
+            feed = load_feed()
+            try:
+                poll_peminjaman(feed, load_model())
+            except Exception as e:
+                st.warning(f"Gagal menarik peminjaman baru: {e}")
+            potret = potret_langsung(feed)
+            nilai = potret.kpi
+            tampilkan_kartu_kpi(
+                f"{nilai['peminjaman']:,}",
+                f"{nilai['anggota']:,}",
+                f"{nilai['buku']:,}",
+                nilai["denda"],
+            )
+            st.caption(
+                f"Mode langsung: diperbarui setiap {interval_langsung()} detik "
+                f"(id peminjaman terakhir {potret.id_terakhir})."
+            )
+            fig_langsung = chart_tren_bulanan_status(df_pinjam, potret.tren)
+            st.plotly_chart(fig_langsung, use_container_width=True)
+            if not potret.terbaru.empty:
+                st.markdown("**Peminjaman terbaru**")
+                st.dataframe(potret.terbaru, use_container_width=True, hide_index=True)
+
+        panel_langsung()
+    else:
+        kpi = hitung_kpi(load_indeks_kpi())
+        tampilkan_kartu_kpi(
+            len(df_pinjam),
+            format_kpi(kpi["anggota"], kpi["eksak"]),
+            format_kpi(kpi["buku"], kpi["eksak"]),
+            total_denda(load_ledger_denda()),
+        )
+
+    # ----------------- Status peminjaman saat ini (query ber-indeks ke MySQL) -----------------
+    try:
+        rekap = rekap_status().set_index("status_peminjaman")["jumlah"]
+        masa_pinjam = kebijakan_aktif().masa_pinjam_hari
+        terlambat = jumlah_terlambat(masa_pinjam)
+    except Exception:
+        st.caption("Rekap status peminjaman langsung dari database tidak tersedia.")
+    else:
+        col_s1, col_s2, col_s3, col_s4 = st.columns(4)
+        with col_s1:
+            st.metric("Sedang dipinjam", f"{rekap['Sedang dipinjam']:,}")
+        with col_s2:
+            st.metric(f"Terlambat (> {masa_pinjam} hari)", f"{terlambat:,}")
+        with col_s3:
+            st.metric("Hilang", f"{rekap['Hilang']:,}")
+        with col_s4:
+            st.metric("Rusak", f"{rekap['Rusak']:,}")
+
+    # ----------------- Perbandingan lintas cabang (gabungan agregat parsial per tenant) -----------------
+    if len(tenant_list) > 1:
+        with st.expander("Perbandingan lintas cabang"):
+            try:
+                partisi = kumpulkan_partisi(tenant_list)
+            except Exception as e:
+                st.warning(f"Ringkasan lintas cabang tidak tersedia: {e}")
+            else:
+                st.dataframe(ringkasan_lintas_cabang(partisi), use_container_width=True, hide_index=True)
+                fig_cabang = chart_tren_bulanan_status(df_pinjam, tren_lintas_cabang(partisi))
+                st.plotly_chart(fig_cabang, use_container_width=True)
+                st.caption(
+                    "Angka 'Semua cabang' adalah jumlah agregat parsial setiap cabang "
+                    "(dihitung paralel di database masing-masing, cache 5 menit)."
+                )
+
     st.markdown("### Ikhtisar grafik")
     st.write(
         "Grafik di bawah ini membantu melihat pola peminjaman berdasarkan waktu, fakultas, "
-        "kategori buku, dan durasi peminjaman."
+        "kategori buku, dan durasi peminjaman. Pilih titik/rentang pada grafik tren, "
+        "batang fakultas, atau kategori buku untuk menyaring grafik lainnya."
     )
 
-    tab1, tab2, tab3, tab4 = st.tabs(
+    # ----------------- Filter silang (state seleksi bersama + kubus agregat) -----------------
+    # Seleksi dibaca dari state event grafik (rerun sebelumnya) sebelum grafik digambar.
+    # Kunci memuat nomor versi: state event tidak bisa diubah dari kode, jadi reset
+    # dilakukan dengan mengganti kunci semua grafik.
+    versi_silang = st.session_state.get("silang_versi", 0)
+    kunci_silang = {n: f"silang_{n}_{versi_silang}" for n in ("tren", "fakultas", "kategori", "durasi")}
+    seleksi = seleksi_dari_event(
+        st.session_state.get(kunci_silang["tren"]),
+        [st.session_state.get(kunci_silang["fakultas"]), st.session_state.get(kunci_silang["durasi"])],
+        st.session_state.get(kunci_silang["kategori"], []),
+    )
+    kubus = load_kubus() if seleksi.aktif() else None
+
+    if seleksi.aktif():
+        bagian = []
+        if seleksi.bulan is not None:
+            bagian.append(f"periode {label_rentang(seleksi.bulan)}")
+        if seleksi.fakultas:
+            bagian.append("fakultas " + ", ".join(sorted(seleksi.fakultas)))
+        if seleksi.kategori:
+            bagian.append("kategori " + ", ".join(sorted(seleksi.kategori)))
+        col_silang, col_reset = st.columns([4, 1])
+        with col_silang:
+            st.info("Filter silang aktif: " + "; ".join(bagian) + ".")
+        with col_reset:
+            if st.button("Reset filter silang"):
+                st.session_state["silang_versi"] = versi_silang + 1
+                st.rerun()
+
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
         [
             "Perkembangan peminjaman",
             "Peminjaman per fakultas",
             "Peminjaman per kategori buku",
             "Durasi peminjaman per fakultas",
+            "Fakultas dan kategori buku",
         ]
     )
 
     # Tab 1: Perkembangan peminjaman dari waktu ke waktu
     with tab1:
         st.subheader("Perkembangan peminjaman dari waktu ke waktu")
-        fig_tren = chart_tren_bulanan_status(df_pinjam)
-        st.plotly_chart(fig_tren, use_container_width=True)
-
-        df_bulan = df_pinjam.copy()
-        df_bulan["bulan"] = df_bulan["tgl_pinjam"].dt.to_period("M").astype(str)
-        per_bulan = df_bulan.groupby("bulan").size().reset_index(name="jumlah")
-        if not per_bulan.empty:
-            puncak = per_bulan.sort_values("jumlah", ascending=False).iloc[0]
+        col_gran, col_mode = st.columns(2)
+        with col_gran:
+            granularitas = st.selectbox(
+                "Satuan waktu",
+                ["hari", "minggu", "bulan", "semester"],
+                index=2,
+                format_func=str.capitalize,
+            )
+        with col_mode:
+            mode_tren = st.radio(
+                "Tampilan",
+                ["Per periode", "Bergulir 7 hari", "Bergulir 30 hari", "Dibanding tahun lalu"],
+                horizontal=True,
+            )
+
+        # Agregat per periode dihitung sekali, dipakai grafik dan caption
+        silang_tren = bool(seleksi.fakultas or seleksi.kategori)
+        if silang_tren and mode_tren == "Per periode":
+            # tren dari kubus (per bulan) untuk fakultas/kategori terpilih
+            granularitas = "bulan"
+            tren = tren_bulanan(kubus, seleksi)
+        else:
+            tren = agregat_waktu(df_pinjam, granularitas, grup="status_peminjaman")
+        fig_tren = chart_tren_bulanan_status(
+            df_pinjam,
+            tren,
+            granularitas=granularitas,
+            jendela={"Bergulir 7 hari": 7, "Bergulir 30 hari": 30}.get(mode_tren),
+            tahun_lalu=mode_tren == "Dibanding tahun lalu",
+        )
+        st.plotly_chart(
+            fig_tren,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode=("points", "box"),
+            key=kunci_silang["tren"],
+        )
+        if silang_tren:
             st.caption(
-                f"Periode dengan jumlah peminjaman tertinggi adalah {puncak['bulan']} "
+                "Tren mengikuti filter silang per bulan."
+                if mode_tren == "Per periode"
+                else "Filter silang fakultas/kategori hanya berlaku untuk tampilan per periode."
+            )
+
+        puncak = periode_puncak(tren)
+        if puncak is not None:
+            st.caption(
+                f"Periode dengan jumlah peminjaman tertinggi adalah {puncak['periode']} "
                 f"dengan {puncak['jumlah']} transaksi."
             )
 
     # Tab 2: Peminjaman per fakultas
     with tab2:
         st.subheader("Peminjaman per fakultas")
-        fig_fak, per_fak = chart_peminjaman_per_fakultas(df_pinjam)
-        st.plotly_chart(fig_fak, use_container_width=True)
+        fig_fak, per_fak = chart_peminjaman_per_fakultas(
+            df_pinjam,
+            per_fakultas(kubus, seleksi) if seleksi.bulan is not None or seleksi.kategori else None,
+        )
+        st.plotly_chart(
+            fig_fak,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="points",
+            key=kunci_silang["fakultas"],
+        )
 
         if not per_fak.empty:
             fak_tertinggi = per_fak.iloc[0]
@@ -231,8 +482,17 @@ if page == "Ringkasan":
     # Tab 3: Peminjaman per kategori buku
     with tab3:
         st.subheader("Peminjaman per kategori buku")
-        fig_kat, per_kat = chart_peminjaman_per_kategori(df_pinjam)
+        fig_kat, per_kat = chart_peminjaman_per_kategori(
+            df_pinjam,
+            per_kategori(kubus, seleksi) if seleksi.bulan is not None or seleksi.fakultas else None,
+        )
         st.plotly_chart(fig_kat, use_container_width=True)
+        # Diagram donat tidak mendukung event seleksi Plotly; kategori dipilih di sini
+        st.multiselect(
+            "Saring grafik lain berdasarkan kategori buku",
+            load_model().klasifikasi["kategori_buku"].dropna().tolist(),
+            key=kunci_silang["kategori"],
+        )
 
         if not per_kat.empty:
             kat_tertinggi = per_kat.iloc[0]
@@ -244,8 +504,17 @@ if page == "Ringkasan":
     # Tab 4: Durasi peminjaman per fakultas
     with tab4:
         st.subheader("Rata-rata durasi peminjaman per fakultas")
-        fig_durasi, durasi_fak = chart_durasi_rata_per_fakultas(df_pinjam)
-        st.plotly_chart(fig_durasi, use_container_width=True)
+        fig_durasi, durasi_fak = chart_durasi_rata_per_fakultas(
+            df_pinjam,
+            durasi_per_fakultas(kubus, seleksi) if seleksi.bulan is not None or seleksi.kategori else None,
+        )
+        st.plotly_chart(
+            fig_durasi,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="points",
+            key=kunci_silang["durasi"],
+        )
 
         if not durasi_fak.empty:
             fak_durasi_top = durasi_fak.iloc[0]
@@ -254,6 +523,42 @@ if page == "Ringkasan":
                 f"{fak_durasi_top['nama_fakultas']} "
                 f"dengan rata-rata {fak_durasi_top['rata_durasi']:.1f} hari."
             )
+
+    # Tab 5: Pola fakultas x kategori buku (matriks dari kubus agregat)
+    with tab5:
+        st.subheader("Peminjaman berdasarkan fakultas dan kategori buku")
+        col_metrik, col_norm = st.columns(2)
+        with col_metrik:
+            metrik_heat = st.selectbox("Nilai", list(METRIK_MATRIKS), format_func=METRIK_MATRIKS.get)
+        with col_norm:
+            norm_heat = st.radio(
+                "Normalisasi",
+                ["tanpa", "baris", "kolom", "total"],
+                format_func={
+                    "tanpa": "Tanpa",
+                    "baris": "% per fakultas",
+                    "kolom": "% per kategori",
+                    "total": "% dari total",
+                }.get,
+                horizontal=True,
+                disabled=metrik_heat == "durasi",
+                help="Rata-rata durasi tidak dinormalisasi.",
+            )
+        norm_heat = None if norm_heat == "tanpa" or metrik_heat == "durasi" else norm_heat
+
+        matriks = matriks_fakultas_kategori(load_kubus(), seleksi, metrik_heat, norm_heat)
+        fig_heat, matriks = chart_heatmap_fakultas_kategori(
+            df_pinjam, matriks, METRIK_MATRIKS[metrik_heat], persen=norm_heat is not None
+        )
+        st.plotly_chart(fig_heat, use_container_width=True)
+
+        sel_heat = matriks.stack().dropna()
+        if not sel_heat.empty:
+            fak_top, kat_top = sel_heat.idxmax()
+            st.caption(
+                f"Nilai tertinggi ada pada {fak_top} dengan kategori {kat_top}"
+                + (f" (periode {label_rentang(seleksi.bulan)})." if seleksi.bulan is not None else ".")
+            )
     with st.expander("Penjelasan dan kesimpulan halaman Ringkasan"):
         st.markdown(
             """
@@ -321,24 +626,20 @@ elif page == "Peminjaman":
     status_peminjaman_pilih = st.sidebar.selectbox("Status peminjaman", status_pinjam_list)
     kategori_pilih = st.sidebar.selectbox("Kategori buku", kategori_list)
 
-    # Terapkan filter ke DataFrame
-    df_filtered = df[
-        (df["tgl_pinjam"].dt.date >= start_date)
-        & (df["tgl_pinjam"].dt.date <= end_date)
-    ].copy()
-
-    if fakultas_pilih != "(Semua)":
-        df_filtered = df_filtered[df_filtered["nama_fakultas"] == fakultas_pilih]
-    if prodi_pilih != "(Semua)":
-        df_filtered = df_filtered[df_filtered["nama_prodi"] == prodi_pilih]
-    if status_anggota_pilih != "(Semua)":
-        df_filtered = df_filtered[df_filtered["status_anggota"] == status_anggota_pilih]
-    if status_peminjaman_pilih != "(Semua)":
-        df_filtered = df_filtered[df_filtered["status_peminjaman"] == status_peminjaman_pilih]
-    if kategori_pilih != "(Semua)":
-        df_filtered = df_filtered[df_filtered["kategori_buku"] == kategori_pilih]
-
-    df_filtered = df_filtered.sort_values("tgl_pinjam", ascending=False)
+    # Terapkan filter ke DataFrame (pandas atau DuckDB, lihat engine.py)
+    df_filtered = filter_peminjaman(
+        df,
+        start_date,
+        end_date,
+        {
+            "nama_fakultas": fakultas_pilih,
+            "nama_prodi": prodi_pilih,
+            "status_anggota": status_anggota_pilih,
+            "status_peminjaman": status_peminjaman_pilih,
+            "kategori_buku": kategori_pilih,
+        },
+    )
+    catat_sesi("df_filtered (Peminjaman)", df_filtered)
 
     # Ringkasan kondisi filter
     st.caption(
@@ -363,18 +664,70 @@ elif page == "Peminjaman":
     )
 
     # ----------------- Angka ringkasan sesuai filter -----------------
-    col_k1, col_k2, col_k3 = st.columns(3)
+    # Anggota/buku unik (dan top judul di bawah): dari indeks bucket bila filter
+    # hanya tanggal, fakultas, dan kategori; selain itu dihitung dari hasil filter.
+    filter_bucket = (prodi_pilih, status_anggota_pilih, status_peminjaman_pilih) == ("(Semua)",) * 3
+    if filter_bucket:
+        kpi = hitung_kpi(
+            load_indeks_kpi(),
+            start_date,
+            end_date,
+            fakultas=None if fakultas_pilih == "(Semua)" else fakultas_pilih,
+            kategori=None if kategori_pilih == "(Semua)" else kategori_pilih,
+        )
+        jumlah_denda = total_denda(
+            load_ledger_denda(),
+            start_date,
+            end_date,
+            fakultas=None if fakultas_pilih == "(Semua)" else fakultas_pilih,
+            kategori=None if kategori_pilih == "(Semua)" else kategori_pilih,
+        )
+    else:
+        kpi = {
+            "anggota": df_filtered["id_anggota"].nunique(),
+            "buku": df_filtered["id_buku"].nunique(),
+            "eksak": True,
+        }
+        jumlah_denda = total_denda_dari_frame(df_filtered)
+
+    col_k1, col_k2, col_k3, col_k4, col_k5 = st.columns(5)
     with col_k1:
         st.metric("Jumlah peminjaman", len(df_filtered))
     with col_k2:
-        st.metric("Total denda", f"Rp {int(df_filtered['denda_buku'].sum()):,}")
+        st.metric("Anggota aktif", format_kpi(kpi["anggota"], kpi["eksak"]))
     with col_k3:
+        st.metric("Buku yang dipinjam", format_kpi(kpi["buku"], kpi["eksak"]))
+    with col_k4:
+        st.metric("Total denda", f"Rp {jumlah_denda:,}")
+    with col_k5:
         if df_filtered["durasi_peminjaman"].notna().any():
             rata_durasi = df_filtered["durasi_peminjaman"].mean()
             st.metric("Rata-rata durasi peminjaman", f"{rata_durasi:.1f} hari")
         else:
             st.metric("Rata-rata durasi peminjaman", "-")
 
+    with st.expander("Rincian total denda"):
+        dimensi_denda = st.radio(
+            "Rincian per",
+            list(DIMENSI_DENDA),
+            horizontal=True,
+            format_func=str.capitalize,
+        )
+        if filter_bucket:
+            df_rincian = rincian_denda(
+                load_ledger_denda(),
+                dimensi_denda,
+                start_date,
+                end_date,
+                fakultas=None if fakultas_pilih == "(Semua)" else fakultas_pilih,
+                kategori=None if kategori_pilih == "(Semua)" else kategori_pilih,
+            )
+        else:
+            df_rincian = hitung_per_grup(
+                df_filtered, DIMENSI_DENDA[dimensi_denda], "denda_buku", "sum", "total_denda"
+            ).astype({"total_denda": "int64"})
+        st.dataframe(df_rincian, use_container_width=True, hide_index=True)
+
     # ----------------- Grafik per status dan lima judul teratas -----------------
     col1, col2 = st.columns(2)
 
@@ -383,9 +736,36 @@ elif page == "Peminjaman":
         fig_status, per_status = chart_peminjaman_per_status(df_filtered)
         st.plotly_chart(fig_status, use_container_width=True)
 
+        with st.expander("Daftar peminjaman hilang / rusak"):
+            status_daftar = st.radio("Status", ["Hilang", "Rusak"], horizontal=True)
+            try:
+                st.dataframe(daftar_per_status(status_daftar), use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error("Gagal memuat daftar peminjaman dari database.")
+                st.exception(e)
+
     with col2:
-        st.subheader("Lima judul buku paling sering dipinjam")
-        fig_top, top_judul = chart_top5_judul(df_filtered)
+        st.subheader("Judul buku paling sering dipinjam")
+        col_k, col_lain = st.columns([3, 2])
+        with col_k:
+            k_judul = st.slider("Jumlah judul", min_value=3, max_value=20, value=5)
+        with col_lain:
+            tampil_lainnya = st.checkbox("Tampilkan 'Lainnya'")
+
+        if filter_bucket:
+            top_judul = top_k_judul(
+                load_indeks_kpi(),
+                load_indeks_topk(),
+                k_judul,
+                start_date,
+                end_date,
+                fakultas=None if fakultas_pilih == "(Semua)" else fakultas_pilih,
+                kategori=None if kategori_pilih == "(Semua)" else kategori_pilih,
+                lainnya=tampil_lainnya,
+            )
+        else:
+            top_judul = None
+        fig_top, top_judul = chart_top5_judul(df_filtered, top_judul, k=k_judul, lainnya=tampil_lainnya)
         st.plotly_chart(fig_top, use_container_width=True)
 
         if not top_judul.empty:
@@ -401,9 +781,71 @@ elif page == "Peminjaman":
         "Grafik ini menunjukkan sebaran lama peminjaman dalam satuan hari, "
         "sehingga terlihat apakah mayoritas peminjaman masih dalam batas waktu yang wajar."
     )
-    fig_hist, _ = chart_hist_durasi(df_filtered)
+    if filter_bucket:
+        hist_durasi = histogram_durasi(
+            load_indeks_kpi(),
+            load_indeks_histogram(),
+            start_date,
+            end_date,
+            fakultas=None if fakultas_pilih == "(Semua)" else fakultas_pilih,
+            kategori=None if kategori_pilih == "(Semua)" else kategori_pilih,
+        )
+    else:
+        hist_durasi = None
+    fig_hist, _ = chart_hist_durasi(df_filtered, hist_durasi)
     st.plotly_chart(fig_hist, use_container_width=True)
 
+    # ----------------- Sebaran durasi per kelompok (kuartil, median, p90) -----------------
+    st.subheader("Sebaran durasi per kelompok")
+    per_durasi = st.radio(
+        "Kelompokkan per",
+        list(DIMENSI_KUANTIL),
+        horizontal=True,
+        format_func=str.capitalize,
+    )
+    # Dari indeks kuantil bila filter hanya tanggal, fakultas, kategori, dan status peminjaman
+    if (prodi_pilih, status_anggota_pilih) == ("(Semua)",) * 2:
+        sebaran = ringkasan_durasi(
+            load_indeks_kuantil(),
+            per_durasi,
+            start_date,
+            end_date,
+            fakultas=None if fakultas_pilih == "(Semua)" else fakultas_pilih,
+            kategori=None if kategori_pilih == "(Semua)" else kategori_pilih,
+            status=None if status_peminjaman_pilih == "(Semua)" else status_peminjaman_pilih,
+        )
+    else:
+        sebaran = ringkasan_durasi_dari_frame(df_filtered, per_durasi)
+    st.plotly_chart(chart_box_durasi(sebaran, per_durasi.capitalize()), use_container_width=True)
+    if not sebaran.empty:
+        st.dataframe(
+            sebaran.drop(columns="eksak").rename(columns={"grup": per_durasi}),
+            use_container_width=True,
+            hide_index=True,
+        )
+        if not sebaran["eksak"].iloc[0]:
+            st.caption("Kuartil, median, dan p90 adalah perkiraan dari sketch kuantil (KLL); min/maks eksak.")
+
+    # ----------------- Scatter durasi vs denda -----------------
+    st.subheader("Hubungan durasi peminjaman dan denda")
+    st.caption(
+        "Untuk data besar grafik otomatis beralih ke WebGL atau peta kepadatan. "
+        "Tarik kotak pada grafik untuk melihat detail peminjaman di area tersebut."
+    )
+    fig_scatter = chart_scatter_durasi_denda(df_filtered)
+    event_scatter = st.plotly_chart(
+        fig_scatter,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="box",
+        key="scatter_durasi_denda",
+    )
+    kotak = event_scatter.selection.box if event_scatter else []
+    if kotak:
+        detail_area = titik_dalam_area(df_filtered, kotak[0]["x"], kotak[0]["y"])
+        st.caption(f"{len(detail_area)} peminjaman di area terpilih (maks. 1.000 baris).")
+        st.dataframe(detail_area, use_container_width=True, height=250)
+
     # ----------------- Penjelasan logika durasi dan denda -----------------
     with st.expander("Penjelasan singkat logika durasi dan denda"):
         st.write(
@@ -420,7 +862,7 @@ elif page == "Peminjaman":
             - Tabel hasil filter dapat diunduh sehingga memudahkan proses pelaporan dan analisis lanjutan.
             - Indikator di bawah tabel merangkum **jumlah peminjaman**, **total denda**, dan **rata-rata durasi peminjaman**.
             - Grafik status peminjaman memperlihatkan komposisi transaksi yang masih dipinjam, sudah kembali, hilang, atau rusak.
-            - Grafik lima judul terlaris membantu mengidentifikasi buku yang paling sering digunakan dan mungkin perlu penambahan eksemplar.
+            - Grafik judul terlaris (jumlah judul bisa diatur) membantu mengidentifikasi buku yang paling sering digunakan dan mungkin perlu penambahan eksemplar.
             - Histogram durasi menunjukkan pola lama peminjaman, sehingga bisa dievaluasi apakah aturan masa pinjam sudah efektif.
             - Contoh query JOIN di bagian bawah menunjukkan pemahaman relasi antar tabel dan siap digunakan ketika penggabungan tabel tertentu.
             - Kesimpulan: halaman ini menjadi pusat analisis transaksi.
@@ -454,6 +896,84 @@ elif page == "Peminjaman":
                 "dan informasi buku."
             )
 
+# ======================================================
+# HALAMAN: KETERLAMBATAN
+# ======================================================
+
+elif page == "Keterlambatan":
+    st.subheader("Monitor peminjaman terlambat")
+    kebijakan = kebijakan_aktif()
+    st.write(
+        "Halaman ini menampilkan peminjaman yang masih berjalan dan sudah melewati masa pinjam "
+        f"({kebijakan.masa_pinjam_hari} hari), beserta proyeksi denda "
+        f"(Rp {kebijakan.denda_per_hari:,} per hari"
+        + (f", maksimal Rp {kebijakan.denda_maks:,}" if kebijakan.denda_maks > 0 else "")
+        + ")."
+    )
+
+    # Pilihan filter dari dimensi model; bila model belum bisa dimuat, filter kosong
+    try:
+        model_terlambat = load_model()
+        pilihan_fakultas = sorted(model_terlambat.fakultas["nama_fakultas"].dropna().unique().tolist())
+        pilihan_petugas = sorted(model_terlambat.petugas["nama_petugas"].dropna().unique().tolist())
+    except Exception:
+        pilihan_fakultas, pilihan_petugas = [], []
+
+    col_f, col_p = st.columns(2)
+    with col_f:
+        fakultas_terlambat = st.multiselect(
+            "Filter fakultas", pilihan_fakultas, placeholder="Semua fakultas"
+        )
+    with col_p:
+        petugas_terlambat = st.multiselect(
+            "Filter petugas", pilihan_petugas, placeholder="Semua petugas"
+        )
+
+    @st.fragment(run_every=refresh_detik())
+    def monitor_terlambat():
+        try:
+            df_terlambat = load_terlambat(kebijakan)
+        except Exception as e:
+            st.error("Gagal memuat peminjaman terbuka dari database.")
+            st.exception(e)
+            return
+
+        if fakultas_terlambat:
+            df_terlambat = df_terlambat[df_terlambat["nama_fakultas"].isin(fakultas_terlambat)]
+        if petugas_terlambat:
+            df_terlambat = df_terlambat[df_terlambat["nama_petugas"].isin(petugas_terlambat)]
+
+        col_m1, col_m2, col_m3 = st.columns(3)
+        with col_m1:
+            st.metric("Peminjaman terlambat", f"{len(df_terlambat):,}")
+        with col_m2:
+            st.metric("Proyeksi denda", f"Rp {int(df_terlambat['proyeksi_denda'].sum()):,}")
+        with col_m3:
+            st.metric(
+                "Keterlambatan terlama",
+                f"{int(df_terlambat['hari_terlambat'].max())} hari" if len(df_terlambat) else "-",
+            )
+        st.caption(f"Diperbarui otomatis setiap {refresh_detik()} detik.")
+
+        if df_terlambat.empty:
+            st.info("Tidak ada peminjaman terlambat untuk filter ini.")
+            return
+
+        col_r1, col_r2 = st.columns(2)
+        with col_r1:
+            st.markdown("**Per fakultas**")
+            st.dataframe(ringkasan_terlambat(df_terlambat, "nama_fakultas"), use_container_width=True, hide_index=True)
+        with col_r2:
+            st.markdown("**Per petugas**")
+            st.dataframe(ringkasan_terlambat(df_terlambat, "nama_petugas"), use_container_width=True, hide_index=True)
+
+        st.markdown("**Daftar kerja**")
+        n_halaman = jumlah_halaman(len(df_terlambat))
+        nomor = st.number_input(f"Halaman (dari {n_halaman})", min_value=1, max_value=n_halaman, value=1)
+        st.dataframe(halaman(df_terlambat, nomor), use_container_width=True, hide_index=True)
+
+    monitor_terlambat()
+
 # ======================================================
 # HALAMAN: ANGGOTA
 # ======================================================
@@ -482,11 +1002,13 @@ elif page == "Anggota":
         "Pencarian nama anggota",
         placeholder="Ketik nama atau sebagian nama anggota...",
     )
-    df_anggota_view = df_anggota.copy()
-    if search_nama:
-        df_anggota_view = df_anggota_view[
-            df_anggota_view["nama_anggota"].str.contains(search_nama, case=False, na=False)
-        ]
+    # Jumlah per status/fakultas diambil dari kubus hierarki (dibangun sekali per
+    # versi data anggota); pencarian hanya menghasilkan posisi anggota yang cocok.
+    hierarki = load_hierarki()
+    posisi = posisi_pencarian(hierarki, search_nama)
+    df_anggota_view = bentuk_tampilan(df_anggota, posisi)
+    catat_sesi("df_anggota_view (Anggota)", df_anggota_view)
+    jumlah_daun = jumlah_per_daun(hierarki, posisi)
 
     with st.expander("Tabel data anggota"):
         st.dataframe(df_anggota_view, use_container_width=True, height=350)
@@ -503,12 +1025,16 @@ elif page == "Anggota":
 
     with col1:
         st.subheader("Jumlah anggota per status")
-        fig_status = chart_anggota_per_status(df_anggota_view)
+        fig_status = chart_anggota_per_status(
+            df_anggota_view, per_status=jumlah_per_status(hierarki, jumlah_daun)
+        )
         st.plotly_chart(fig_status, use_container_width=True)
 
     with col2:
         st.subheader("Jumlah anggota per fakultas")
-        fig_fak = chart_anggota_per_fakultas(df_anggota_view)
+        fig_fak = chart_anggota_per_fakultas(
+            df_anggota_view, treemap=data_treemap(hierarki, jumlah_daun)
+        )
         st.plotly_chart(fig_fak, use_container_width=True)
 
     with st.expander("Penjelasan dan kesimpulan halaman Anggota"):
@@ -551,27 +1077,6 @@ elif page == "Buku":
         "Pencarian judul buku",
         placeholder="Ketik judul atau sebagian judul buku...",
     )
-    df_buku_view = df_buku.copy()
-    if search_judul:
-        df_buku_view = df_buku_view[
-            df_buku_view["judul"].str.contains(search_judul, case=False, na=False)
-        ]
-
-    # Urutan kolom: tampilkan kode_* sebelum eksemplar
-    cols_order = [
-        "id_buku",
-        "kode_judul",
-        "judul",
-        "kode_klasifikasi",
-        "kategori_buku",
-        "kode_pengarang",
-        "tahun_terbit",
-        "isbn",
-        "status_buku",
-        "eksemplar",
-    ]
-    existing_cols = [c for c in cols_order if c in df_buku_view.columns]
-    df_buku_view = df_buku_view[existing_cols]
 
     # Filter kategori dan status buku
     kategori_list = ["(Semua)"] + sorted(df_buku["kategori_buku"].dropna().unique().tolist())
@@ -583,10 +1088,30 @@ elif page == "Buku":
     with col_filter2:
         status_buku_pilih = st.selectbox("Status buku", status_buku_list)
 
-    if kategori_pilih != "(Semua)":
-        df_buku_view = df_buku_view[df_buku_view["kategori_buku"] == kategori_pilih]
-    if status_buku_pilih != "(Semua)":
-        df_buku_view = df_buku_view[df_buku_view["status_buku"] == status_buku_pilih]
+    # Pencarian + filter digabung menjadi satu array posisi; tabel tampilan
+    # (urutan kolom: kode_* sebelum eksemplar) dibentuk sekali.
+    posisi_buku = posisi_cocok(
+        df_buku,
+        cari={"judul": search_judul},
+        sama={"kategori_buku": kategori_pilih, "status_buku": status_buku_pilih},
+    )
+    df_buku_view = bentuk_tampilan(
+        df_buku,
+        posisi_buku,
+        [
+            "id_buku",
+            "kode_judul",
+            "judul",
+            "kode_klasifikasi",
+            "kategori_buku",
+            "kode_pengarang",
+            "tahun_terbit",
+            "isbn",
+            "status_buku",
+            "eksemplar",
+        ],
+    )
+    catat_sesi("df_buku_view (Buku)", df_buku_view)
 
     with st.expander("Tabel data buku"):
         st.dataframe(df_buku_view, use_container_width=True, height=350)
@@ -615,6 +1140,60 @@ elif page == "Buku":
     fig_th = chart_buku_per_tahun(df_buku_view)
     st.plotly_chart(fig_th, use_container_width=True)
 
+    # ----------------- Pemanfaatan koleksi (peminjaman per eksemplar) -----------------
+    st.subheader("Pemanfaatan koleksi")
+    model_buku = load_model()
+    indeks_util = load_indeks_utilisasi()
+    per_judul = utilisasi_judul(model_buku, indeks_util)
+    per_kat_util = utilisasi_kategori(model_buku, indeks_util)
+    posisi_idle = posisi_tidak_dipinjam(
+        model_buku, indeks_util, None if kategori_pilih == "(Semua)" else kategori_pilih
+    )
+
+    n_eksemplar = int(per_kat_util["eksemplar"].sum())
+    col_u1, col_u2, col_u3 = st.columns(3)
+    with col_u1:
+        st.metric(
+            "Eksemplar pernah dipinjam",
+            f"{n_eksemplar - len(indeks_util.tidak_dipinjam):,} dari {n_eksemplar:,}",
+        )
+    with col_u2:
+        st.metric("Belum pernah dipinjam", f"{len(indeks_util.tidak_dipinjam):,}")
+    with col_u3:
+        st.metric(
+            "Rata-rata peminjaman per eksemplar",
+            f"{per_judul['peminjaman'].sum() / max(n_eksemplar, 1):.1f}",
+        )
+
+    col_u4, col_u5 = st.columns(2)
+    with col_u4:
+        st.plotly_chart(chart_pinjam_per_eksemplar(per_judul), use_container_width=True)
+    with col_u5:
+        st.plotly_chart(chart_utilisasi_kategori(per_kat_util), use_container_width=True)
+
+    with st.expander("Sirkulasi per judul"):
+        st.dataframe(per_judul, use_container_width=True, hide_index=True, height=350)
+
+    st.markdown(
+        "**Eksemplar yang belum pernah dipinjam**"
+        + (f" (kategori {kategori_pilih})" if kategori_pilih != "(Semua)" else "")
+    )
+    if len(posisi_idle) == 0:
+        st.info("Semua eksemplar pada pilihan ini pernah dipinjam.")
+    else:
+        n_halaman_idle = jumlah_halaman(len(posisi_idle))
+        nomor_idle = st.number_input(
+            f"Halaman (dari {n_halaman_idle}, {len(posisi_idle):,} eksemplar)",
+            min_value=1,
+            max_value=n_halaman_idle,
+            value=1,
+        )
+        st.dataframe(
+            halaman_tidak_dipinjam(model_buku, posisi_idle, nomor_idle),
+            use_container_width=True,
+            hide_index=True,
+        )
+
     with st.expander("Penjelasan dan kesimpulan halaman Buku"):
         st.markdown(
             """
@@ -623,6 +1202,7 @@ elif page == "Buku":
             - Grafik **buku per kategori** menunjukkan keseimbangan koleksi antar bidang ilmu.
             - Grafik **status koleksi** memperlihatkan proporsi buku yang tersedia, sedang dipinjam, hilang, dan rusak.
             - Grafik **buku per tahun terbit** membantu menilai seberapa mutakhir koleksi dan kapan perlu dilakukan pengadaan buku baru.
+            - Bagian **pemanfaatan koleksi** menunjukkan judul dengan peminjaman per eksemplar tertinggi (kandidat penambahan eksemplar) dan eksemplar yang belum pernah dipinjam (kandidat evaluasi/penyiangan).
             - Kesimpulan: halaman ini berfungsi sebagai dashboard kondisi koleksi dan dasar perencanaan pengembangan perpustakaan.
             """
         )
@@ -693,3 +1273,68 @@ elif page == "Referensi data":
             """
         )
 
+
+# ======================================================
+# HALAMAN: IMPOR DATA
+# ======================================================
+
+elif page == "Impor data":
+    st.subheader("Impor data anggota dan katalog")
+    st.write(
+        "Unggah berkas CSV atau Excel (.xlsx) dengan baris pertama berisi nama kolom tabel. "
+        "Berkas diproses per potongan: setiap potongan divalidasi (kolom wajib, enum, email unik, "
+        "relasi ke tabel acuan) lalu ditulis dalam satu transaksi pendek."
+    )
+
+    col_tabel, col_metode, col_potongan = st.columns(3)
+    with col_tabel:
+        tabel_impor = st.selectbox("Tabel tujuan", list(SKEMA_IMPOR))
+    with col_metode:
+        metode_impor = st.selectbox(
+            "Metode tulis",
+            METODE_TULIS,
+            help="load_data memakai LOAD DATA LOCAL INFILE (server harus mengizinkan local_infile).",
+        )
+    with col_potongan:
+        ukuran_impor = st.number_input("Baris per potongan", min_value=100, value=UKURAN_POTONGAN, step=1000)
+
+    skema_impor = SKEMA_IMPOR[tabel_impor]
+    st.caption(
+        f"Kolom yang dikenali: {', '.join(skema_impor.kolom)} "
+        f"(wajib: {', '.join(skema_impor.wajib)})."
+    )
+    berkas_impor = st.file_uploader("Berkas data", type=["csv", "xlsx"])
+    kering_impor = st.checkbox("Validasi saja (tanpa menulis ke database)")
+
+    if berkas_impor is not None and st.button("Proses berkas", type="primary"):
+        try:
+            with st.spinner("Memproses berkas..."):
+                hasil_impor = impor_berkas(
+                    berkas_impor,
+                    tabel_impor,
+                    nama_berkas=berkas_impor.name,
+                    metode=metode_impor,
+                    ukuran=int(ukuran_impor),
+                    kering=kering_impor,
+                )
+        except Exception as e:
+            st.error("Impor gagal; potongan yang sedang ditulis dibatalkan (rollback).")
+            st.exception(e)
+        else:
+            galat_impor = hasil_impor.tabel_galat()
+            col_i1, col_i2, col_i3 = st.columns(3)
+            with col_i1:
+                st.metric("Baris dibaca", f"{hasil_impor.dibaca:,}")
+            with col_i2:
+                st.metric("Baris ditulis", f"{hasil_impor.ditulis:,}")
+            with col_i3:
+                st.metric("Baris ditolak", f"{len(galat_impor):,}")
+            st.caption(f"Selesai dalam {hasil_impor.detik:.2f} detik.")
+            if not galat_impor.empty:
+                st.dataframe(galat_impor, use_container_width=True, hide_index=True)
+                st.download_button(
+                    "Unduh baris yang ditolak (CSV)",
+                    galat_impor.to_csv(index=False).encode("utf-8"),
+                    file_name=f"galat_impor_{tabel_impor}.csv",
+                    mime="text/csv",
+                )
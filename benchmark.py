@@ -0,0 +1,310 @@
+"""
+benchmark.py
+Benchmark sederhana untuk jalur data dashboard Seperlima.
+
+Data peminjaman dibuat sintetis (tanpa MySQL) dengan skema yang sama seperti
+database `seperlima`, lalu model star schema dibangun dari data tersebut.
+
+Contoh:
+    python benchmark.py --n 1000000
+    python benchmark.py --mysql      # + jalur fetch pada JOIN peminjaman di MySQL
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+import warnings
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from model import build_star_schema, view_peminjaman_detail
+
+
+def buat_data_sintetis(n_pinjam: int, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """Tabel dasar sintetis (nama tabel sama dengan model.TABEL_DASAR)."""
+    rng = np.random.default_rng(seed)
+    n_fak, n_prodi, n_anggota = 3, 22, max(20, n_pinjam // 50)
+    n_judul, n_klas, n_buku, n_peng, n_petugas = 500, 10, 1500, 300, 5
+
+    fakultas = pd.DataFrame({
+        "id_fakultas": np.arange(1, n_fak + 1),
+        "kode_fakultas": [f"F{i}" for i in range(1, n_fak + 1)],
+        "nama_fakultas": [f"Fakultas {i}" for i in range(1, n_fak + 1)],
+    })
+    prodi = pd.DataFrame({
+        "id_prodi": np.arange(1, n_prodi + 1),
+        "id_fakultas": rng.integers(1, n_fak + 1, n_prodi),
+        "nama_prodi": [f"Prodi {i}" for i in range(1, n_prodi + 1)],
+        "jenjang": "S1",
+    })
+    anggota = pd.DataFrame({
+        "id_anggota": np.arange(1, n_anggota + 1),
+        "id_prodi": rng.integers(1, n_prodi + 1, n_anggota),
+        "no_identitas": [f"{i:08d}" for i in range(1, n_anggota + 1)],
+        "status": rng.choice(["mahasiswa", "dosen", "tendik"], n_anggota, p=[0.85, 0.1, 0.05]),
+        "nama_anggota": [f"Anggota {i}" for i in range(1, n_anggota + 1)],
+        "email": [f"anggota{i}@itk.ac.id" for i in range(1, n_anggota + 1)],
+    })
+    judul = pd.DataFrame({
+        "id_judul": np.arange(1, n_judul + 1),
+        "kode_judul": [f"J{i}" for i in range(1, n_judul + 1)],
+        "judul": [f"Judul buku {i}" for i in range(1, n_judul + 1)],
+    })
+    klasifikasi = pd.DataFrame({
+        "id_klasifikasi": np.arange(1, n_klas + 1),
+        "kode_klasifikasi": [f"{i * 100:03d}" for i in range(n_klas)],
+        "kategori_buku": [f"Kategori {i}" for i in range(1, n_klas + 1)],
+    })
+    buku = pd.DataFrame({
+        "id_buku": np.arange(1, n_buku + 1),
+        "id_judul": rng.integers(1, n_judul + 1, n_buku),
+        "id_klasifikasi": rng.integers(1, n_klas + 1, n_buku),
+        "tahun_terbit": rng.integers(2000, 2025, n_buku),
+        "isbn": [f"978-602-{i:06d}" for i in range(1, n_buku + 1)],
+        "status": rng.choice(["Tersedia", "Dipinjam", "Rusak", "Hilang"], n_buku, p=[0.7, 0.2, 0.05, 0.05]),
+        "eksemplar": "c.1",
+    })
+    pengarang = pd.DataFrame({
+        "id_pengarang": np.arange(1, n_peng + 1),
+        "kode_pengarang": [f"P{i}" for i in range(1, n_peng + 1)],
+        "nama_pengarang": [f"Pengarang {i}" for i in range(1, n_peng + 1)],
+    })
+    buku_pengarang = pd.DataFrame({
+        "id_buku_pengarang": np.arange(1, n_buku + 1),
+        "id_buku": np.arange(1, n_buku + 1),
+        "id_pengarang": rng.integers(1, n_peng + 1, n_buku),
+        "urutan_pengarang": 1,
+    })
+    petugas = pd.DataFrame({
+        "id_petugas": np.arange(1, n_petugas + 1),
+        "nama_petugas": [f"Petugas {i}" for i in range(1, n_petugas + 1)],
+        "no_hp": None,
+        "alamat": None,
+    })
+
+    awal = np.datetime64("2020-01-01T08:00")
+    menit = rng.integers(0, 6 * 365 * 24 * 60, n_pinjam)
+    tgl_pinjam = awal + menit.astype("timedelta64[m]")
+    durasi = rng.integers(1, 40, n_pinjam)
+    kembali = rng.random(n_pinjam) < 0.9
+    tgl_kembali = np.where(kembali, tgl_pinjam + durasi.astype("timedelta64[D]"), np.datetime64("NaT"))
+    denda = np.maximum(durasi - 7, 0) * 2000
+    peminjaman = pd.DataFrame({
+        "id_peminjaman": np.arange(1, n_pinjam + 1),
+        "id_anggota": rng.integers(1, n_anggota + 1, n_pinjam),
+        "id_petugas": rng.integers(1, n_petugas + 1, n_pinjam),
+        "id_buku": rng.integers(1, n_buku + 1, n_pinjam),
+        "tgl_pinjam": tgl_pinjam,
+        "tgl_kembali": tgl_kembali,
+        "durasi_peminjaman": durasi,
+        "denda_buku": denda,
+        "status_peminjaman": np.where(
+            kembali, "Selesai", rng.choice(["Sedang dipinjam", "Hilang", "Rusak"], n_pinjam, p=[0.8, 0.1, 0.1])
+        ),
+    })
+
+    return {
+        "fakultas": fakultas,
+        "program_studi": prodi,
+        "anggota": anggota,
+        "judul": judul,
+        "klasifikasi": klasifikasi,
+        "buku": buku,
+        "pengarang": pengarang,
+        "buku_pengarang": buku_pengarang,
+        "petugas": petugas,
+        "peminjaman": peminjaman,
+    }
+
+
+def ukur(fungsi, ulang: int = 5) -> float:
+    """Waktu terbaik (ms) dari beberapa kali pemanggilan."""
+    terbaik = float("inf")
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fungsi()
+        terbaik = min(terbaik, time.perf_counter() - mulai)
+    return terbaik * 1000
+
+
+def bench_engine(df: pd.DataFrame) -> None:
+    """Membandingkan jalur pandas dan DuckDB (engine.py) untuk filter & agregasi."""
+    from engine import duckdb, filter_peminjaman, hitung_per_grup
+
+    pilihan = {
+        "nama_fakultas": "Fakultas 1",
+        "nama_prodi": "(Semua)",
+        "status_anggota": "mahasiswa",
+        "status_peminjaman": "(Semua)",
+        "kategori_buku": "(Semua)",
+    }
+    kasus = {
+        "filter_peminjaman": lambda: filter_peminjaman(df, date(2021, 1, 1), date(2022, 12, 31), pilihan),
+        "per_fakultas": lambda: hitung_per_grup(df, "nama_fakultas"),
+        "rata_durasi_fakultas": lambda: hitung_per_grup(
+            df, "nama_fakultas", "durasi_peminjaman", agregasi="mean", nama_hasil="rata_durasi"
+        ),
+        "top_judul": lambda: hitung_per_grup(df, "judul").head(5),
+    }
+
+    jalur = ["pandas"] + (["duckdb"] if duckdb is not None else [])
+    print(f"{'kasus':<24}" + "".join(f"{j:>12}" for j in jalur))
+    for nama, fungsi in kasus.items():
+        hasil = []
+        for j in jalur:
+            os.environ["SEPERLIMA_ENGINE"] = j
+            hasil.append(ukur(fungsi))
+        print(f"{nama:<24}" + "".join(f"{ms:>10.1f}ms" for ms in hasil))
+    os.environ.pop("SEPERLIMA_ENGINE", None)
+
+
+# JOIN lengkap peminjaman (kolom setara view_peminjaman_detail) untuk benchmark fetch
+QUERY_JOIN_PEMINJAMAN = """
+    SELECT p.id_peminjaman, p.tgl_pinjam, p.tgl_kembali, p.durasi_peminjaman, p.denda_buku,
+           p.status_peminjaman, a.nama_anggota, a.status AS status_anggota, ps.nama_prodi,
+           ps.jenjang, f.nama_fakultas, j.id_judul, j.judul, k.kategori_buku,
+           b.tahun_terbit, b.status AS status_buku, b.eksemplar, pt.nama_petugas
+    FROM peminjaman p
+    JOIN anggota a ON p.id_anggota = a.id_anggota
+    LEFT JOIN program_studi ps ON a.id_prodi = ps.id_prodi
+    LEFT JOIN fakultas f ON ps.id_fakultas = f.id_fakultas
+    JOIN buku b ON p.id_buku = b.id_buku
+    JOIN judul j ON b.id_judul = j.id_judul
+    JOIN klasifikasi k ON b.id_klasifikasi = k.id_klasifikasi
+    JOIN petugas pt ON p.id_petugas = pt.id_petugas
+"""
+
+
+# Kolom hasil QUERY_JOIN_PEMINJAMAN dan kode tipe MySQL-nya (mysql.connector.FieldType)
+_KOLOM_JOIN = {
+    "id_peminjaman": 3, "tgl_pinjam": 12, "tgl_kembali": 12, "durasi_peminjaman": 3,
+    "denda_buku": 3, "status_peminjaman": 254, "nama_anggota": 253, "status_anggota": 254,
+    "nama_prodi": 253, "jenjang": 253, "nama_fakultas": 253, "id_judul": 3, "judul": 253,
+    "kategori_buku": 253, "tahun_terbit": 13, "status_buku": 254, "eksemplar": 253,
+    "nama_petugas": 253,
+}
+
+
+class _CursorTiruan:
+    """
+    Cursor DB-API di atas baris teks mentah protokol MySQL. Tanpa raw, setiap
+    baris diubah ke objek Python oleh MySQLConverter seperti mysql.connector.
+    """
+
+    def __init__(self, deskripsi: list[tuple], baris: list[tuple], raw: bool):
+        from mysql.connector.conversion import MySQLConverter
+
+        self.description = deskripsi
+        self._baris = baris
+        self._posisi = 0
+        self._ubah = None if raw else MySQLConverter().row_to_python
+
+    def execute(self, *args, **kwargs):
+        self._posisi = 0
+
+    def fetchmany(self, n: int):
+        hasil = self._baris[self._posisi:self._posisi + n]
+        self._posisi += n
+        if self._ubah is not None:
+            hasil = [self._ubah(b, self.description) for b in hasil]
+        return hasil
+
+    def fetchall(self):
+        return self.fetchmany(len(self._baris))
+
+    def close(self):
+        pass
+
+
+class _KoneksiTiruan:
+    def __init__(self, deskripsi: list[tuple], baris: list[tuple]):
+        self._deskripsi, self._baris = deskripsi, baris
+
+    def cursor(self, raw: bool = False):
+        return _CursorTiruan(self._deskripsi, self._baris, raw)
+
+    def commit(self):
+        pass
+
+
+def _koneksi_tiruan(df: pd.DataFrame) -> _KoneksiTiruan:
+    """Baris JOIN dari view_peminjaman_detail sebagai teks mentah (bytes/None)."""
+    kolom = [c for c in _KOLOM_JOIN if c in df.columns]
+    teks = {}
+    for c in kolom:
+        seri = df[c]
+        if pd.api.types.is_datetime64_any_dtype(seri):
+            nilai = seri.dt.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            nilai = seri.astype(str)
+        teks[c] = [None if kosong else v.encode() for v, kosong in zip(nilai, seri.isna())]
+    deskripsi = [(c, _KOLOM_JOIN[c], None, None, None, None, 1, 0, 45) for c in kolom]
+    return _KoneksiTiruan(deskripsi, list(zip(*teks.values())))
+
+
+def _muat_sampai_datetime(conn) -> pd.DataFrame:
+    """Fetch JOIN + konversi tanggal seperti model._build_fakta."""
+    from ambil import baca_frame
+
+    df = baca_frame(QUERY_JOIN_PEMINJAMAN, conn)
+    pd.to_datetime(df["tgl_pinjam"])
+    pd.to_datetime(df["tgl_kembali"])
+    return df
+
+
+def bench_fetch(df: pd.DataFrame, conn=None) -> None:
+    """
+    Membandingkan jalur fetch ambil.py ("dbapi" vs "arrow") sampai kolom
+    tanggal berupa datetime64. Tanpa `conn`, hasil JOIN ditiru dari `df`
+    sebagai teks mentah protokol MySQL (tanpa jaringan), sehingga yang
+    diukur hanya biaya decoding di sisi klien.
+    """
+    from ambil import pa
+
+    label = "MySQL" if conn is not None else f"tiruan, {len(df)} baris"
+    conn = conn if conn is not None else _koneksi_tiruan(df)
+    jalur = ["dbapi"] + (["arrow"] if pa is not None else [])
+    print(f"{'fetch JOIN (' + label + ')':<36}" + "".join(f"{j:>12}" for j in jalur))
+    hasil = []
+    with warnings.catch_warnings():
+        # pandas memperingatkan koneksi DB-API selain SQLAlchemy/sqlite3
+        warnings.simplefilter("ignore", UserWarning)
+        for j in jalur:
+            os.environ["SEPERLIMA_FETCH_BACKEND"] = j
+            hasil.append(ukur(lambda: _muat_sampai_datetime(conn), ulang=3))
+    print(f"{'':<36}" + "".join(f"{ms:>10.1f}ms" for ms in hasil))
+    os.environ.pop("SEPERLIMA_FETCH_BACKEND", None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=200_000, help="jumlah baris peminjaman sintetis")
+    parser.add_argument("--mysql", action="store_true", help="ukur juga jalur fetch pada JOIN peminjaman di MySQL (db.py)")
+    args = parser.parse_args()
+
+    tabel = buat_data_sintetis(args.n)
+    mulai = time.perf_counter()
+    model = build_star_schema(tabel)
+    print(f"build_star_schema: {(time.perf_counter() - mulai) * 1000:.1f}ms ({args.n} peminjaman)")
+    df = view_peminjaman_detail(model)
+    print(f"view_peminjaman_detail: {ukur(lambda: view_peminjaman_detail(model)):.1f}ms")
+    print()
+    bench_engine(df)
+    print()
+    bench_fetch(df)
+    if args.mysql:
+        from db import get_connection
+
+        conn = get_connection()
+        try:
+            bench_fetch(df, conn)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
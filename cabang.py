@@ -0,0 +1,95 @@
+"""
+cabang.py
+Ringkasan lintas cabang (tenant) untuk dashboard Seperlima.
+
+Catatan:
+- Setiap cabang punya partisi ringkasan sendiri: agregat parsial per
+  (bulan, status peminjaman) berisi jumlah peminjaman dan total denda, plus
+  jumlah anggota aktif. Partisi dihitung di database cabang (GROUP BY) dan
+  di-cache per tenant dengan TTL.
+- Pertanyaan lintas cabang dijawab dengan menggabungkan (menjumlahkan)
+  agregat parsial semua cabang; partisi yang belum ada di cache dihitung
+  paralel (satu thread per cabang, masing-masing memakai pool koneksinya).
+- Anggota terdaftar per cabang sehingga anggota aktif gabungan = jumlah
+  anggota aktif tiap cabang.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+from ambil import baca_frame
+from db import jalankan_baca
+from tenant import daftar_tenant
+from timeseries import label_periode
+
+# Umur cache partisi ringkasan per cabang (detik)
+TTL_CABANG = 300
+
+_QUERY_PARSIAL = """
+    SELECT
+        YEAR(tgl_pinjam) * 12 + MONTH(tgl_pinjam) - 1 AS kunci,
+        status_peminjaman,
+        COUNT(*) AS jumlah,
+        COALESCE(SUM(denda_buku), 0) AS total_denda
+    FROM peminjaman
+    GROUP BY kunci, status_peminjaman
+"""
+
+_QUERY_ANGGOTA = "SELECT COUNT(DISTINCT id_anggota) AS anggota_aktif FROM peminjaman"
+
+
+@st.cache_data(ttl=TTL_CABANG)
+def partisi_cabang(tenant: str) -> dict:
+    """Agregat parsial satu cabang: {"per_bulan": DataFrame, "anggota_aktif": int}."""
+    per_bulan, anggota = jalankan_baca(
+        lambda conn: (baca_frame(_QUERY_PARSIAL, conn), baca_frame(_QUERY_ANGGOTA, conn)),
+        cadangan="partisi_cabang",
+        tenant=tenant,
+    )
+    per_bulan = per_bulan.astype({"kunci": "int64", "jumlah": "int64", "total_denda": "int64"})
+    return {"per_bulan": per_bulan, "anggota_aktif": int(anggota["anggota_aktif"].iloc[0])}
+
+
+def kumpulkan_partisi(tenants: list[str] | None = None, maks_paralel: int = 8) -> dict[str, dict]:
+    """Partisi ringkasan beberapa cabang, dihitung paralel."""
+    tenants = list(tenants or daftar_tenant())
+    with ThreadPoolExecutor(max_workers=max(1, min(maks_paralel, len(tenants)))) as pool:
+        return dict(zip(tenants, pool.map(partisi_cabang, tenants)))
+
+
+def ringkasan_lintas_cabang(partisi: dict[str, dict]) -> pd.DataFrame:
+    """Satu baris per cabang + baris 'Semua cabang' hasil penjumlahan."""
+    baris = [
+        {
+            "cabang": tenant,
+            "peminjaman": int(p["per_bulan"]["jumlah"].sum()),
+            "total_denda": int(p["per_bulan"]["total_denda"].sum()),
+            "anggota_aktif": p["anggota_aktif"],
+        }
+        for tenant, p in partisi.items()
+    ]
+    hasil = pd.DataFrame(baris, columns=["cabang", "peminjaman", "total_denda", "anggota_aktif"])
+    total = hasil[["peminjaman", "total_denda", "anggota_aktif"]].sum()
+    hasil.loc[len(hasil)] = ["Semua cabang", *total.astype("int64").tolist()]
+    return hasil
+
+
+def tren_lintas_cabang(partisi: dict[str, dict]) -> pd.DataFrame:
+    """
+    Gabungan agregat per (bulan, status) semua cabang dalam format
+    timeseries.agregat_waktu (kunci, periode, status_peminjaman, jumlah).
+    """
+    semua = [p["per_bulan"] for p in partisi.values() if not p["per_bulan"].empty]
+    if not semua:
+        return pd.DataFrame(columns=["kunci", "periode", "status_peminjaman", "jumlah"])
+    gabung = (
+        pd.concat(semua)
+        .groupby(["kunci", "status_peminjaman"], as_index=False)["jumlah"]
+        .sum()
+    )
+    gabung.insert(1, "periode", label_periode(gabung["kunci"].to_numpy(), "bulan"))
+    return gabung
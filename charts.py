@@ -7,14 +7,30 @@ Catatan:
   sehingga aman untuk langsung dipakai di st.plotly_chart().
 - Beberapa fungsi juga mengembalikan DataFrame agregat sebagai nilai kedua
   untuk dipakai sebagai insight/caption di app.py.
+- Agregasi per grup dikerjakan lewat engine.hitung_per_grup (pandas/DuckDB).
 """
 
 from __future__ import annotations
 
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 
+from engine import hitung_per_grup
+from histogram import BATAS_DURASI, densitas_2d, histogram_durasi_dari_frame, kelompokkan_bin
+from topk import top_k_judul_dari_frame
+from timeseries import (
+    MAKS_TITIK,
+    agregat_waktu,
+    awal_periode,
+    bandingkan_tahun_lalu,
+    jendela_bergulir,
+    label_periode,
+    seri_padat,
+    turunkan_resolusi,
+)
+
 # ==========================
 # Palet warna “perpustakaan”
 # ==========================
@@ -35,6 +51,10 @@ GRID_COLOR = "#3A2A18"      # garis grid cokelat lembut
 AXIS_LINE = "#8C663E"       # garis sumbu warna leather
 FONT_COLOR = "#F9FAFB"
 
+# Batas jumlah titik scatter per mode render (lihat chart_scatter_durasi_denda)
+AMBANG_SCATTER_SVG = 5_000
+AMBANG_SCATTER_WEBGL = 200_000
+
 
 def _apply_common_layout(fig: go.Figure, title: str | None = None) -> go.Figure:
     """Layout seragam untuk semua grafik (tanpa background solid)."""
@@ -89,44 +109,96 @@ def _empty_fig(title: str, message: str) -> go.Figure:
 # 1. RINGKASAN / PEMINJAMAN
 # ============================================================
 
-def chart_tren_bulanan_status(df_pinjam: pd.DataFrame) -> go.Figure:
+def chart_tren_bulanan_status(
+    df_pinjam: pd.DataFrame,
+    tren: pd.DataFrame | None = None,
+    granularitas: str = "bulan",
+    jendela: int | None = None,
+    tahun_lalu: bool = False,
+    maks_titik: int = MAKS_TITIK,
+) -> go.Figure:
     """
-    Line chart (dengan area) tren peminjaman per bulan berdasarkan status.
+    Area bertumpuk tren peminjaman per periode berdasarkan status.
     Menggunakan kolom:
       - tgl_pinjam (datetime)
       - status_peminjaman
+
+    Opsi:
+      - granularitas: "hari", "minggu", "bulan" (default), "semester", "tahun".
+      - tren: hasil timeseries.agregat_waktu(df_pinjam, granularitas,
+        grup="status_peminjaman") agar agregat yang sama dipakai ulang untuk caption.
+      - jendela: 7 / 30 -> jumlah peminjaman bergulir N hari terakhir (harian).
+      - tahun_lalu: True -> garis periode ini vs periode yang sama tahun lalu.
+    Seri panjang diturunkan dengan LTTB menjadi maksimal `maks_titik` titik.
     """
+    judul = f"Perkembangan peminjaman per {granularitas} berdasarkan status"
     if df_pinjam.empty:
         return _empty_fig(
             "Perkembangan peminjaman per bulan",
             "Belum ada data peminjaman yang bisa ditampilkan."
         )
 
-    df = df_pinjam.copy()
-    df["bulan"] = df["tgl_pinjam"].dt.to_period("M").astype(str)
+    if tahun_lalu:
+        return _chart_tren_tahun_lalu(df_pinjam, granularitas, maks_titik)
 
-    per_bulan_status = (
-        df.groupby(["bulan", "status_peminjaman"])
-          .size()
-          .reset_index(name="jumlah")
-    )
+    if jendela:
+        lebar = jendela_bergulir(df_pinjam, jendela, grup="status_peminjaman")
+        granularitas = "hari"
+        judul = f"Jumlah peminjaman {jendela} hari terakhir berdasarkan status"
+    else:
+        if tren is None:
+            tren = agregat_waktu(df_pinjam, granularitas, grup="status_peminjaman")
+        lebar = seri_padat(tren, grup="status_peminjaman")
 
-    fig = px.area(
-        per_bulan_status,
-        x="bulan",
-        y="jumlah",
-        color="status_peminjaman",
-        color_discrete_sequence=PALETTE,
-    )
-    fig.update_traces(mode="lines+markers")
-    fig.update_xaxes(title_text="Bulan")
+    lebar = turunkan_resolusi(lebar, maks_titik)
+    x = awal_periode(lebar.index.to_numpy(), granularitas)
+    label = label_periode(lebar.index.to_numpy(), granularitas)
+
+    fig = go.Figure()
+    for i, status in enumerate(lebar.columns):
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=lebar[status].to_numpy(),
+            name=str(status),
+            mode="lines+markers" if len(lebar) <= 60 else "lines",
+            stackgroup="status",
+            line=dict(color=PALETTE[i % len(PALETTE)]),
+            customdata=label,
+            hovertemplate="%{customdata}<br>%{y} peminjaman<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_xaxes(title_text="Periode")
     fig.update_yaxes(title_text="Jumlah peminjaman")
-    return _apply_common_layout(fig, "Perkembangan peminjaman per bulan berdasarkan status")
+    return _apply_common_layout(fig, judul)
 
 
-def chart_peminjaman_per_fakultas(df_pinjam: pd.DataFrame):
+def _chart_tren_tahun_lalu(df_pinjam: pd.DataFrame, granularitas: str, maks_titik: int) -> go.Figure:
+    """Garis jumlah peminjaman per periode dibanding periode yang sama tahun lalu."""
+    yoy = turunkan_resolusi(bandingkan_tahun_lalu(df_pinjam, granularitas)[["jumlah", "tahun_lalu"]], maks_titik)
+    x = awal_periode(yoy.index.to_numpy(), granularitas)
+    label = label_periode(yoy.index.to_numpy(), granularitas)
+
+    fig = go.Figure()
+    for kolom, nama, warna in [("jumlah", "Periode ini", PALETTE[0]), ("tahun_lalu", "Tahun lalu", PALETTE[2])]:
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=yoy[kolom].to_numpy(),
+            name=nama,
+            mode="lines",
+            line=dict(color=warna, dash="dot" if kolom == "tahun_lalu" else None),
+            customdata=label,
+            hovertemplate="%{customdata}<br>%{y} peminjaman<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_xaxes(title_text="Periode")
+    fig.update_yaxes(title_text="Jumlah peminjaman")
+    return _apply_common_layout(fig, f"Peminjaman per {granularitas} dibanding tahun lalu")
+
+
+def chart_peminjaman_per_fakultas(df_pinjam: pd.DataFrame, per_fak: pd.DataFrame | None = None):
     """
     Bar chart jumlah peminjaman per fakultas.
+
+    `per_fak` (kolom nama_fakultas, jumlah) bisa diberikan dari kubus agregat
+    (kubus.per_fakultas) saat filter silang aktif.
     """
     if df_pinjam.empty or "nama_fakultas" not in df_pinjam.columns:
         fig = _empty_fig(
@@ -135,12 +207,8 @@ def chart_peminjaman_per_fakultas(df_pinjam: pd.DataFrame):
         )
         return fig, pd.DataFrame()
 
-    per_fak = (
-        df_pinjam.groupby("nama_fakultas")
-        .size()
-        .reset_index(name="jumlah")
-        .sort_values("jumlah", ascending=False)
-    )
+    if per_fak is None:
+        per_fak = hitung_per_grup(df_pinjam, "nama_fakultas")
 
     fig = px.bar(
         per_fak,
@@ -155,9 +223,12 @@ def chart_peminjaman_per_fakultas(df_pinjam: pd.DataFrame):
     return fig, per_fak
 
 
-def chart_peminjaman_per_kategori(df_pinjam: pd.DataFrame):
+def chart_peminjaman_per_kategori(df_pinjam: pd.DataFrame, per_kat: pd.DataFrame | None = None):
     """
     Donut chart komposisi peminjaman per kategori_buku.
+
+    `per_kat` (kolom kategori_buku, jumlah) bisa diberikan dari kubus agregat
+    (kubus.per_kategori) saat filter silang aktif.
     """
     if df_pinjam.empty or "kategori_buku" not in df_pinjam.columns:
         fig = _empty_fig(
@@ -166,12 +237,8 @@ def chart_peminjaman_per_kategori(df_pinjam: pd.DataFrame):
         )
         return fig, pd.DataFrame()
 
-    per_kat = (
-        df_pinjam.groupby("kategori_buku")
-        .size()
-        .reset_index(name="jumlah")
-        .sort_values("jumlah", ascending=False)
-    )
+    if per_kat is None:
+        per_kat = hitung_per_grup(df_pinjam, "kategori_buku")
 
     fig = px.pie(
         per_kat,
@@ -185,12 +252,15 @@ def chart_peminjaman_per_kategori(df_pinjam: pd.DataFrame):
     return fig, per_kat
 
 
-def chart_durasi_rata_per_fakultas(df_pinjam: pd.DataFrame):
+def chart_durasi_rata_per_fakultas(df_pinjam: pd.DataFrame, durasi_fak: pd.DataFrame | None = None):
     """
     Bar chart rata-rata durasi peminjaman per fakultas.
     Menggunakan kolom:
       - nama_fakultas
       - durasi_peminjaman
+
+    `durasi_fak` (kolom nama_fakultas, rata_durasi) bisa diberikan dari kubus
+    agregat (kubus.durasi_per_fakultas) saat filter silang aktif.
     """
     if df_pinjam.empty or "durasi_peminjaman" not in df_pinjam.columns:
         fig = _empty_fig(
@@ -199,12 +269,10 @@ def chart_durasi_rata_per_fakultas(df_pinjam: pd.DataFrame):
         )
         return fig, pd.DataFrame()
 
-    durasi_fak = (
-        df_pinjam.groupby("nama_fakultas")["durasi_peminjaman"]
-        .mean()
-        .reset_index(name="rata_durasi")
-        .sort_values("rata_durasi", ascending=False)
-    )
+    if durasi_fak is None:
+        durasi_fak = hitung_per_grup(
+            df_pinjam, "nama_fakultas", "durasi_peminjaman", agregasi="mean", nama_hasil="rata_durasi"
+        )
 
     fig = px.bar(
         durasi_fak,
@@ -219,9 +287,54 @@ def chart_durasi_rata_per_fakultas(df_pinjam: pd.DataFrame):
     return fig, durasi_fak
 
 
-def chart_hist_durasi(df_pinjam: pd.DataFrame):
+def chart_heatmap_fakultas_kategori(
+    df_pinjam: pd.DataFrame,
+    matriks: pd.DataFrame | None = None,
+    label_nilai: str = "Jumlah peminjaman",
+    persen: bool = False,
+):
+    """
+    Heatmap peminjaman berdasarkan kombinasi fakultas (baris) dan kategori buku (kolom).
+
+    `matriks` (index nama_fakultas, kolom kategori_buku) sebaiknya diambil dari
+    kubus agregat (kubus.matriks_fakultas_kategori) sesuai metrik dan
+    normalisasi yang dipilih; tanpa `matriks`, jumlah peminjaman dihitung dari
+    df_pinjam. `persen` hanya mengubah format nilai di hover.
+    """
+    if df_pinjam.empty:
+        fig = _empty_fig(
+            "Peminjaman berdasarkan fakultas dan kategori buku",
+            "Belum ada data peminjaman yang bisa ditampilkan."
+        )
+        return fig, pd.DataFrame()
+
+    if matriks is None:
+        matriks = df_pinjam.groupby(["nama_fakultas", "kategori_buku"]).size().unstack(fill_value=0)
+
+    format_z = "%{z:.1f}%" if persen else "%{z:,.1f}"
+    fig = go.Figure(go.Heatmap(
+        x=matriks.columns.astype(str),
+        y=matriks.index.astype(str),
+        z=matriks.to_numpy(),
+        colorscale=[[0, PALETTE[2]], [0.5, PALETTE[1]], [1, PALETTE[0]]],
+        colorbar=dict(title="%" if persen else label_nilai),
+        hovertemplate=f"%{{y}}<br>%{{x}}<br>{label_nilai}: {format_z}<extra></extra>",
+    ))
+    fig.update_xaxes(title_text="Kategori buku")
+    fig.update_yaxes(title_text="Fakultas")
+    fig = _apply_common_layout(fig, "Peminjaman berdasarkan fakultas dan kategori buku")
+    return fig, matriks
+
+
+def chart_hist_durasi(df_pinjam: pd.DataFrame, hist: np.ndarray | None = None, nbins: int = 10):
     """
     Histogram distribusi durasi_peminjaman.
+
+    Bin dihitung di server (lihat histogram.py) dan dikirim sebagai go.Bar
+    berisi batas bin dan jumlahnya saja. `hist` boleh diisi histogram satuan
+    dari histogram.histogram_durasi agar tidak dihitung ulang dari DataFrame.
+    Bin luapan (durasi >= BATAS_DURASI) digambar sebagai batang terpisah
+    berlabel "≥ BATAS_DURASI hari". Nilai kedua: DataFrame bin (lihat kelompokkan_bin).
     """
     if df_pinjam.empty or "durasi_peminjaman" not in df_pinjam.columns:
         fig = _empty_fig(
@@ -230,31 +343,101 @@ def chart_hist_durasi(df_pinjam: pd.DataFrame):
         )
         return fig, pd.DataFrame()
 
-    df = df_pinjam[df_pinjam["durasi_peminjaman"].notna()].copy()
-    if df.empty:
+    if hist is None:
+        hist = histogram_durasi_dari_frame(df_pinjam)
+    per_bin = kelompokkan_bin(hist, nbins)
+    if per_bin.empty:
         fig = _empty_fig(
             "Distribusi durasi peminjaman",
             "Semua durasi_peminjaman bernilai NULL."
         )
-        return fig, pd.DataFrame()
-
-    fig = px.histogram(
-        df,
-        x="durasi_peminjaman",
-        nbins=10,
-        color_discrete_sequence=[PALETTE[1]],
-    )
+        return fig, per_bin
+
+    reguler = per_bin[~per_bin["luapan"]]
+    luapan = per_bin[per_bin["luapan"]]
+    lebar = (reguler["batas_atas"] - reguler["batas_bawah"]).astype(int)
+    label = [
+        f"{b} hari" if l == 1 else f"{b}–{int(a) - 1} hari"
+        for b, a, l in zip(reguler["batas_bawah"], reguler["batas_atas"], lebar)
+    ]
+    fig = go.Figure(go.Bar(
+        x=reguler["batas_bawah"] + lebar / 2,
+        y=reguler["jumlah"],
+        width=lebar,
+        name="Durasi",
+        marker=dict(color=PALETTE[1], line=dict(color=PALETTE[0], width=1)),
+        customdata=label,
+        hovertemplate="%{customdata}<br>%{y} peminjaman<extra></extra>",
+    ))
+    if not luapan.empty:
+        # Bin luapan (durasi >= BATAS_DURASI) tidak berlebar tetap: digambar
+        # terpisah dengan warna dan label sendiri, selebar bin reguler
+        lebar_luapan = int(lebar.max()) if len(lebar) else max(1, BATAS_DURASI // nbins)
+        label_luapan = f"≥ {BATAS_DURASI} hari"
+        fig.add_trace(go.Bar(
+            x=[BATAS_DURASI + lebar_luapan / 2],
+            y=luapan["jumlah"],
+            width=[lebar_luapan],
+            name=label_luapan,
+            marker=dict(color=PALETTE[2], line=dict(color=PALETTE[0], width=1), pattern=dict(shape="/")),
+            text=[label_luapan],
+            textposition="outside",
+            hovertemplate=f"{label_luapan}<br>%{{y}} peminjaman<extra></extra>",
+        ))
     fig.update_xaxes(title_text="Durasi peminjaman (hari)")
     fig.update_yaxes(title_text="Jumlah peminjaman")
     fig = _apply_common_layout(fig, "Distribusi durasi peminjaman")
-    # Data agregat sederhana (jumlah per bin tidak kita kembalikan di sini)
-    return fig, df[["durasi_peminjaman"]]
+    return fig, per_bin
 
 
-def chart_scatter_durasi_denda(df_pinjam: pd.DataFrame) -> go.Figure:
+def chart_box_durasi(ringkasan: pd.DataFrame, label_grup: str = "Status peminjaman") -> go.Figure:
+    """
+    Box plot durasi peminjaman per grup dari statistik yang sudah dihitung
+    (kuantil.ringkasan_durasi / ringkasan_durasi_dari_frame): kotak = kuartil,
+    garis tengah = median, whisker = min/maks. Hanya statistik per grup yang
+    dikirim ke browser, bukan titik peminjaman.
+    """
+    if ringkasan.empty:
+        return _empty_fig(
+            "Sebaran durasi peminjaman",
+            "Belum ada durasi peminjaman untuk filter ini."
+        )
+
+    fig = go.Figure()
+    for i, baris in enumerate(ringkasan.itertuples(index=False)):
+        fig.add_trace(go.Box(
+            x=[str(baris.grup)],
+            q1=[baris.q1],
+            median=[baris.median],
+            q3=[baris.q3],
+            lowerfence=[baris.min],
+            upperfence=[baris.maks],
+            name=str(baris.grup),
+            marker=dict(color=PALETTE[i % len(PALETTE)]),
+            hovertemplate=(
+                f"{baris.grup}<br>{baris.n:,} peminjaman<br>Median {baris.median:.0f} hari"
+                f"<br>p90 {baris.p90:.0f} hari<extra></extra>"
+            ),
+        ))
+    fig.update_layout(showlegend=False)
+    fig.update_xaxes(title_text=label_grup)
+    fig.update_yaxes(title_text="Durasi peminjaman (hari)")
+    return _apply_common_layout(fig, "Sebaran durasi peminjaman")
+
+
+def chart_scatter_durasi_denda(df_pinjam: pd.DataFrame, mode: str = "otomatis") -> go.Figure:
     """
     Scatter plot durasi_peminjaman vs denda_buku.
     Membantu menjelaskan logika denda: semakin lama, potensi denda makin besar.
+
+    mode:
+      - "svg"      : satu marker SVG per peminjaman (px.scatter).
+      - "webgl"    : go.Scattergl, masih nyaman hingga ratusan ribu titik.
+      - "densitas" : raster jumlah titik yang dibin di server (heatmap);
+                     titik asli per area bisa diambil dengan
+                     histogram.titik_dalam_area.
+      - "otomatis" : svg <= AMBANG_SCATTER_SVG titik, webgl <= AMBANG_SCATTER_WEBGL,
+                     selebihnya densitas.
     """
     if df_pinjam.empty or "durasi_peminjaman" not in df_pinjam.columns or "denda_buku" not in df_pinjam.columns:
         return _empty_fig(
@@ -262,22 +445,41 @@ def chart_scatter_durasi_denda(df_pinjam: pd.DataFrame) -> go.Figure:
             "Kolom durasi_peminjaman atau denda_buku tidak ditemukan."
         )
 
-    df = df_pinjam.copy()
-    df = df[df["durasi_peminjaman"].notna()]
-
-    if df.empty:
+    n_titik = int(df_pinjam["durasi_peminjaman"].notna().sum())
+    if n_titik == 0:
         return _empty_fig(
             "Hubungan durasi peminjaman dan denda",
             "Belum ada data durasi & denda yang bisa ditampilkan."
         )
 
-    fig = px.scatter(
-        df,
-        x="durasi_peminjaman",
-        y="denda_buku",
-        color="status_peminjaman",
-        color_discrete_sequence=PALETTE,
-    )
+    if mode == "otomatis":
+        if n_titik <= AMBANG_SCATTER_SVG:
+            mode = "svg"
+        elif n_titik <= AMBANG_SCATTER_WEBGL:
+            mode = "webgl"
+        else:
+            mode = "densitas"
+
+    if mode == "densitas":
+        x, y, jumlah = densitas_2d(df_pinjam)
+        fig = go.Figure(go.Heatmap(
+            x=x,
+            y=y,
+            z=jumlah,
+            colorscale=[[0, PALETTE[2]], [0.5, PALETTE[1]], [1, PALETTE[0]]],
+            colorbar=dict(title="Jumlah"),
+            hovertemplate="Durasi ≈ %{x:.0f} hari<br>Denda ≈ Rp %{y:,.0f}<br>%{z} peminjaman<extra></extra>",
+        ))
+    else:
+        df = df_pinjam[df_pinjam["durasi_peminjaman"].notna()]
+        fig = px.scatter(
+            df,
+            x="durasi_peminjaman",
+            y="denda_buku",
+            color="status_peminjaman",
+            color_discrete_sequence=PALETTE,
+            render_mode="webgl" if mode == "webgl" else "svg",
+        )
     fig.update_xaxes(title_text="Durasi peminjaman (hari)")
     fig.update_yaxes(title_text="Denda buku (Rp)")
     return _apply_common_layout(fig, "Hubungan durasi peminjaman dan denda")
@@ -298,12 +500,7 @@ def chart_peminjaman_per_status(df_filtered: pd.DataFrame):
         )
         return fig, pd.DataFrame()
 
-    per_status = (
-        df_filtered.groupby("status_peminjaman")
-        .size()
-        .reset_index(name="jumlah")
-        .sort_values("jumlah", ascending=False)
-    )
+    per_status = hitung_per_grup(df_filtered, "status_peminjaman")
 
     fig = px.bar(
         per_status,
@@ -318,28 +515,34 @@ def chart_peminjaman_per_status(df_filtered: pd.DataFrame):
     return fig, per_status
 
 
-def chart_top5_judul(df_filtered: pd.DataFrame):
+def chart_top5_judul(
+    df_filtered: pd.DataFrame,
+    top_judul: pd.DataFrame | None = None,
+    k: int = 5,
+    lainnya: bool = False,
+):
     """
-    Horizontal bar: 5 judul buku dengan jumlah peminjaman terbanyak.
+    Horizontal bar: k (default 5) judul buku dengan jumlah peminjaman terbanyak.
+    Dihitung per id_judul (lihat topk.py); `top_judul` boleh diisi hasil
+    topk.top_k_judul agar tidak dihitung ulang dari DataFrame.
     """
+    judul_grafik = (
+        "Lima judul buku dengan peminjaman tertinggi" if k == 5
+        else f"{k} judul buku dengan peminjaman tertinggi"
+    )
     if df_filtered.empty or "judul" not in df_filtered.columns:
         fig = _empty_fig(
-            "Lima judul buku dengan peminjaman tertinggi",
+            judul_grafik,
             "Kolom judul tidak ditemukan atau data kosong."
         )
         return fig, pd.DataFrame()
 
-    top_judul = (
-        df_filtered.groupby("judul")
-        .size()
-        .reset_index(name="jumlah")
-        .sort_values("jumlah", ascending=False)
-        .head(5)
-    )
+    if top_judul is None:
+        top_judul = top_k_judul_dari_frame(df_filtered, k, lainnya)
 
     if top_judul.empty:
         fig = _empty_fig(
-            "Lima judul buku dengan peminjaman tertinggi",
+            judul_grafik,
             "Belum ada data peminjaman per judul."
         )
         return fig, top_judul
@@ -354,7 +557,7 @@ def chart_top5_judul(df_filtered: pd.DataFrame):
     )
     fig.update_xaxes(title_text="Jumlah peminjaman")
     fig.update_yaxes(title_text="Judul buku", autorange="reversed")
-    fig = _apply_common_layout(fig, "Lima judul buku dengan peminjaman tertinggi")
+    fig = _apply_common_layout(fig, judul_grafik)
     return fig, top_judul
 
 
@@ -362,9 +565,15 @@ def chart_top5_judul(df_filtered: pd.DataFrame):
 # 3. HALAMAN DATA ANGGOTA
 # ============================================================
 
-def chart_anggota_per_status(df_anggota_view: pd.DataFrame) -> go.Figure:
+def chart_anggota_per_status(
+    df_anggota_view: pd.DataFrame,
+    per_status: pd.DataFrame | None = None,
+) -> go.Figure:
     """
     Bar chart jumlah anggota per status_anggota (mahasiswa, dosen, tendik).
+
+    `per_status` (kolom status_anggota, jumlah) bisa diberikan dari kubus
+    hierarki (hierarki.jumlah_per_status) agar tidak perlu groupby ulang.
     """
     if df_anggota_view.empty or "status_anggota" not in df_anggota_view.columns:
         return _empty_fig(
@@ -372,11 +581,8 @@ def chart_anggota_per_status(df_anggota_view: pd.DataFrame) -> go.Figure:
             "Kolom status_anggota tidak ditemukan atau data kosong."
         )
 
-    per_status = (
-        df_anggota_view.groupby("status_anggota")
-        .size()
-        .reset_index(name="jumlah")
-    )
+    if per_status is None:
+        per_status = hitung_per_grup(df_anggota_view, "status_anggota", urut=None)
 
     fig = px.bar(
         per_status,
@@ -390,9 +596,15 @@ def chart_anggota_per_status(df_anggota_view: pd.DataFrame) -> go.Figure:
     return _apply_common_layout(fig, "Jumlah anggota per status")
 
 
-def chart_anggota_per_fakultas(df_anggota_view: pd.DataFrame) -> go.Figure:
+def chart_anggota_per_fakultas(
+    df_anggota_view: pd.DataFrame,
+    treemap: pd.DataFrame | None = None,
+) -> go.Figure:
     """
     Treemap jumlah anggota per fakultas.
+
+    Bila `treemap` (simpul ids/labels/parents/values dari hierarki.data_treemap)
+    diberikan, treemap digambar bertingkat fakultas -> prodi -> jenjang -> status.
     """
     if df_anggota_view.empty or "nama_fakultas" not in df_anggota_view.columns:
         return _empty_fig(
@@ -400,11 +612,22 @@ def chart_anggota_per_fakultas(df_anggota_view: pd.DataFrame) -> go.Figure:
             "Kolom nama_fakultas tidak ditemukan atau data kosong."
         )
 
-    per_fak = (
-        df_anggota_view.groupby("nama_fakultas")
-        .size()
-        .reset_index(name="jumlah")
-    )
+    if treemap is not None:
+        fig = go.Figure(
+            go.Treemap(
+                ids=treemap["ids"],
+                labels=treemap["labels"],
+                parents=treemap["parents"],
+                values=treemap["values"],
+                branchvalues="total",
+                maxdepth=2,
+                marker=dict(colors=treemap["values"], colorscale=[PALETTE[2], PALETTE[1]]),
+                hovertemplate="%{label}<br>Jumlah anggota: %{value}<extra></extra>",
+            )
+        )
+        return _apply_common_layout(fig, "Jumlah anggota per fakultas")
+
+    per_fak = hitung_per_grup(df_anggota_view, "nama_fakultas", urut=None)
 
     fig = px.treemap(
         per_fak,
@@ -430,12 +653,7 @@ def chart_buku_per_kategori(df_buku_view: pd.DataFrame) -> go.Figure:
             "Kolom kategori_buku tidak ditemukan atau data kosong."
         )
 
-    per_kat = (
-        df_buku_view.groupby("kategori_buku")
-        .size()
-        .reset_index(name="jumlah")
-        .sort_values("jumlah", ascending=False)
-    )
+    per_kat = hitung_per_grup(df_buku_view, "kategori_buku")
 
     fig = px.bar(
         per_kat,
@@ -460,12 +678,7 @@ def chart_buku_per_tahun(df_buku_view: pd.DataFrame) -> go.Figure:
             "Kolom tahun_terbit tidak ditemukan atau data kosong."
         )
 
-    per_tahun = (
-        df_buku_view.groupby("tahun_terbit")
-        .size()
-        .reset_index(name="jumlah")
-        .sort_values("tahun_terbit")
-    )
+    per_tahun = hitung_per_grup(df_buku_view, "tahun_terbit", urut="key")
 
     fig = px.line(
         per_tahun,
@@ -498,12 +711,7 @@ def chart_buku_per_status(df_buku_view: pd.DataFrame):
         )
         return fig, pd.DataFrame()
 
-    per_status = (
-        df_buku_view.groupby(status_col)
-        .size()
-        .reset_index(name="jumlah")
-        .sort_values("jumlah", ascending=False)
-    )
+    per_status = hitung_per_grup(df_buku_view, status_col)
 
     if per_status.empty:
         fig = _empty_fig(
@@ -523,3 +731,61 @@ def chart_buku_per_status(df_buku_view: pd.DataFrame):
     fig.update_yaxes(title_text="Jumlah buku")
     fig = _apply_common_layout(fig, "Kondisi / status koleksi buku")
     return fig, per_status
+
+
+def chart_pinjam_per_eksemplar(per_judul: pd.DataFrame, k: int = 15) -> go.Figure:
+    """
+    Horizontal bar judul dengan peminjaman per eksemplar tertinggi
+    (utilisasi.utilisasi_judul, sudah terurut): kandidat penambahan eksemplar.
+    """
+    if per_judul.empty or not per_judul["peminjaman"].any():
+        return _empty_fig(
+            "Peminjaman per eksemplar",
+            "Belum ada peminjaman yang bisa ditampilkan."
+        )
+
+    top = per_judul.head(k)
+    fig = go.Figure(go.Bar(
+        x=top["pinjam_per_eksemplar"],
+        y=top["judul"],
+        orientation="h",
+        marker=dict(color=PALETTE[0]),
+        customdata=np.column_stack([top["peminjaman"], top["eksemplar"]]),
+        hovertemplate=(
+            "%{y}<br>%{x:.1f} peminjaman per eksemplar"
+            "<br>%{customdata[0]} peminjaman, %{customdata[1]} eksemplar<extra></extra>"
+        ),
+    ))
+    fig.update_xaxes(title_text="Peminjaman per eksemplar")
+    fig.update_yaxes(title_text="Judul", autorange="reversed")
+    return _apply_common_layout(fig, f"{len(top)} judul dengan peminjaman per eksemplar tertinggi")
+
+
+def chart_utilisasi_kategori(per_kat: pd.DataFrame) -> go.Figure:
+    """
+    Stacked bar eksemplar yang pernah beredar vs belum pernah dipinjam per
+    kategori (utilisasi.utilisasi_kategori).
+    """
+    if per_kat.empty:
+        return _empty_fig(
+            "Pemanfaatan eksemplar per kategori",
+            "Belum ada data buku yang bisa ditampilkan."
+        )
+
+    fig = go.Figure()
+    for kolom, nama, warna in [
+        ("beredar", "Pernah dipinjam", PALETTE[1]),
+        ("belum_pernah_dipinjam", "Belum pernah dipinjam", PALETTE[2]),
+    ]:
+        fig.add_trace(go.Bar(
+            x=per_kat[kolom],
+            y=per_kat["kategori_buku"],
+            orientation="h",
+            name=nama,
+            marker=dict(color=warna),
+            hovertemplate="%{y}<br>%{x} eksemplar<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_layout(barmode="stack")
+    fig.update_xaxes(title_text="Jumlah eksemplar")
+    fig.update_yaxes(title_text="Kategori buku", autorange="reversed")
+    return _apply_common_layout(fig, "Pemanfaatan eksemplar per kategori")
@@ -0,0 +1,25 @@
+"""
+config.py
+Pengaturan aplikasi dashboard Seperlima.
+
+Urutan sumber nilai:
+1. Environment variable SEPERLIMA_<NAMA> (huruf besar), misalnya SEPERLIMA_ENGINE.
+2. st.secrets (file .streamlit/secrets.toml), kunci <nama>.
+3. Nilai default.
+"""
+
+import os
+
+import streamlit as st
+
+
+def get_setting(nama: str, default=None):
+    """Mengambil satu nilai pengaturan berdasarkan nama (lihat urutan di atas)."""
+    env = os.environ.get(f"SEPERLIMA_{nama.upper()}")
+    if env is not None:
+        return env
+    try:
+        return st.secrets.get(nama, default)
+    except Exception:
+        # Tidak ada secrets.toml: pakai default
+        return default
@@ -2,118 +2,421 @@
 db.py
 Modul koneksi dan pemuatan data dari MySQL untuk dashboard Seperlima.
 Semua query menggunakan tabel dasar (tanpa VIEW).
+
+Tabel peminjaman, anggota, buku, dan relasinya dimuat sekali ke model
+star schema (model.py); loader gabungan dibentuk dari model tersebut.
+
+Loader yang hasilnya hanya dibaca memakai memori.cache_bersama: satu objek
+dipakai bersama semua sesi tanpa salinan, dalam batas cache_budget_mb.
+
+Semua query baca dashboard lewat `jalankan_baca`/`baca_sql`: diarahkan ke
+replika baca bila diatur (pengaturan `replica`), dibatasi MAX_EXECUTION_TIME,
+dicoba ulang pada galat sementara, dan dilindungi pemutus sirkuit yang
+menyajikan snapshot terakhir saat database lambat. Dengan begitu beban
+dashboard tidak mengganggu transaksi peminjaman di server utama.
+
+Dengan pengaturan `offline` semua loader membaca dump SQL lokal (offline.py)
+tanpa server MySQL.
 """
 
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+
 import streamlit as st
 import pandas as pd
-import mysql.connector
+from mysql.connector import HAVE_CEXT, connect, errorcode, pooling
+from mysql.connector import errors as mysql_errors
+
+from ambil import baca_frame
+from config import get_setting
+from memori import cache_bersama, daftarkan
+from offline import koneksi_offline, mode_offline, sumber_dump
+from tenant import daftar_tenant, per_tenant, tenant_aktif
+
+from model import (
+    TABEL_DASAR,
+    StarSchema,
+    build_star_schema,
+    view_peminjaman_detail,
+    view_anggota,
+    view_buku,
+    view_buku_pengarang,
+)
+
+
+# Parameter koneksi default; bisa ditimpa pengaturan (lihat pengaturan_koneksi)
+# dan sebagian lagi oleh tenant (lihat tenant.py)
+KONEKSI_DEFAULT = {
+    "host": "localhost",
+    "user": "root",
+    "password": "",           # isi jika MySQL memakai password
+    "database": "seperlima",  # nama database
+    "use_pure": False,        # pakai C extension bila terpasang
+    "compress": False,        # kompresi protokol (berguna untuk server jauh)
+    "buffered": False,        # True: seluruh hasil diambil saat execute (prefetch)
+}
+
+# Opsi driver yang bisa diatur beserta tipenya
+OPSI_KONEKSI = {
+    "host": str,
+    "port": int,
+    "user": str,
+    "password": str,
+    "database": str,
+    "unix_socket": str,
+    "use_pure": bool,
+    "compress": bool,
+    "buffered": bool,
+    "connection_timeout": int,
+}
+
+# Opsi yang tidak pernah ditampilkan di laporan
+_RAHASIA = {"user", "password"}
+
+UKURAN_POOL = 5
+
+# Batas waktu eksekusi SELECT di server (MAX_EXECUTION_TIME, milidetik)
+BATAS_QUERY_MS = 30_000
+
+# Percobaan ulang untuk galat sementara: jumlah percobaan & jeda awal (detik, dikali 2 tiap kali)
+PERCOBAAN = 3
+JEDA_AWAL = 0.2
+
+# Pemutus sirkuit: terbuka setelah N kegagalan beruntun, selama JEDA_PEMUTUS detik
+BATAS_GAGAL = 3
+JEDA_PEMUTUS = 30
+
+# Kode galat MySQL yang layak dicoba ulang (koneksi putus, deadlock, lock wait)
+_GALAT_SEMENTARA = {
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_CONN_HOST_ERROR,
+    errorcode.ER_LOCK_DEADLOCK,
+    errorcode.ER_LOCK_WAIT_TIMEOUT,
+}
+
+
+def _nilai_opsi(nama: str, nilai):
+    """Mengubah nilai pengaturan (teks dari env atau nilai TOML) ke tipe opsi driver."""
+    tipe = OPSI_KONEKSI[nama]
+    if tipe is bool and isinstance(nilai, str):
+        return nilai.strip().lower() in ("1", "true", "ya", "yes", "on")
+    return tipe(nilai)
+
+
+def _sesuaikan_driver(param: dict) -> dict:
+    """use_pure=False hanya bila C extension terpasang; selain itu driver Python murni."""
+    if not param.get("use_pure", False) and not HAVE_CEXT:
+        param = {**param, "use_pure": True}
+    return param
+
+
+def _bersihkan(param: dict) -> dict:
+    """Hanya opsi yang dikenal, dengan tipe yang benar."""
+    return {k: _nilai_opsi(k, v) for k, v in param.items() if k in OPSI_KONEKSI}
 
 
-def get_connection():
+def pengaturan_koneksi() -> dict:
     """
-    Membuat koneksi ke database MySQL lokal.
-    Sesuaikan user/password jika konfigurasi berbeda.
+    Parameter koneksi server utama, berurutan (yang belakang menimpa):
+    1. KONEKSI_DEFAULT;
+    2. tabel [koneksi] di .streamlit/secrets.toml;
+    3. pengaturan per opsi `db_<opsi>` (env SEPERLIMA_DB_HOST, SEPERLIMA_DB_UNIX_SOCKET,
+       SEPERLIMA_DB_COMPRESS, ... atau kunci db_<opsi> di secrets).
     """
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",          # isi jika MySQL memakai password
-        database="seperlima"  # nama database
+    param = dict(KONEKSI_DEFAULT)
+    param.update(_bersihkan(dict(get_setting("koneksi", None) or {})))
+    for nama in OPSI_KONEKSI:
+        nilai = get_setting(f"db_{nama}", None)
+        if nilai is not None:
+            param[nama] = _nilai_opsi(nama, nilai)
+    return param
+
+
+class SirkuitTerbuka(RuntimeError):
+    """Database sedang dianggap tidak sehat dan belum ada snapshot untuk dipakai."""
+
+
+def _param_koneksi(tenant: str, peran: str) -> dict:
+    """
+    Parameter koneksi tenant untuk peran "utama" atau "replika".
+    Replika: pengaturan `replica` (tabel secrets atau nama host) lalu kunci
+    "replica" milik tenant, menimpa parameter utama. None bila tidak diatur.
+    """
+    param_tenant = dict(daftar_tenant()[tenant])
+    replika_tenant = param_tenant.pop("replica", None)
+    param = {**pengaturan_koneksi(), **_bersihkan(param_tenant)}
+    if peran == "utama":
+        return _sesuaikan_driver(param)
+    replika = get_setting("replica", None)
+    if isinstance(replika, str):
+        replika = {"host": replika}
+    if not replika and not replika_tenant:
+        return None
+    return _sesuaikan_driver({**param, **_bersihkan(dict(replika or {})), **_bersihkan(dict(replika_tenant or {}))})
+
+
+@st.cache_resource
+def _pool(tenant: str, peran: str = "utama") -> pooling.MySQLConnectionPool:
+    """Pool koneksi untuk satu tenant dan peran (dibuat sekali per proses)."""
+    return pooling.MySQLConnectionPool(
+        pool_name=f"seperlima_{tenant}_{peran}"[:64],
+        pool_size=int(get_setting("pool_size", UKURAN_POOL)),
+        **_param_koneksi(tenant, peran),
     )
 
 
-@st.cache_data
+def get_connection(tenant: str | None = None, tulis: bool = False):
+    """
+    Mengambil koneksi MySQL dari pool tenant (default: tenant aktif sesi ini).
+    Untuk baca (tulis=False) dipakai replika bila diatur. Hanya bila replika
+    tidak bisa dihubungi (galat tingkat koneksi) baca kembali ke server utama;
+    kegagalan itu dicatat di pemutus sirkuit replika sehingga selama jedanya
+    replika dilewati tanpa mencoba tersambung lagi. Pool replika yang penuh
+    (PoolError) tidak dialihkan ke server utama, tetapi diteruskan ke pemanggil
+    (jalankan_baca mencobanya ulang). conn.close() mengembalikan koneksi ke pool.
+    """
+    if mode_offline():
+        if tulis:
+            raise RuntimeError("Mode offline hanya-baca: tidak ada server MySQL untuk ditulis.")
+        return koneksi_offline()
+    tenant = tenant or tenant_aktif()
+    if not tulis and _param_koneksi(tenant, "replika") is not None:
+        pemutus = _pemutus(tenant, "replika")
+        if not pemutus.terbuka():
+            try:
+                conn = _pool(tenant, "replika").get_connection()
+            except (mysql_errors.InterfaceError, mysql_errors.OperationalError):
+                # replika mati/tidak terjangkau: langsung buka sirkuit replika
+                pemutus.gagal(batas=1)
+            else:
+                pemutus.berhasil(None, None)
+                return conn
+    return _pool(tenant, "utama").get_connection()
+
+
+def koneksi_langsung(tenant: str | None = None, **opsi):
+    """
+    Koneksi baru (tanpa pool) ke server utama dengan opsi driver tambahan,
+    mis. allow_local_infile=True untuk impor massal (impor.py).
+    """
+    if mode_offline():
+        raise RuntimeError("Mode offline hanya-baca: tidak ada server MySQL untuk ditulis.")
+    return connect(**_param_koneksi(tenant or tenant_aktif(), "utama"), **opsi)
+
+
+class PemutusSirkuit:
+    """
+    Status kesehatan database satu tenant: kegagalan beruntun, waktu sirkuit
+    terbuka, dan snapshot hasil baca terakhir yang berhasil (per nama).
+    """
+
+    def __init__(self):
+        self.kunci = threading.Lock()
+        self.gagal_beruntun = 0
+        self.terbuka_sampai = 0.0
+        self.snapshot: dict = {}
+
+    def terbuka(self) -> bool:
+        return time.monotonic() < self.terbuka_sampai
+
+    def berhasil(self, nama: str | None, hasil) -> None:
+        with self.kunci:
+            self.gagal_beruntun = 0
+            self.terbuka_sampai = 0.0
+            if nama is not None:
+                self.snapshot[nama] = hasil
+
+    def gagal(self, batas: int | None = None) -> None:
+        with self.kunci:
+            self.gagal_beruntun += 1
+            if self.gagal_beruntun >= (batas or int(get_setting("breaker_gagal", BATAS_GAGAL))):
+                self.terbuka_sampai = time.monotonic() + float(get_setting("breaker_jeda", JEDA_PEMUTUS))
+
+
+@st.cache_resource
+def _pemutus(tenant: str, peran: str = "utama") -> PemutusSirkuit:
+    """
+    Pemutus sirkuit per tenant dan peran: "utama" untuk hasil query baca
+    (jalankan_baca), "replika" untuk ketersediaan koneksi replika (get_connection).
+    """
+    return PemutusSirkuit()
+
+
+def sirkuit_terbuka(tenant: str | None = None) -> bool:
+    """True bila pemutus sirkuit tenant sedang terbuka (data dari snapshot)."""
+    return _pemutus(tenant or tenant_aktif()).terbuka()
+
+
+def _sementara(galat: Exception) -> bool:
+    """Galat koneksi/lock yang kemungkinan hilang bila dicoba ulang."""
+    if isinstance(galat, (mysql_errors.PoolError, mysql_errors.InterfaceError)):
+        return True
+    return getattr(galat, "errno", None) in _GALAT_SEMENTARA
+
+
+def jalankan_baca(fungsi, cadangan: str | None = None, tenant: str | None = None):
+    """
+    Menjalankan `fungsi(conn)` (query baca) dengan:
+    - koneksi replika bila ada (lihat get_connection);
+    - MAX_EXECUTION_TIME per sesi (pengaturan `query_timeout_ms`), sehingga
+      query berat dihentikan server alih-alih membebani jalur transaksi;
+    - percobaan ulang dengan backoff eksponensial untuk galat sementara;
+    - pemutus sirkuit: setelah beberapa kegagalan beruntun database tidak
+      dihubungi dulu, dan hasil terakhir yang berhasil dengan nama `cadangan`
+      dikembalikan (tanpa `cadangan`/snapshot: SirkuitTerbuka).
+    Pada mode offline (offline.py) `fungsi` langsung dijalankan pada dump lokal.
+    """
+    if mode_offline():
+        return fungsi(koneksi_offline())
+    tenant = tenant or tenant_aktif()
+    pemutus = _pemutus(tenant)
+    if pemutus.terbuka():
+        if cadangan in pemutus.snapshot:
+            return pemutus.snapshot[cadangan]
+        raise SirkuitTerbuka("Database sedang lambat/tidak tersedia; coba lagi sebentar lagi.")
+
+    batas_ms = int(get_setting("query_timeout_ms", BATAS_QUERY_MS))
+    jeda = JEDA_AWAL
+    for percobaan in range(PERCOBAAN):
+        try:
+            conn = get_connection(tenant)
+            try:
+                cur = conn.cursor()
+                cur.execute(f"SET SESSION MAX_EXECUTION_TIME = {batas_ms}")
+                cur.close()
+                hasil = fungsi(conn)
+            finally:
+                conn.close()
+        except mysql_errors.Error as e:
+            if _sementara(e) and percobaan + 1 < PERCOBAAN:
+                time.sleep(jeda)
+                jeda *= 2
+                continue
+            pemutus.gagal()
+            if cadangan in pemutus.snapshot:
+                return pemutus.snapshot[cadangan]
+            raise
+        pemutus.berhasil(cadangan, hasil)
+        return hasil
+
+
+def baca_sql(sql: str, params: tuple = (), cadangan: str | None = None, tenant: str | None = None) -> pd.DataFrame:
+    """Query -> DataFrame (ambil.baca_frame) melalui jalankan_baca (replika, batas waktu, retry, pemutus sirkuit)."""
+    return jalankan_baca(lambda conn: baca_frame(sql, conn, params), cadangan, tenant)
+
+
+def _cek_peran(tenant: str, peran: str, ulang: int) -> dict:
+    """Pengaturan efektif (tanpa kredensial) dan latensi round-trip satu peran."""
+    param = _param_koneksi(tenant, peran)
+    hasil = {"tenant": tenant, "peran": peran}
+    hasil.update({k: v for k, v in param.items() if k not in _RAHASIA})
+    hasil["pool_size"] = int(get_setting("pool_size", UKURAN_POOL))
+    try:
+        conn = _pool(tenant, peran).get_connection()
+    except mysql_errors.Error as e:
+        hasil["status"] = f"gagal: {e}"
+        return hasil
+    try:
+        cur = conn.cursor()
+        waktu = []
+        for _ in range(max(1, ulang)):
+            mulai = time.perf_counter()
+            cur.execute("SELECT 1")
+            cur.fetchall()
+            waktu.append((time.perf_counter() - mulai) * 1000)
+        cur.execute("SELECT VERSION()")
+        hasil["versi_server"] = cur.fetchone()[0]
+        cur.close()
+        hasil["driver"] = "C extension" if type(conn._cnx).__name__.startswith("CMySQL") else "pure Python"
+    finally:
+        conn.close()
+    waktu.sort()
+    hasil["rtt_median_ms"] = round(waktu[len(waktu) // 2], 3)
+    hasil["rtt_min_ms"] = round(waktu[0], 3)
+    hasil["status"] = "ok"
+    return hasil
+
+
+@st.cache_resource
+def cek_koneksi(tenant: str, ulang: int = 5) -> pd.DataFrame:
+    """
+    Pemeriksaan awal (sekali per proses per tenant): pengaturan koneksi
+    efektif server utama dan replika (tanpa user/password), driver yang
+    terpakai, versi server, dan latensi round-trip `SELECT 1`.
+    """
+    if mode_offline():
+        mulai = time.perf_counter()
+        koneksi_offline().frame("SELECT 1")
+        return pd.DataFrame([{
+            "tenant": tenant,
+            "peran": "offline",
+            "sumber": str(sumber_dump()),
+            "rtt_median_ms": round((time.perf_counter() - mulai) * 1000, 3),
+            "status": "ok",
+        }])
+    peran = ["utama"] + (["replika"] if _param_koneksi(tenant, "replika") is not None else [])
+    return pd.DataFrame([_cek_peran(tenant, p, ulang) for p in peran])
+
+
+@per_tenant()
+def load_model() -> StarSchema:
+    """
+    Membaca seluruh tabel dasar (tanpa JOIN) dalam satu koneksi dan menyusunnya
+    menjadi star schema in-memory (lihat model.py).
+
+    Disimpan dengan st.cache_resource (per tenant) sehingga hanya ada SATU
+    salinan model per cabang yang dipakai bersama oleh semua sesi; DataFrame
+    gabungan dibentuk dari model ini oleh loader di bawah.
+    """
+    tabel = jalankan_baca(lambda conn: {nama: baca_frame(f"SELECT * FROM {nama}", conn) for nama in TABEL_DASAR})
+    model = build_star_schema(tabel)
+    daftarkan(f"model [{tenant_aktif()}]", model)
+    return model
+
+
+_VIEW = {
+    "peminjaman_detail": view_peminjaman_detail,
+    "anggota": view_anggota,
+    "buku": view_buku,
+    "buku_pengarang": view_buku_pengarang,
+}
+
+
+@cache_bersama
+def _view_bersama(nama: str, dibangun: int) -> pd.DataFrame:
+    """View gabungan untuk model tertentu; satu objek dipakai bersama semua sesi."""
+    return _VIEW[nama](load_model())
+
+
 def load_peminjaman_detail():
     """
-    Mengambil data peminjaman dan menggabungkan dengan anggota, prodi,
-    fakultas, buku, judul, klasifikasi, dan petugas.
+    Data peminjaman yang sudah digabung dengan anggota, prodi, fakultas, buku,
+    judul, klasifikasi, dan petugas (dibentuk dari model in-memory).
 
     Kolom penting yang dihasilkan antara lain:
     - tgl_pinjam, tgl_kembali, durasi_peminjaman, denda_buku, status_peminjaman
     - nama_anggota, status_anggota, nama_prodi, jenjang, nama_fakultas
-    - judul, kategori_buku, tahun_terbit, status_buku, eksemplar
+    - id_judul, judul, kategori_buku, tahun_terbit, status_buku, eksemplar
     - nama_petugas
     """
-    conn = get_connection()
-    query = """
-        SELECT
-            p.id_peminjaman,
-            p.tgl_pinjam,
-            p.tgl_kembali,
-            p.durasi_peminjaman,
-            p.denda_buku,
-            CASE
-                WHEN p.tgl_kembali IS NULL THEN 'Sedang dipinjam'
-                ELSE 'Selesai'
-            END AS status_peminjaman,
-
-            a.id_anggota,
-            a.no_identitas,
-            a.status AS status_anggota,
-            a.nama_anggota,
-            a.email,
-
-            ps.nama_prodi,
-            ps.jenjang,
-            f.nama_fakultas,
-
-            b.id_buku,
-            j.judul,
-            k.kategori_buku,
-            b.tahun_terbit,
-            b.isbn,
-            b.status AS status_buku,
-            b.eksemplar,
-
-            pt.id_petugas,
-            pt.nama_petugas
-        FROM peminjaman p
-        JOIN anggota a ON p.id_anggota = a.id_anggota
-        LEFT JOIN program_studi ps ON a.id_prodi = ps.id_prodi
-        LEFT JOIN fakultas f ON ps.id_fakultas = f.id_fakultas
-        JOIN buku b ON p.id_buku = b.id_buku
-        JOIN judul j ON b.id_judul = j.id_judul
-        JOIN klasifikasi k ON b.id_klasifikasi = k.id_klasifikasi
-        JOIN petugas pt ON p.id_petugas = pt.id_petugas
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-
-    df["tgl_pinjam"] = pd.to_datetime(df["tgl_pinjam"])
-    df["tgl_kembali"] = pd.to_datetime(df["tgl_kembali"])
-    return df
-
-
-@st.cache_data
+    return _view_bersama("peminjaman_detail", load_model().dibangun)
+
+
 def load_anggota():
     """
-    Mengambil data anggota, sudah digabung dengan program studi dan fakultas.
+    Data anggota, sudah digabung dengan program studi dan fakultas.
     Dipakai di halaman 'Anggota'.
     """
-    conn = get_connection()
-    query = """
-        SELECT
-            a.id_anggota,
-            a.no_identitas,
-            a.status AS status_anggota,
-            a.nama_anggota,
-            a.email,
-            ps.nama_prodi,
-            ps.jenjang,
-            f.nama_fakultas
-        FROM anggota a
-        LEFT JOIN program_studi ps ON a.id_prodi = ps.id_prodi
-        LEFT JOIN fakultas f ON ps.id_fakultas = f.id_fakultas
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
-
-
-@st.cache_data
+    return _view_bersama("anggota", load_model().dibangun)
+
+
 def load_buku():
     """
-    Mengambil data koleksi buku beserta:
+    Data koleksi buku beserta:
     - kode_judul & judul
     - kode_klasifikasi & kategori_buku
     - kode_pengarang (bisa lebih dari satu, digabung dengan koma)
@@ -121,114 +424,55 @@ def load_buku():
 
     Sumber: tabel buku, judul, klasifikasi, buku_pengarang, pengarang.
     """
-    conn = get_connection()
-    query = """
-        SELECT
-            b.id_buku,
-            j.kode_judul,
-            j.judul,
-            k.kode_klasifikasi,
-            k.kategori_buku,
-            -- bisa lebih dari satu pengarang per buku
-            GROUP_CONCAT(pg.kode_pengarang
-                         ORDER BY bp.urutan_pengarang
-                         SEPARATOR ', ') AS kode_pengarang,
-            b.tahun_terbit,
-            b.isbn,
-            b.status AS status_buku,
-            b.eksemplar
-        FROM buku b
-        JOIN judul j
-            ON b.id_judul = j.id_judul
-        JOIN klasifikasi k
-            ON b.id_klasifikasi = k.id_klasifikasi
-        LEFT JOIN buku_pengarang bp
-            ON b.id_buku = bp.id_buku
-        LEFT JOIN pengarang pg
-            ON bp.id_pengarang = pg.id_pengarang
-        GROUP BY
-            b.id_buku,
-            j.kode_judul,
-            j.judul,
-            k.kode_klasifikasi,
-            k.kategori_buku,
-            b.tahun_terbit,
-            b.isbn,
-            b.status,
-            b.eksemplar
-        ORDER BY b.id_buku;
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
-
-
-
-@st.cache_data
+    return _view_bersama("buku", load_model().dibangun)
+
+
+@cache_bersama
 def load_fakultas():
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM fakultas", conn)
-    conn.close()
-    return df
+    return baca_sql("SELECT * FROM fakultas", cadangan="fakultas")
 
 
-@st.cache_data
+@cache_bersama
 def load_program_studi():
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM program_studi", conn)
-    conn.close()
-    return df
+    return baca_sql("SELECT * FROM program_studi", cadangan="program_studi")
 
 
-@st.cache_data
+@cache_bersama
 def load_pengarang():
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM pengarang", conn)
-    conn.close()
-    return df
+    return baca_sql("SELECT * FROM pengarang", cadangan="pengarang")
 
 
-@st.cache_data
 def load_buku_pengarang():
     """
-    Mengambil data relasi buku-pengarang beserta nama judul & nama pengarang.
-    """
-    conn = get_connection()
-    query = """
-        SELECT
-            bp.id_buku_pengarang,
-            bp.id_buku,
-            bp.id_pengarang,
-            bp.urutan_pengarang,
-            j.judul,
-            pg.nama_pengarang
-        FROM buku_pengarang bp
-        JOIN buku b ON bp.id_buku = b.id_buku
-        JOIN judul j ON b.id_judul = j.id_judul
-        JOIN pengarang pg ON bp.id_pengarang = pg.id_pengarang
+    Data relasi buku-pengarang beserta nama judul & nama pengarang.
     """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
+    return _view_bersama("buku_pengarang", load_model().dibangun)
 
 
-@st.cache_data
+@cache_bersama
 def load_petugas():
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM petugas", conn)
-    conn.close()
-    return df
+    return baca_sql("SELECT * FROM petugas", cadangan="petugas")
 
-@st.cache_data
+@cache_bersama
 def load_judul():
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM judul", conn)
-    conn.close()
-    return df
+    return baca_sql("SELECT * FROM judul", cadangan="judul")
 
-@st.cache_data
+@cache_bersama
 def load_klasifikasi():
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM klasifikasi", conn)
-    conn.close()
-    return df
+    return baca_sql("SELECT * FROM klasifikasi", cadangan="klasifikasi")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cek", action="store_true", help="tampilkan pengaturan koneksi efektif dan latensi round-trip")
+    parser.add_argument("--tenant", default=None, help="nama tenant (default: tenant pertama)")
+    args = parser.parse_args()
+
+    if args.cek:
+        print(cek_koneksi.__wrapped__(args.tenant or tenant_aktif()).T.to_string(header=False))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
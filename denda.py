@@ -0,0 +1,217 @@
+"""
+denda.py
+Buku besar (ledger) denda peminjaman untuk total dan rincian denda yang eksak.
+
+Catatan:
+- Denda disimpan sebagai int64 (rupiah utuh), tidak dijumlah sebagai float64.
+  Denda NULL dihitung 0, sama seperti SUM di SQL.
+- Baris peminjaman diurutkan per grup (petugas, fakultas, kategori) lalu per
+  tgl_pinjam, dan disimpan jumlah kumulatifnya (prefix sum). Total satu grup
+  untuk rentang tanggal apa pun = selisih dua nilai kumulatif yang posisinya
+  dicari dengan np.searchsorted (O(log n)).
+- Total seluruh grup memakai prefix sum tersendiri yang hanya diurutkan per
+  tanggal, sehingga total tanpa filter fakultas/kategori juga O(log n).
+- Rincian per fakultas, kategori, atau petugas dibentuk dari total per grup
+  (jumlah grup kecil), bukan dari baris peminjaman.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from db import load_model
+from memori import daftarkan
+from model import StarSchema, _take_kode
+from tenant import per_tenant, tenant_aktif
+from timeseries import kunci_waktu
+
+LABEL_TANPA = "(Tidak diketahui)"
+
+DIMENSI_DENDA = {
+    "fakultas": "nama_fakultas",
+    "kategori": "kategori_buku",
+    "petugas": "nama_petugas",
+}
+
+
+@dataclass
+class LedgerDenda:
+    """Prefix sum denda per grup (petugas, fakultas, kategori) dan per tanggal."""
+
+    # label dimensi; fakultas terakhir = anggota tanpa fakultas (kode -1)
+    nama_fakultas: np.ndarray
+    kategori: np.ndarray
+    nama_petugas: np.ndarray
+    # per grup
+    grup_fakultas: np.ndarray
+    grup_kategori: np.ndarray
+    grup_petugas: np.ndarray
+    # kunci = grup * rentang + hari relatif (0 = tanggal NULL), terurut
+    hari_awal: int
+    rentang: int
+    kunci: np.ndarray
+    kumulatif: np.ndarray
+    # hanya per tanggal (semua grup)
+    kunci_hari: np.ndarray
+    kumulatif_hari: np.ndarray
+
+
+def _denda_int(denda) -> np.ndarray:
+    """Denda sebagai int64; NULL menjadi 0."""
+    nilai = pd.Series(denda).to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.rint(np.nan_to_num(nilai)).astype(np.int64)
+
+
+def _kumulatif(denda: np.ndarray) -> np.ndarray:
+    """Prefix sum int64 dengan nol di depan (panjang n + 1)."""
+    return np.concatenate([[0], np.cumsum(denda, dtype=np.int64)])
+
+
+def bangun_ledger_denda(model: StarSchema) -> LedgerDenda:
+    """Menyusun LedgerDenda dari tabel fakta model."""
+    f = model.fakta
+    idx_anggota = f["idx_anggota"].to_numpy()
+    idx_buku = f["idx_buku"].to_numpy()
+    idx_fak = _take_kode(model.prodi["idx_fakultas"], model.anggota["idx_prodi"].to_numpy()[idx_anggota])
+    idx_kat = model.buku["idx_klasifikasi"].to_numpy()[idx_buku]
+    idx_petugas = f["idx_petugas"].to_numpy()
+    denda = _denda_int(f["denda_buku"])
+
+    # hari relatif: 1.. untuk tanggal terisi, 0 untuk tgl_pinjam NULL
+    tgl = f["tgl_pinjam"].to_numpy()
+    ada = ~pd.isna(tgl)
+    hari = np.zeros(len(tgl), dtype=np.int64)
+    hari_awal = 0
+    if ada.any():
+        hari_ada = kunci_waktu(tgl[ada], "hari")
+        hari_awal = int(hari_ada.min())
+        hari[ada] = hari_ada - hari_awal + 1
+    rentang = int(hari.max()) + 1 if len(hari) else 1
+
+    n_fak = len(model.fakultas) + 1
+    n_kat = len(model.klasifikasi)
+    kode_grup = (idx_petugas.astype(np.int64) * n_fak + (idx_fak + 1)) * n_kat + idx_kat
+    grup, kode_grup = np.unique(kode_grup, return_inverse=True)
+
+    kunci = kode_grup.astype(np.int64) * rentang + hari
+    urutan = np.argsort(kunci, kind="stable")
+    urutan_hari = np.argsort(hari, kind="stable")
+
+    return LedgerDenda(
+        nama_fakultas=np.append(model.fakultas["nama_fakultas"].to_numpy(dtype=object), LABEL_TANPA),
+        kategori=model.klasifikasi["kategori_buku"].to_numpy(dtype=object),
+        nama_petugas=model.petugas["nama_petugas"].to_numpy(dtype=object),
+        grup_fakultas=(grup // n_kat) % n_fak - 1,
+        grup_kategori=grup % n_kat,
+        grup_petugas=grup // (n_kat * n_fak),
+        hari_awal=hari_awal,
+        rentang=rentang,
+        kunci=kunci[urutan],
+        kumulatif=_kumulatif(denda[urutan]),
+        kunci_hari=hari[urutan_hari],
+        kumulatif_hari=_kumulatif(denda[urutan_hari]),
+    )
+
+
+@per_tenant()
+def load_ledger_denda() -> LedgerDenda:
+    """LedgerDenda untuk model yang sedang dimuat (per tenant, dipakai bersama semua sesi)."""
+    ledger = bangun_ledger_denda(load_model())
+    daftarkan(f"ledger_denda [{tenant_aktif()}]", ledger)
+    return ledger
+
+
+def _rentang_hari(ledger: LedgerDenda, start_date: date | None, end_date: date | None) -> tuple[int, int]:
+    """Hari relatif [awal, akhir] inklusif; tanpa batas tanggal ikut baris bertanggal NULL."""
+    awal, akhir = 0, ledger.rentang - 1
+    if start_date is not None:
+        awal = max(kunci_waktu(np.datetime64(start_date, "D"), "hari") - ledger.hari_awal + 1, 1)
+    if end_date is not None:
+        akhir = min(kunci_waktu(np.datetime64(end_date, "D"), "hari") - ledger.hari_awal + 1, akhir)
+        awal = max(awal, 1)
+    return int(awal), int(akhir)
+
+
+def _selisih(kunci: np.ndarray, kumulatif: np.ndarray, bawah, atas) -> tuple[np.ndarray, np.ndarray]:
+    """(Jumlah denda, jumlah baris) untuk kunci di [bawah, atas] (dua pencarian prefix sum)."""
+    kiri = np.searchsorted(kunci, bawah, side="left")
+    kanan = np.searchsorted(kunci, atas, side="right")
+    return kumulatif[kanan] - kumulatif[kiri], kanan - kiri
+
+
+def denda_per_grup(
+    ledger: LedgerDenda,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(Total denda, jumlah peminjaman) setiap grup dalam rentang tanggal."""
+    awal, akhir = _rentang_hari(ledger, start_date, end_date)
+    basis = np.arange(len(ledger.grup_petugas), dtype=np.int64) * ledger.rentang
+    if awal > akhir:
+        return np.zeros(len(basis), dtype=np.int64), np.zeros(len(basis), dtype=np.int64)
+    return _selisih(ledger.kunci, ledger.kumulatif, basis + awal, basis + akhir)
+
+
+def _pilih_grup(ledger: LedgerDenda, fakultas: str | None, kategori: str | None) -> np.ndarray:
+    """Mask grup yang cocok dengan filter fakultas dan kategori (None = semua)."""
+    pilih = np.ones(len(ledger.grup_petugas), dtype=bool)
+    if fakultas is not None:
+        pilih &= ledger.nama_fakultas[ledger.grup_fakultas] == fakultas
+    if kategori is not None:
+        pilih &= ledger.kategori[ledger.grup_kategori] == kategori
+    return pilih
+
+
+def total_denda(
+    ledger: LedgerDenda,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fakultas: str | None = None,
+    kategori: str | None = None,
+) -> int:
+    """Total denda (rupiah, eksak) untuk filter tanggal, fakultas, dan kategori."""
+    if fakultas is None and kategori is None:
+        awal, akhir = _rentang_hari(ledger, start_date, end_date)
+        if awal > akhir:
+            return 0
+        return int(_selisih(ledger.kunci_hari, ledger.kumulatif_hari, awal, akhir)[0])
+    per_grup, _ = denda_per_grup(ledger, start_date, end_date)
+    return int(per_grup[_pilih_grup(ledger, fakultas, kategori)].sum())
+
+
+def rincian_denda(
+    ledger: LedgerDenda,
+    dimensi: str = "fakultas",
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fakultas: str | None = None,
+    kategori: str | None = None,
+) -> pd.DataFrame:
+    """
+    Total denda per fakultas, kategori, atau petugas (lihat DIMENSI_DENDA).
+    Hasil berkolom <nama kolom dimensi>, total_denda; urut menurun.
+    """
+    per_grup, n_baris = denda_per_grup(ledger, start_date, end_date)
+    pilih = _pilih_grup(ledger, fakultas, kategori) & (n_baris > 0)
+    label, kode = {
+        "fakultas": (ledger.nama_fakultas, ledger.grup_fakultas),
+        "kategori": (ledger.kategori, ledger.grup_kategori),
+        "petugas": (ledger.nama_petugas, ledger.grup_petugas),
+    }[dimensi]
+    # penjumlahan int64 (bukan bincount berbobot float64); kode -1 = slot terakhir
+    kode = kode[pilih] % len(label)
+    total = np.zeros(len(label), dtype=np.int64)
+    np.add.at(total, kode, per_grup[pilih])
+    ada = np.unique(kode)
+    total = total[ada]
+    hasil = pd.DataFrame({DIMENSI_DENDA[dimensi]: label[ada], "total_denda": total})
+    return hasil.sort_values("total_denda", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def total_denda_dari_frame(df: pd.DataFrame) -> int:
+    """Total denda (int64) dari DataFrame peminjaman apa pun."""
+    return int(_denda_int(df["denda_buku"]).sum())
@@ -0,0 +1,176 @@
+"""
+engine.py
+Mesin analitik untuk filter dan agregasi dashboard.
+
+Ada dua jalur yang hasilnya sama:
+- "pandas" (default): groupby / boolean mask biasa.
+- "duckdb": query SQL di DuckDB (embedded) di atas kolom DataFrame yang
+  dibutuhkan saja, sehingga filter dan agregasi berjalan tervektorisasi,
+  multi-thread, dan dengan predicate pushdown.
+
+Jalur dipilih lewat pengaturan `engine` (lihat config.py), misalnya
+SEPERLIMA_ENGINE=duckdb. Jika paket duckdb tidak terpasang, otomatis
+kembali ke pandas.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import get_setting
+
+try:
+    import duckdb
+except ImportError:  # dependensi opsional
+    duckdb = None
+
+SEMUA = "(Semua)"
+
+
+def engine_aktif() -> str:
+    """Nama jalur yang dipakai saat ini: 'duckdb' atau 'pandas'."""
+    if str(get_setting("engine", "pandas")).lower() == "duckdb" and duckdb is not None:
+        return "duckdb"
+    return "pandas"
+
+
+@st.cache_resource
+def _duckdb_connection():
+    """Satu koneksi DuckDB in-memory; tiap query memakai cursor sendiri."""
+    return duckdb.connect(database=":memory:")
+
+
+def _sql(query: str, params: list | None = None, **tabel: pd.DataFrame) -> pd.DataFrame:
+    """Menjalankan query DuckDB dengan DataFrame yang didaftarkan sebagai tabel."""
+    cur = _duckdb_connection().cursor()
+    try:
+        for nama, df in tabel.items():
+            cur.register(nama, df)
+        return cur.execute(query, params or []).df()
+    finally:
+        cur.close()
+
+
+def _ident(nama: str) -> str:
+    return '"' + nama.replace('"', '""') + '"'
+
+
+# ============================================================
+# Agregasi per grup (dipakai charts.py)
+# ============================================================
+
+def hitung_per_grup(
+    df: pd.DataFrame,
+    kolom: str,
+    nilai: str | None = None,
+    agregasi: str = "count",
+    nama_hasil: str = "jumlah",
+    urut: str | None = "desc",
+) -> pd.DataFrame:
+    """
+    Agregasi sederhana per nilai `kolom` (baris dengan kolom NULL diabaikan).
+
+    - agregasi "count": jumlah baris per grup; "mean"/"sum": atas kolom `nilai`.
+    - urut "desc": hasil terbesar dulu, "key": urut berdasarkan kolom grup,
+      None: tanpa pengurutan khusus.
+    """
+    if engine_aktif() == "duckdb":
+        return _hitung_per_grup_sql(df, kolom, nilai, agregasi, nama_hasil, urut)
+
+    grup = df.groupby(kolom)
+    if agregasi == "count":
+        hasil = grup.size().reset_index(name=nama_hasil)
+    else:
+        hasil = grup[nilai].agg(agregasi).reset_index(name=nama_hasil)
+
+    if urut == "desc":
+        hasil = hasil.sort_values(nama_hasil, ascending=False)
+    elif urut == "key":
+        hasil = hasil.sort_values(kolom)
+    return hasil
+
+
+def _hitung_per_grup_sql(df, kolom, nilai, agregasi, nama_hasil, urut) -> pd.DataFrame:
+    fungsi = {"count": "COUNT(*)", "mean": "AVG({})", "sum": "SUM({})"}[agregasi]
+    ekspresi = fungsi.format(_ident(nilai)) if nilai else fungsi
+    order = {
+        "desc": f"ORDER BY {_ident(nama_hasil)} DESC",
+        "key": f"ORDER BY {_ident(kolom)}",
+        None: "",
+    }[urut]
+    query = f"""
+        SELECT {_ident(kolom)}, {ekspresi} AS {_ident(nama_hasil)}
+        FROM df
+        WHERE {_ident(kolom)} IS NOT NULL
+        GROUP BY {_ident(kolom)}
+        {order}
+    """
+    # Hanya kolom yang dipakai query yang didaftarkan ke DuckDB
+    return _sql(query, df=df[[kolom] + ([nilai] if nilai else [])])
+
+
+# ============================================================
+# Filter halaman Peminjaman
+# ============================================================
+
+def filter_peminjaman(df: pd.DataFrame, start_date, end_date, pilihan: dict) -> pd.DataFrame:
+    """
+    Menerapkan filter rentang tanggal dan pilihan sidebar ({nama kolom: nilai};
+    nilai "(Semua)" berarti tanpa filter). Hasil diurutkan dari tgl_pinjam terbaru.
+    """
+    aktif = {k: v for k, v in pilihan.items() if v != SEMUA}
+
+    if engine_aktif() == "duckdb":
+        # Predikat dievaluasi DuckDB hanya atas kolom filter; hasilnya posisi
+        # baris, lalu DataFrame dimaterialisasi sekali dengan iloc.
+        where = ["CAST(tgl_pinjam AS DATE) BETWEEN ? AND ?"]
+        params = [start_date, end_date]
+        for kolom, nilai in aktif.items():
+            where.append(f"{_ident(kolom)} = ?")
+            params.append(nilai)
+        query = f"""
+            SELECT _pos FROM df
+            WHERE {" AND ".join(where)}
+            ORDER BY tgl_pinjam DESC
+        """
+        df_kolom = df[["tgl_pinjam", *aktif]].assign(_pos=np.arange(len(df)))
+        posisi = _sql(query, params, df=df_kolom)["_pos"].to_numpy()
+        return df.iloc[posisi]
+
+    # Semua predikat digabung menjadi satu mask; DataFrame hasil dibentuk sekali
+    # (tanpa salinan antara per filter).
+    tgl = df["tgl_pinjam"]
+    mask = (tgl >= pd.Timestamp(start_date)) & (tgl < pd.Timestamp(end_date) + pd.Timedelta(days=1))
+    for kolom, nilai in aktif.items():
+        mask &= df[kolom] == nilai
+    posisi = np.flatnonzero(mask.to_numpy())
+    urutan = np.argsort(tgl.to_numpy()[posisi], kind="stable")[::-1]
+    return df.iloc[posisi[urutan]]
+
+
+# ============================================================
+# Histogram satuan (dipakai histogram.py)
+# ============================================================
+
+def histogram_satuan(df: pd.DataFrame, kolom: str, batas: int) -> np.ndarray:
+    """
+    Jumlah baris per nilai integer `kolom` (0..batas-1); nilai >= batas masuk
+    bin terakhir (indeks `batas`), NULL diabaikan. Panjang hasil selalu batas+1.
+    """
+    if engine_aktif() == "duckdb":
+        query = f"""
+            SELECT LEAST(GREATEST(CAST({_ident(kolom)} AS BIGINT), 0), ?) AS bin, COUNT(*) AS jumlah
+            FROM df
+            WHERE {_ident(kolom)} IS NOT NULL
+            GROUP BY bin
+        """
+        hasil = _sql(query, [batas], df=df[[kolom]])
+        counts = np.zeros(batas + 1, dtype=np.int64)
+        counts[hasil["bin"].to_numpy(dtype=np.int64)] = hasil["jumlah"].to_numpy()
+        return counts
+
+    nilai = df[kolom].to_numpy(dtype=np.float64, na_value=np.nan)
+    nilai = nilai[~np.isnan(nilai)].astype(np.int64)
+    return np.bincount(np.clip(nilai, 0, batas), minlength=batas + 1)
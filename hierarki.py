@@ -0,0 +1,146 @@
+"""
+hierarki.py
+Kubus hierarki anggota: fakultas -> program studi -> jenjang -> status anggota.
+
+Catatan:
+- Setiap anggota dipetakan sekali ke satu "daun" (program studi, status);
+  fakultas dan jenjang mengikuti program studi. Jumlah anggota per daun
+  disimpan sebagai array kecil.
+- Kubus dibangun sekali per versi data anggota (tenant + StarSchema.versi_anggota);
+  cache dibatasi beberapa versi sehingga versi lama tersingkir setelah impor.
+- Hasil pencarian nama cukup berupa posisi anggota: jumlah per daun dihitung
+  dengan bincount atas posisi yang cocok, atau dengan mengurangkan yang tidak
+  cocok dari total bila lebih sedikit. Treemap dan grafik status tidak perlu
+  groupby atas tabel anggota.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from db import load_model
+from model import StarSchema
+from tenant import tenant_aktif
+
+LABEL_TANPA = "(Tidak diketahui)"
+
+
+@dataclass
+class HierarkiAnggota:
+    """Pemetaan anggota -> daun dan jumlah total per daun."""
+
+    nama_anggota: pd.Series
+    daun_anggota: np.ndarray
+    jumlah_total: np.ndarray
+    n_status: int
+    status: np.ndarray
+    # per slot program studi (slot 0 = tanpa program studi)
+    nama_prodi: np.ndarray
+    jenjang: np.ndarray
+    idx_fakultas: np.ndarray
+    nama_fakultas: np.ndarray
+
+
+def bangun_hierarki(model: StarSchema) -> HierarkiAnggota:
+    """Menyusun kubus hierarki dari dimensi anggota, prodi, dan fakultas."""
+    ang = model.anggota
+    kode_status, status = pd.factorize(ang["status_anggota"], sort=True, use_na_sentinel=False)
+    status = np.asarray(status, dtype=object)
+    status[pd.isna(status)] = LABEL_TANPA
+    n_status = max(len(status), 1)
+    slot_prodi = ang["idx_prodi"].to_numpy().astype(np.int64) + 1
+    daun = slot_prodi * n_status + kode_status
+    n_daun = (len(model.prodi) + 1) * n_status
+
+    tanpa = np.array([LABEL_TANPA], dtype=object)
+    return HierarkiAnggota(
+        nama_anggota=ang["nama_anggota"],
+        daun_anggota=daun,
+        jumlah_total=np.bincount(daun, minlength=n_daun),
+        n_status=n_status,
+        status=status,
+        nama_prodi=np.concatenate([tanpa, model.prodi["nama_prodi"].to_numpy(dtype=object)]),
+        jenjang=np.concatenate([tanpa, model.prodi["jenjang"].to_numpy(dtype=object)]),
+        idx_fakultas=np.concatenate([[-1], model.prodi["idx_fakultas"].to_numpy()]),
+        nama_fakultas=np.concatenate([model.fakultas["nama_fakultas"].to_numpy(dtype=object), tanpa]),
+    )
+
+
+@st.cache_resource(max_entries=8)
+def _hierarki_versi(tenant: str, versi_anggota: str) -> HierarkiAnggota:
+    return bangun_hierarki(load_model())
+
+
+def load_hierarki() -> HierarkiAnggota:
+    """Kubus hierarki untuk versi data anggota yang sedang dimuat (tenant aktif)."""
+    return _hierarki_versi(tenant_aktif(), load_model().versi_anggota)
+
+
+def posisi_pencarian(hierarki: HierarkiAnggota, kata: str) -> np.ndarray | None:
+    """Posisi anggota yang namanya mengandung `kata` (None = tanpa pencarian)."""
+    if not kata:
+        return None
+    cocok = hierarki.nama_anggota.str.contains(kata, case=False, na=False).to_numpy()
+    return np.flatnonzero(cocok)
+
+
+def jumlah_per_daun(hierarki: HierarkiAnggota, posisi: np.ndarray | None = None) -> np.ndarray:
+    """Jumlah anggota per daun untuk seluruh anggota atau subset `posisi`."""
+    total = hierarki.jumlah_total
+    if posisi is None:
+        return total
+    daun = hierarki.daun_anggota
+    if len(posisi) <= len(daun) // 2:
+        return np.bincount(daun[posisi], minlength=len(total))
+    # subset besar: total dikurangi anggota yang tidak cocok
+    keluar = np.ones(len(daun), dtype=bool)
+    keluar[posisi] = False
+    return total - np.bincount(daun[keluar], minlength=len(total))
+
+
+def jumlah_per_status(hierarki: HierarkiAnggota, jumlah_daun: np.ndarray) -> pd.DataFrame:
+    """Jumlah anggota per status_anggota dari jumlah per daun."""
+    per_status = jumlah_daun.reshape(-1, hierarki.n_status).sum(axis=0)
+    ada = per_status > 0
+    return pd.DataFrame({"status_anggota": hierarki.status[ada], "jumlah": per_status[ada]})
+
+
+def data_treemap(hierarki: HierarkiAnggota, jumlah_daun: np.ndarray) -> pd.DataFrame:
+    """
+    Simpul treemap (ids, labels, parents, values) untuk hierarki
+    fakultas -> prodi -> jenjang -> status; nilai induk = jumlah anak.
+    """
+    daun = np.flatnonzero(jumlah_daun)
+    if len(daun) == 0:
+        return pd.DataFrame(columns=["ids", "labels", "parents", "values"])
+    slot, kode_status = np.divmod(daun, hierarki.n_status)
+    nilai_daun = jumlah_daun[daun]
+    fak = hierarki.idx_fakultas[slot]
+
+    # agregasi ke atas pada array kecil (jumlah simpul, bukan jumlah anggota)
+    slot_unik, inv_slot = np.unique(slot, return_inverse=True)
+    nilai_slot = np.bincount(inv_slot, weights=nilai_daun).astype(np.int64)
+    fak_unik, inv_fak = np.unique(hierarki.idx_fakultas[slot_unik], return_inverse=True)
+    nilai_fak = np.bincount(inv_fak, weights=nilai_slot).astype(np.int64)
+
+    id_fak = [f"f{f}" for f in fak_unik]
+    id_prodi = [f"f{f}/p{p}" for f, p in zip(hierarki.idx_fakultas[slot_unik], slot_unik)]
+    id_jenjang = [f"{i}/j" for i in id_prodi]
+    id_status = [f"f{f}/p{p}/j/s{s}" for f, p, s in zip(fak, slot, kode_status)]
+
+    return pd.DataFrame({
+        "ids": id_fak + id_prodi + id_jenjang + id_status,
+        "labels": list(hierarki.nama_fakultas[fak_unik])
+        + list(hierarki.nama_prodi[slot_unik])
+        + list(hierarki.jenjang[slot_unik])
+        + list(hierarki.status[kode_status]),
+        "parents": [""] * len(id_fak)
+        + [id_fak[i] for i in inv_fak]
+        + id_prodi
+        + [id_jenjang[i] for i in inv_slot],
+        "values": np.concatenate([nilai_fak, nilai_slot, nilai_slot, nilai_daun]),
+    })
@@ -0,0 +1,189 @@
+"""
+histogram.py
+Histogram durasi peminjaman yang dibin di server.
+
+Catatan:
+- Durasi (hari, integer) dihitung dulu ke histogram "satuan" berukuran tetap:
+  satu bin per hari 0..BATAS_DURASI-1 ditambah satu bin luapan (>= BATAS_DURASI).
+  Histogram satuan bisa digabung cukup dengan penjumlahan array.
+- Setiap bucket (bulan, fakultas, kategori) dari kpi.IndeksKpi menyimpan
+  histogram satuannya (format jarang/CSR), sehingga histogram untuk filter
+  tanggal/fakultas/kategori dibentuk dengan menjumlahkan bucket, bukan
+  memindai baris peminjaman.
+- Yang dikirim ke browser hanya batas bin dan jumlahnya (go.Bar), ukurannya
+  konstan berapa pun banyaknya peminjaman.
+- Hal yang sama untuk scatter durasi vs denda berukuran besar: titik dibin
+  menjadi raster 2D (densitas_2d), titik asli hanya diambil untuk area yang
+  dipilih pengguna (titik_dalam_area).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from db import load_model
+from engine import histogram_satuan
+from kpi import IndeksKpi, _posisi_segmen, load_indeks_kpi, pilih_bucket
+from memori import daftarkan
+from model import StarSchema
+from tenant import per_tenant, tenant_aktif
+
+# Durasi >= nilai ini (hari) dikumpulkan di bin luapan
+BATAS_DURASI = 400
+
+
+@dataclass
+class IndeksHistogram:
+    """Histogram satuan durasi per bucket (CSR: bucket -> (durasi, jumlah))."""
+
+    # per baris peminjaman (urutan sama dengan IndeksKpi), -1 = durasi NULL
+    durasi: np.ndarray
+    # per bucket
+    offset: np.ndarray
+    entri_durasi: np.ndarray
+    entri_jumlah: np.ndarray
+
+
+def _durasi_satuan(durasi) -> np.ndarray:
+    """Durasi dipotong ke 0..BATAS_DURASI; NULL menjadi -1."""
+    nilai = pd.Series(durasi).to_numpy(dtype=np.float64, na_value=np.nan)
+    hasil = np.full(len(nilai), -1, dtype=np.int64)
+    ada = ~np.isnan(nilai)
+    hasil[ada] = np.clip(nilai[ada].astype(np.int64), 0, BATAS_DURASI)
+    return hasil
+
+
+def bangun_indeks_histogram(model: StarSchema, indeks: IndeksKpi) -> IndeksHistogram:
+    """Menyusun histogram satuan per bucket dari IndeksKpi."""
+    durasi = _durasi_satuan(model.fakta["durasi_peminjaman"].to_numpy()[indeks.urutan])
+    kode_bucket = np.repeat(np.arange(len(indeks.offset) - 1), np.diff(indeks.offset))
+    ada = durasi >= 0
+
+    lebar = BATAS_DURASI + 1
+    pasangan, jumlah = np.unique(kode_bucket[ada].astype(np.int64) * lebar + durasi[ada], return_counts=True)
+    entri_bucket = pasangan // lebar
+    return IndeksHistogram(
+        durasi=durasi,
+        offset=np.searchsorted(entri_bucket, np.arange(len(indeks.offset))),
+        entri_durasi=pasangan % lebar,
+        entri_jumlah=jumlah,
+    )
+
+
+@per_tenant()
+def load_indeks_histogram() -> IndeksHistogram:
+    """IndeksHistogram untuk model yang sedang dimuat (per tenant, dipakai bersama semua sesi)."""
+    indeks = bangun_indeks_histogram(load_model(), load_indeks_kpi())
+    daftarkan(f"indeks_histogram [{tenant_aktif()}]", indeks)
+    return indeks
+
+
+def histogram_durasi(
+    indeks: IndeksKpi,
+    indeks_hist: IndeksHistogram,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fakultas: str | None = None,
+    kategori: str | None = None,
+) -> np.ndarray:
+    """Histogram satuan durasi untuk filter tanggal, fakultas, dan kategori."""
+    bucket_penuh, pos_sebagian = pilih_bucket(indeks, start_date, end_date, fakultas, kategori)
+    pos_entri = _posisi_segmen(indeks_hist.offset, bucket_penuh)
+    counts = np.bincount(
+        indeks_hist.entri_durasi[pos_entri],
+        weights=indeks_hist.entri_jumlah[pos_entri],
+        minlength=BATAS_DURASI + 1,
+    ).astype(np.int64)
+    durasi = indeks_hist.durasi[pos_sebagian]
+    counts += np.bincount(durasi[durasi >= 0], minlength=BATAS_DURASI + 1)
+    return counts
+
+
+def histogram_durasi_dari_frame(df: pd.DataFrame) -> np.ndarray:
+    """Histogram satuan durasi dari DataFrame peminjaman apa pun."""
+    return histogram_satuan(df, "durasi_peminjaman", BATAS_DURASI)
+
+
+def kelompokkan_bin(counts: np.ndarray, nbins: int = 10) -> pd.DataFrame:
+    """
+    Menggabungkan histogram satuan menjadi maksimal `nbins` bin berlebar sama
+    di antara durasi terkecil dan terbesar yang muncul di bawah BATAS_DURASI,
+    ditambah satu baris luapan (durasi >= BATAS_DURASI) di akhir bila ada.
+
+    Hasil berkolom: batas_bawah, batas_atas (eksklusif; inf untuk luapan),
+    jumlah, luapan (True hanya untuk baris luapan).
+    """
+    reguler, n_luapan = counts[:BATAS_DURASI], int(counts[BATAS_DURASI:].sum())
+    ada = np.flatnonzero(reguler)
+    if len(ada) == 0:
+        per_bin = pd.DataFrame({
+            "batas_bawah": np.array([], dtype=np.int64),
+            "batas_atas": np.array([], dtype=np.float64),
+            "jumlah": np.array([], dtype=np.int64),
+            "luapan": np.array([], dtype=bool),
+        })
+    else:
+        bawah, atas = ada[0], ada[-1] + 1
+        lebar = max(1, int(np.ceil((atas - bawah) / nbins)))
+        tepi = np.arange(bawah, atas, lebar)
+        per_bin = pd.DataFrame({
+            "batas_bawah": tepi,
+            # bin terakhir tidak melewati BATAS_DURASI (wilayah bin luapan)
+            "batas_atas": np.minimum(tepi + lebar, BATAS_DURASI).astype(np.float64),
+            "jumlah": np.add.reduceat(reguler[bawah:atas], tepi - bawah).astype(np.int64),
+            "luapan": False,
+        })
+    if n_luapan:
+        per_bin.loc[len(per_bin)] = [BATAS_DURASI, np.inf, n_luapan, True]
+    return per_bin
+
+
+# ============================================================
+# Densitas 2D (scatter berukuran besar)
+# ============================================================
+
+def _xy_valid(df: pd.DataFrame, kolom_x: str, kolom_y: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Array x, y (float) dan posisi baris yang keduanya tidak NULL."""
+    x = df[kolom_x].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = df[kolom_y].to_numpy(dtype=np.float64, na_value=np.nan)
+    pos = np.flatnonzero(~np.isnan(x) & ~np.isnan(y))
+    return x[pos], y[pos], pos
+
+
+def densitas_2d(
+    df: pd.DataFrame,
+    kolom_x: str = "durasi_peminjaman",
+    kolom_y: str = "denda_buku",
+    n_bin: int = 150,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Raster jumlah titik n_bin x n_bin. Mengembalikan (tengah bin x, tengah bin y,
+    jumlah[y, x]); sel kosong bernilai NaN agar transparan pada heatmap.
+    """
+    x, y, _ = _xy_valid(df, kolom_x, kolom_y)
+    if len(x) == 0:
+        return np.empty(0), np.empty(0), np.empty((0, 0))
+    jumlah, tepi_x, tepi_y = np.histogram2d(x, y, bins=n_bin)
+    jumlah = jumlah.T
+    jumlah[jumlah == 0] = np.nan
+    return (tepi_x[:-1] + tepi_x[1:]) / 2, (tepi_y[:-1] + tepi_y[1:]) / 2, jumlah
+
+
+def titik_dalam_area(
+    df: pd.DataFrame,
+    rentang_x: tuple[float, float],
+    rentang_y: tuple[float, float],
+    kolom_x: str = "durasi_peminjaman",
+    kolom_y: str = "denda_buku",
+    maks: int = 1_000,
+) -> pd.DataFrame:
+    """Baris asli (maks. `maks`) yang titiknya berada di dalam area persegi."""
+    x, y, pos = _xy_valid(df, kolom_x, kolom_y)
+    x0, x1 = sorted(rentang_x)
+    y0, y1 = sorted(rentang_y)
+    dalam = pos[(x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)]
+    return df.iloc[dalam[:maks]]
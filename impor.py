@@ -0,0 +1,523 @@
+"""
+impor.py
+Impor massal data anggota dan katalog (judul, buku, buku_pengarang) dari
+CSV/Excel ke MySQL.
+
+Catatan:
+- Berkas dibaca per potongan (CSV: pd.read_csv chunksize; Excel: openpyxl
+  mode read_only), sehingga berkas besar tidak dimuat utuh ke memori.
+- Setiap potongan divalidasi secara vektor sebelum ditulis:
+  * kolom wajib tidak kosong, panjang teks sesuai VARCHAR, bilangan bulat
+    dan rentang YEAR;
+  * nilai enum (anggota.status, buku.status);
+  * UNIQUE (anggota.email, tanpa beda huruf besar/kecil seperti collation
+    MySQL) terhadap isi database dan baris sebelumnya di berkas yang sama;
+  * foreign key terhadap id yang ada di tabel acuan.
+  Baris yang gagal dikumpulkan beserta nomor baris dan alasannya; baris lain
+  tetap ditulis.
+- Penulisan per potongan dalam satu transaksi pendek (commit per potongan)
+  dengan executemany (INSERT multi-baris) atau LOAD DATA LOCAL INFILE.
+  Transaksi pendek + InnoDB MVCC membuat pembaca dashboard tidak tertahan.
+- Setelah impor, hanya cache yang bergantung pada tabel tersebut untuk
+  tenant itu yang dibuang (model star schema, indeks turunannya, dan loader
+  tabel acuan terkait); cache peminjaman/status tidak disentuh.
+- Impor lewat CLI berjalan di proses lain dan tidak bisa membuang cache
+  dashboard secara langsung. Karena itu dashboard memanggil sinkronkan_impor
+  pada setiap rerun: penanda versi murah per tabel impor (COUNT(*) dan id
+  terbesar) dibaca paling sering tiap `interval_versi` detik, dan tabel yang
+  penandanya berubah di-invalidasi seperti impor dari halaman Impor data.
+
+Contoh:
+    python impor.py anggota anggota_baru.csv
+    python impor.py buku buku.xlsx --metode load_data --galat galat.csv
+    python impor.py judul judul.csv --kering     # validasi saja
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import get_setting
+from db import _view_bersama, baca_sql, koneksi_langsung, load_judul, load_model
+from denda import load_ledger_denda
+from histogram import load_indeks_histogram
+from kpi import load_indeks_kpi
+from kuantil import load_indeks_kuantil
+from kubus import load_kubus
+from live import load_feed
+from memori import buang_entri
+from offline import mode_offline
+from tenant import tenant_aktif
+from topk import load_indeks_topk
+
+try:
+    import openpyxl
+except ImportError:  # dependensi opsional (impor Excel)
+    openpyxl = None
+
+# Baris per potongan baca/validasi/tulis
+UKURAN_POTONGAN = 5_000
+
+METODE_TULIS = ["executemany", "load_data"]
+
+# Selang minimal pemeriksaan penanda versi tabel impor oleh dashboard (detik)
+INTERVAL_VERSI = 30
+
+
+@dataclass(frozen=True)
+class SkemaImpor:
+    """Aturan validasi satu tabel (mengikuti DDL database seperlima)."""
+
+    tabel: str
+    kunci: str
+    kolom: tuple[str, ...]
+    wajib: tuple[str, ...] = ()
+    bilangan: tuple[str, ...] = ()
+    panjang: dict = field(default_factory=dict)
+    enum: dict = field(default_factory=dict)
+    default: dict = field(default_factory=dict)
+    rentang: dict = field(default_factory=dict)
+    unik: tuple[str, ...] = ()
+    fk: dict = field(default_factory=dict)
+
+
+SKEMA_IMPOR = {
+    "anggota": SkemaImpor(
+        tabel="anggota",
+        kunci="id_anggota",
+        kolom=("id_anggota", "id_prodi", "no_identitas", "status", "nama_anggota", "email"),
+        wajib=("no_identitas", "status", "nama_anggota"),
+        bilangan=("id_anggota", "id_prodi"),
+        panjang={"no_identitas": 50, "nama_anggota": 150, "email": 150},
+        enum={"status": ("mahasiswa", "dosen", "tendik")},
+        unik=("email",),
+        fk={"id_prodi": ("program_studi", "id_prodi")},
+    ),
+    "judul": SkemaImpor(
+        tabel="judul",
+        kunci="id_judul",
+        kolom=("id_judul", "kode_judul", "judul"),
+        wajib=("kode_judul", "judul"),
+        bilangan=("id_judul",),
+        panjang={"kode_judul": 20, "judul": 255},
+    ),
+    "buku": SkemaImpor(
+        tabel="buku",
+        kunci="id_buku",
+        kolom=("id_buku", "id_judul", "id_klasifikasi", "tahun_terbit", "isbn", "status", "eksemplar"),
+        wajib=("id_judul", "id_klasifikasi", "eksemplar"),
+        bilangan=("id_buku", "id_judul", "id_klasifikasi", "tahun_terbit"),
+        panjang={"isbn": 30, "eksemplar": 10},
+        enum={"status": ("Tersedia", "Hilang", "Dipinjam", "Rusak")},
+        default={"status": "Tersedia"},
+        rentang={"tahun_terbit": (1901, 2155)},
+        fk={"id_judul": ("judul", "id_judul"), "id_klasifikasi": ("klasifikasi", "id_klasifikasi")},
+    ),
+    "buku_pengarang": SkemaImpor(
+        tabel="buku_pengarang",
+        kunci="id_buku_pengarang",
+        kolom=("id_buku_pengarang", "id_buku", "id_pengarang", "urutan_pengarang"),
+        wajib=("id_buku", "id_pengarang"),
+        bilangan=("id_buku_pengarang", "id_buku", "id_pengarang", "urutan_pengarang"),
+        fk={"id_buku": ("buku", "id_buku"), "id_pengarang": ("pengarang", "id_pengarang")},
+    ),
+}
+
+
+@dataclass
+class HasilImpor:
+    """Ringkasan satu kali impor."""
+
+    tabel: str
+    dibaca: int = 0
+    ditulis: int = 0
+    galat: list = field(default_factory=list)
+    detik: float = 0.0
+
+    def tabel_galat(self) -> pd.DataFrame:
+        """Baris yang ditolak beserta nomor baris berkas dan alasannya."""
+        if not self.galat:
+            return pd.DataFrame(columns=["baris", "alasan"])
+        return pd.concat(self.galat, ignore_index=True)
+
+
+# ============================================================
+# BACA BERKAS
+# ============================================================
+
+def baca_berkas(sumber, nama_berkas: str | None = None, ukuran: int = UKURAN_POTONGAN):
+    """
+    Potongan DataFrame (semua kolom teks) dari CSV atau Excel.
+    `sumber` boleh path atau objek file (mis. hasil st.file_uploader).
+    """
+    nama = str(nama_berkas or getattr(sumber, "name", sumber)).lower()
+    if nama.endswith((".xlsx", ".xlsm")):
+        yield from _baca_excel(sumber, ukuran)
+        return
+    yield from pd.read_csv(sumber, dtype=str, chunksize=ukuran, keep_default_na=False, na_values=[""])
+
+
+def _baca_excel(sumber, ukuran: int):
+    if openpyxl is None:
+        raise RuntimeError("Impor Excel membutuhkan paket openpyxl.")
+    buku = openpyxl.load_workbook(sumber, read_only=True, data_only=True)
+    try:
+        baris = buku.active.iter_rows(values_only=True)
+        kepala = [str(k).strip() for k in next(baris)]
+        potongan = []
+        for nilai in baris:
+            potongan.append(nilai)
+            if len(potongan) == ukuran:
+                yield _frame_teks(potongan, kepala)
+                potongan = []
+        if potongan:
+            yield _frame_teks(potongan, kepala)
+    finally:
+        buku.close()
+
+
+def _frame_teks(baris: list, kepala: list[str]) -> pd.DataFrame:
+    df = pd.DataFrame(baris, columns=kepala, dtype=object)
+    return df.map(lambda v: None if v is None or v == "" else str(v))
+
+
+# ============================================================
+# VALIDASI
+# ============================================================
+
+def muat_acuan(conn, skema: SkemaImpor) -> dict:
+    """
+    Nilai pembanding dari database: id tabel acuan untuk setiap FK, id yang
+    sudah ada (kunci), dan nilai kolom UNIQUE (huruf kecil).
+    """
+    cur = conn.cursor()
+
+    def ambil(sql: str) -> list:
+        cur.execute(sql)
+        return [b[0] for b in cur.fetchall()]
+
+    acuan = {
+        "fk": {k: np.asarray(ambil(f"SELECT {kolom} FROM {tabel}"), dtype=np.int64) for k, (tabel, kolom) in skema.fk.items()},
+        "kunci": np.asarray(ambil(f"SELECT {skema.kunci} FROM {skema.tabel}"), dtype=np.int64),
+        "unik": {
+            k: set(ambil(f"SELECT LOWER({k}) FROM {skema.tabel} WHERE {k} IS NOT NULL"))
+            for k in skema.unik
+        },
+    }
+    cur.close()
+    return acuan
+
+
+def validasi(df: pd.DataFrame, skema: SkemaImpor, acuan: dict, nomor_awal: int = 2) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Memisahkan baris valid dan baris galat (kolom `baris`, `alasan`).
+    Baris valid sudah bertipe siap tulis (bilangan -> Int64, default terisi).
+    `acuan["unik"]` diperbarui dengan nilai UNIQUE dari baris valid, sehingga
+    duplikat di potongan berikutnya ikut tertolak.
+    """
+    n = len(df)
+    alasan = np.full(n, "", dtype=object)
+
+    def tandai(mask, pesan: str):
+        mask = np.asarray(mask, dtype=bool)
+        alasan[mask] = alasan[mask] + pesan + "; "
+
+    tak_dikenal = [k for k in df.columns if k not in skema.kolom]
+    if tak_dikenal:
+        raise ValueError(f"Kolom tidak dikenal untuk {skema.tabel}: {', '.join(tak_dikenal)}")
+    kurang = [k for k in skema.wajib if k not in df.columns]
+    if kurang:
+        raise ValueError(f"Kolom wajib tidak ada untuk {skema.tabel}: {', '.join(kurang)}")
+
+    data = {}
+    for kolom in skema.kolom:
+        if kolom in df.columns:
+            seri = df[kolom].astype(object).where(df[kolom].notna(), None)
+        elif kolom in skema.default:
+            seri = pd.Series([None] * n, index=df.index, dtype=object)
+        else:
+            continue
+        seri = seri.map(lambda v: v.strip() if isinstance(v, str) else v).replace("", None)
+        if kolom in skema.default:
+            seri = seri.fillna(skema.default[kolom])
+        kosong = seri.isna().to_numpy()
+        if kolom in skema.wajib:
+            tandai(kosong, f"{kolom} wajib diisi")
+
+        if kolom in skema.bilangan:
+            angka = pd.to_numeric(seri, errors="coerce")
+            bulat = angka.notna() & (angka == np.floor(angka))
+            tandai(~kosong & ~bulat.to_numpy(), f"{kolom} bukan bilangan bulat")
+            seri = angka.where(bulat).astype("Int64")
+            if kolom in skema.rentang:
+                bawah, atas = skema.rentang[kolom]
+                tandai(seri.notna().to_numpy() & ~seri.between(bawah, atas).fillna(False).to_numpy(),
+                       f"{kolom} di luar {bawah}-{atas}")
+        else:
+            if kolom in skema.panjang:
+                tandai(seri.str.len().gt(skema.panjang[kolom]).fillna(False).to_numpy(),
+                       f"{kolom} lebih dari {skema.panjang[kolom]} karakter")
+            if kolom in skema.enum:
+                tandai(~kosong & ~seri.isin(skema.enum[kolom]).to_numpy(),
+                       f"{kolom} harus salah satu dari {', '.join(skema.enum[kolom])}")
+        data[kolom] = seri
+
+    if skema.kunci in data:
+        kunci = data[skema.kunci]
+        ada = kunci.notna().to_numpy()
+        nilai = kunci.fillna(-1).to_numpy(dtype=np.int64)
+        tandai(ada & np.isin(nilai, acuan["kunci"]), f"{skema.kunci} sudah ada")
+        tandai(ada & kunci.duplicated(keep="first").to_numpy(), f"{skema.kunci} ganda di berkas")
+
+    for kolom, (tabel, _) in skema.fk.items():
+        if kolom in data:
+            seri = data[kolom]
+            ada = seri.notna().to_numpy()
+            nilai = seri.fillna(-1).to_numpy(dtype=np.int64)
+            tandai(ada & ~np.isin(nilai, acuan["fk"][kolom]), f"{kolom} tidak ada di tabel {tabel}")
+
+    for kolom in skema.unik:
+        if kolom in data:
+            kecil = data[kolom].str.lower()
+            ada = kecil.notna().to_numpy()
+            tandai(ada & kecil.isin(acuan["unik"][kolom]).to_numpy(), f"{kolom} sudah terdaftar")
+            tandai(ada & kecil.duplicated(keep="first").to_numpy(), f"{kolom} ganda di berkas")
+
+    lolos = alasan == ""
+    valid = pd.DataFrame(data).loc[lolos].reset_index(drop=True)
+    for kolom in skema.unik:
+        if kolom in valid.columns:
+            acuan["unik"][kolom].update(valid[kolom].dropna().str.lower())
+    if skema.kunci in valid.columns:
+        acuan["kunci"] = np.union1d(acuan["kunci"], valid[skema.kunci].dropna().to_numpy(dtype=np.int64))
+
+    galat = df.loc[~lolos].copy()
+    galat.insert(0, "baris", np.flatnonzero(~lolos) + nomor_awal)
+    galat["alasan"] = [a.rstrip("; ") for a in alasan[~lolos]]
+    return valid, galat.reset_index(drop=True)
+
+
+# ============================================================
+# TULIS
+# ============================================================
+
+def _nilai_baris(df: pd.DataFrame) -> list[tuple]:
+    """Baris DataFrame sebagai tuple Python (NA -> None) untuk driver."""
+    objek = df.astype(object).where(df.notna(), None)
+    return list(objek.itertuples(index=False, name=None))
+
+
+def tulis_executemany(conn, tabel: str, df: pd.DataFrame) -> int:
+    """INSERT multi-baris (executemany) untuk satu potongan; tanpa commit."""
+    kolom = ", ".join(df.columns)
+    tanda = ", ".join(["%s"] * len(df.columns))
+    cur = conn.cursor()
+    try:
+        cur.executemany(f"INSERT INTO {tabel} ({kolom}) VALUES ({tanda})", _nilai_baris(df))
+    finally:
+        cur.close()
+    return len(df)
+
+
+def tulis_load_data(conn, tabel: str, df: pd.DataFrame) -> int:
+    """
+    LOAD DATA LOCAL INFILE dari berkas CSV sementara untuk satu potongan;
+    tanpa commit. Koneksi harus dibuat dengan allow_local_infile=True.
+    """
+    teks = df.astype(object).where(df.notna(), None)
+    for kolom in teks.columns:
+        teks[kolom] = teks[kolom].map(lambda v: "\\N" if v is None else str(v).replace("\\", "\\\\"))
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            teks.to_csv(f, index=False, header=False, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {tabel} CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(df.columns)})",
+                (path,),
+            )
+            ditulis = cur.rowcount
+        finally:
+            cur.close()
+    finally:
+        os.remove(path)
+    return ditulis
+
+
+def invalidasi(tabel: str, tenant: str) -> None:
+    """
+    Membuang cache tenant yang bergantung pada `tabel`: model star schema,
+    indeks yang dibangun dari model, view gabungan, dan loader tabel acuan
+    terkait. View gabungan dikunci per versi model (dibangun), jadi versi lama
+    harus dibuang di sini agar tidak tetap menempati registri cache_bersama;
+    hierarki anggota mengikuti versi model sehingga ikut terbarui otomatis.
+    """
+    for loader in (
+        load_model, load_indeks_kpi, load_indeks_topk, load_indeks_histogram, load_ledger_denda, load_feed, load_kubus,
+        load_indeks_kuantil,
+    ):
+        loader.untuk_tenant.clear(tenant)
+    buang_entri(_view_bersama, tenant)
+    if tabel == "judul":
+        buang_entri(load_judul, tenant)
+
+
+# ============================================================
+# SINKRON DENGAN DASHBOARD
+# ============================================================
+
+def versi_tabel(tenant: str) -> dict:
+    """Penanda versi per tabel impor: (jumlah baris, id terbesar)."""
+    sql = " UNION ALL ".join(
+        f"SELECT '{s.tabel}' AS tabel, COUNT(*) AS jumlah, MAX({s.kunci}) AS id_maks FROM {s.tabel}"
+        for s in SKEMA_IMPOR.values()
+    )
+    df = baca_sql(sql, tenant=tenant)
+    return {t: (int(j), None if pd.isna(m) else int(m)) for t, j, m in df.itertuples(index=False)}
+
+
+class PenandaVersi:
+    """Versi tabel impor yang terakhir dilihat proses dashboard untuk satu tenant."""
+
+    def __init__(self):
+        self.kunci = threading.Lock()
+        self.versi: dict | None = None
+        self.diperiksa = 0.0
+
+
+@st.cache_resource
+def _penanda(tenant: str) -> PenandaVersi:
+    return PenandaVersi()
+
+
+def catat_versi(tenant: str) -> None:
+    """Menyimpan versi tabel saat ini sebagai sudah dilihat (setelah impor dari dashboard)."""
+    if mode_offline():
+        return
+    penanda = _penanda(tenant)
+    versi = versi_tabel(tenant)
+    with penanda.kunci:
+        penanda.versi, penanda.diperiksa = versi, time.monotonic()
+
+
+def sinkronkan_impor(tenant: str | None = None) -> list[str]:
+    """
+    Dipanggil dashboard pada setiap rerun. Paling sering tiap `interval_versi`
+    detik membandingkan penanda versi tabel impor dengan yang terakhir dilihat;
+    tabel yang berubah (mis. diimpor lewat CLI) di-invalidasi. Mengembalikan
+    nama tabel yang di-invalidasi. Pemeriksaan pertama hanya mencatat versi.
+    """
+    if mode_offline():
+        return []
+    tenant = tenant or tenant_aktif()
+    penanda = _penanda(tenant)
+    with penanda.kunci:
+        if time.monotonic() - penanda.diperiksa < float(get_setting("interval_versi", INTERVAL_VERSI)):
+            return []
+        versi = versi_tabel(tenant)
+        lama, penanda.versi, penanda.diperiksa = penanda.versi, versi, time.monotonic()
+    if lama is None:
+        return []
+    berubah = [t for t in versi if lama.get(t) != versi[t]]
+    for tabel in berubah:
+        invalidasi(tabel, tenant)
+    return berubah
+
+
+def impor_berkas(
+    sumber,
+    tabel: str,
+    nama_berkas: str | None = None,
+    metode: str = "executemany",
+    ukuran: int = UKURAN_POTONGAN,
+    tenant: str | None = None,
+    kering: bool = False,
+) -> HasilImpor:
+    """
+    Membaca, memvalidasi, dan menulis berkas ke `tabel` per potongan.
+    kering=True: hanya validasi (tidak ada yang ditulis, cache tidak dibuang).
+    """
+    if tabel not in SKEMA_IMPOR:
+        raise ValueError(f"Tabel impor tidak dikenal: {tabel!r}")
+    if metode not in METODE_TULIS:
+        raise ValueError(f"Metode tulis tidak dikenal: {metode!r}")
+    skema = SKEMA_IMPOR[tabel]
+    tenant = tenant or tenant_aktif()
+    tulis = tulis_load_data if metode == "load_data" else tulis_executemany
+
+    hasil = HasilImpor(tabel=tabel)
+    mulai = time.perf_counter()
+    conn = koneksi_langsung(tenant, allow_local_infile=metode == "load_data", autocommit=False)
+    try:
+        acuan = muat_acuan(conn, skema)
+        for potongan in baca_berkas(sumber, nama_berkas, ukuran):
+            valid, galat = validasi(potongan, skema, acuan, nomor_awal=hasil.dibaca + 2)
+            hasil.dibaca += len(potongan)
+            if not galat.empty:
+                hasil.galat.append(galat)
+            if kering or valid.empty:
+                continue
+            try:
+                conn.start_transaction()
+                hasil.ditulis += tulis(conn, tabel, valid)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        conn.close()
+        if hasil.ditulis:
+            invalidasi(tabel, tenant)
+            catat_versi(tenant)
+        hasil.detik = time.perf_counter() - mulai
+    return hasil
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tabel", choices=sorted(SKEMA_IMPOR), help="tabel tujuan")
+    parser.add_argument("berkas", type=Path, help="berkas CSV atau Excel (.xlsx)")
+    parser.add_argument("--metode", choices=METODE_TULIS, default="executemany", help="cara menulis ke MySQL")
+    parser.add_argument("--potongan", type=int, default=UKURAN_POTONGAN, help="baris per potongan/transaksi")
+    parser.add_argument("--tenant", default=None, help="nama tenant (default: tenant pertama)")
+    parser.add_argument("--kering", action="store_true", help="validasi saja, tanpa menulis")
+    parser.add_argument("--galat", type=Path, default=None, help="simpan baris yang ditolak ke CSV ini")
+    args = parser.parse_args()
+
+    hasil = impor_berkas(
+        args.berkas, args.tabel, metode=args.metode, ukuran=args.potongan, tenant=args.tenant, kering=args.kering
+    )
+    galat = hasil.tabel_galat()
+    print(
+        f"{hasil.tabel}: {hasil.dibaca} baris dibaca, {hasil.ditulis} ditulis, "
+        f"{len(galat)} ditolak ({hasil.detik:.2f} detik)"
+    )
+    if hasil.ditulis:
+        interval = int(get_setting("interval_versi", INTERVAL_VERSI))
+        print(
+            f"Dashboard yang sedang berjalan memuat ulang cache {hasil.tabel} "
+            f"paling lambat {interval} detik lagi (atau lewat tombol Muat ulang data)."
+        )
+    if args.galat is not None and not galat.empty:
+        galat.to_csv(args.galat, index=False)
+        print(f"Baris yang ditolak disimpan di {args.galat}")
+    elif not galat.empty:
+        print(galat.head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
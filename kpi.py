@@ -0,0 +1,220 @@
+"""
+kpi.py
+Mesin KPI untuk kartu ringkasan: jumlah peminjaman, anggota aktif (unik),
+dan buku yang dipinjam (unik) untuk kombinasi filter tanggal, fakultas,
+dan kategori buku.
+
+Catatan:
+- Peminjaman dikelompokkan ke bucket (bulan, fakultas, kategori) dan
+  disimpan terurut per bucket (format CSR) berisi kode anggota/buku yang
+  padat (idx_* dari model star schema).
+- Setiap bucket punya sketch HyperLogLog (sketch.py) untuk anggota dan buku.
+  Bulan yang tercakup penuh oleh filter cukup digabung sketch-nya; bulan di
+  tepi rentang tanggal ditambahkan dari baris peminjamannya.
+- Mode "eksak" menghitung dengan bitset di atas kode padat (tanpa hashing);
+  mode "otomatis" memakai eksak bila seleksi kecil (<= AMBANG_EKSAK baris).
+  Mode bisa diatur lewat pengaturan `kpi_mode` (lihat config.py).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from config import get_setting
+from db import load_model
+from memori import daftarkan
+from model import StarSchema, _take_kode
+from sketch import HLL_P, hll_baru, hll_estimasi, hll_gabung, hll_posisi, hll_tambah
+from tenant import per_tenant, tenant_aktif
+from timeseries import awal_periode, kunci_waktu
+
+# Seleksi dengan jumlah peminjaman sebanyak ini atau kurang dihitung eksak
+AMBANG_EKSAK = 50_000
+
+MODE_KPI = ["otomatis", "perkiraan", "eksak"]
+
+
+@dataclass
+class IndeksKpi:
+    """Peminjaman terurut per bucket + sketch HLL per bucket."""
+
+    n_anggota: int
+    n_buku: int
+    kode_fakultas: dict
+    kode_kategori: dict
+    # per peminjaman (terurut per bucket); urutan = posisi baris di model.fakta
+    urutan: np.ndarray
+    hari: np.ndarray
+    idx_anggota: np.ndarray
+    idx_buku: np.ndarray
+    # per bucket
+    offset: np.ndarray
+    bucket_bulan: np.ndarray
+    bucket_fakultas: np.ndarray
+    bucket_kategori: np.ndarray
+    bucket_hari_awal: np.ndarray
+    bucket_hari_akhir: np.ndarray
+    hll_anggota: np.ndarray
+    hll_buku: np.ndarray
+
+
+def bangun_indeks_kpi(model: StarSchema, p: int = HLL_P) -> IndeksKpi:
+    """Menyusun IndeksKpi dari tabel fakta model."""
+    f = model.fakta
+    idx_anggota = f["idx_anggota"].to_numpy()
+    idx_buku = f["idx_buku"].to_numpy()
+    idx_fak = _take_kode(model.prodi["idx_fakultas"], model.anggota["idx_prodi"].to_numpy()[idx_anggota])
+    idx_kat = model.buku["idx_klasifikasi"].to_numpy()[idx_buku]
+    tgl = f["tgl_pinjam"].to_numpy()
+    hari = kunci_waktu(tgl, "hari")
+    bulan = kunci_waktu(tgl, "bulan")
+
+    # fakultas -1 (anggota tanpa prodi) digeser menjadi 0
+    n_fak = len(model.fakultas) + 1
+    n_kat = len(model.klasifikasi)
+    bucket = ((bulan - (bulan.min() if len(bulan) else 0)) * n_fak + (idx_fak + 1)) * n_kat + idx_kat
+    urutan = np.argsort(bucket, kind="stable")
+    bucket = bucket[urutan]
+    unik, awal = np.unique(bucket, return_index=True)
+
+    bulan_urut = bulan[urutan]
+    offset = np.append(awal, len(bucket)).astype(np.int64)
+    kode_bucket = np.repeat(np.arange(len(unik)), np.diff(offset))
+
+    hll_anggota = hll_baru(p, len(unik))
+    hll_buku = hll_baru(p, len(unik))
+    for register, nilai in [(hll_anggota, idx_anggota[urutan]), (hll_buku, idx_buku[urutan])]:
+        indeks, rank = hll_posisi(nilai, p)
+        np.maximum.at(register, (kode_bucket, indeks), rank)
+
+    return IndeksKpi(
+        n_anggota=len(model.anggota),
+        n_buku=len(model.buku),
+        kode_fakultas={nama: i for i, nama in enumerate(model.fakultas["nama_fakultas"])},
+        kode_kategori={nama: i for i, nama in enumerate(model.klasifikasi["kategori_buku"])},
+        urutan=urutan,
+        hari=hari[urutan],
+        idx_anggota=idx_anggota[urutan],
+        idx_buku=idx_buku[urutan],
+        offset=offset,
+        bucket_bulan=bulan_urut[awal],
+        bucket_hari_awal=awal_periode(bulan_urut[awal], "bulan").astype(np.int64),
+        bucket_hari_akhir=awal_periode(bulan_urut[awal] + 1, "bulan").astype(np.int64) - 1,
+        bucket_fakultas=idx_fak[urutan][awal],
+        bucket_kategori=idx_kat[urutan][awal],
+        hll_anggota=hll_anggota,
+        hll_buku=hll_buku,
+    )
+
+
+@per_tenant()
+def load_indeks_kpi() -> IndeksKpi:
+    """IndeksKpi untuk model yang sedang dimuat (per tenant, dipakai bersama semua sesi)."""
+    indeks = bangun_indeks_kpi(load_model())
+    daftarkan(f"indeks_kpi [{tenant_aktif()}]", indeks)
+    return indeks
+
+
+def _posisi_segmen(offset: np.ndarray, bucket: np.ndarray) -> np.ndarray:
+    """Posisi semua baris milik bucket terpilih (gabungan beberapa irisan CSR)."""
+    awal = offset[bucket]
+    panjang = offset[bucket + 1] - awal
+    if panjang.sum() == 0:
+        return np.empty(0, dtype=np.int64)
+    geser = np.repeat(awal - np.concatenate([[0], np.cumsum(panjang)[:-1]]), panjang)
+    return geser + np.arange(panjang.sum())
+
+
+def _hitung_eksak(kode: np.ndarray, n: int) -> int:
+    """Jumlah kode unik memakai bitset (kode padat 0..n-1)."""
+    bitset = np.zeros(n, dtype=bool)
+    bitset[kode] = True
+    return int(np.count_nonzero(bitset))
+
+
+def pilih_bucket(
+    indeks: IndeksKpi,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fakultas: str | None = None,
+    kategori: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Menerjemahkan filter tanggal (inklusif), fakultas, dan kategori (None = semua)
+    menjadi (bucket yang tercakup penuh, posisi baris dari bucket tepi yang
+    masuk rentang tanggal).
+    """
+    pilih = np.ones(len(indeks.bucket_bulan), dtype=bool)
+    if fakultas is not None:
+        pilih &= indeks.bucket_fakultas == indeks.kode_fakultas.get(fakultas, -2)
+    if kategori is not None:
+        pilih &= indeks.bucket_kategori == indeks.kode_kategori.get(kategori, -2)
+
+    # Bucket bulan yang seluruh harinya masuk rentang cukup digabung agregatnya;
+    # bulan di tepi rentang dihitung dari baris peminjamannya.
+    h0 = kunci_waktu(np.datetime64(start_date, "D"), "hari") if start_date else None
+    h1 = kunci_waktu(np.datetime64(end_date, "D"), "hari") if end_date else None
+    penuh = pilih.copy()
+    if h0 is not None:
+        pilih &= indeks.bucket_hari_akhir >= h0
+        penuh &= indeks.bucket_hari_awal >= h0
+    if h1 is not None:
+        pilih &= indeks.bucket_hari_awal <= h1
+        penuh &= indeks.bucket_hari_akhir <= h1
+    penuh &= pilih
+    sebagian = pilih & ~penuh
+
+    pos_sebagian = _posisi_segmen(indeks.offset, np.flatnonzero(sebagian))
+    if len(pos_sebagian):
+        hari = indeks.hari[pos_sebagian]
+        dalam = np.ones(len(hari), dtype=bool)
+        if h0 is not None:
+            dalam &= hari >= h0
+        if h1 is not None:
+            dalam &= hari <= h1
+        pos_sebagian = pos_sebagian[dalam]
+    return np.flatnonzero(penuh), pos_sebagian
+
+
+def hitung_kpi(
+    indeks: IndeksKpi,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fakultas: str | None = None,
+    kategori: str | None = None,
+    mode: str | None = None,
+) -> dict:
+    """
+    KPI untuk filter tanggal (inklusif), fakultas, dan kategori (None = semua).
+
+    Mengembalikan dict: peminjaman, anggota, buku, eksak (bool).
+    """
+    mode = mode or str(get_setting("kpi_mode", "otomatis")).lower()
+    bucket_penuh, pos_sebagian = pilih_bucket(indeks, start_date, end_date, fakultas, kategori)
+
+    n_penuh = int((indeks.offset[bucket_penuh + 1] - indeks.offset[bucket_penuh]).sum())
+    n_peminjaman = n_penuh + len(pos_sebagian)
+
+    eksak = mode == "eksak" or (mode == "otomatis" and n_peminjaman <= AMBANG_EKSAK)
+    if eksak:
+        pos = np.concatenate([_posisi_segmen(indeks.offset, bucket_penuh), pos_sebagian])
+        anggota = _hitung_eksak(indeks.idx_anggota[pos], indeks.n_anggota)
+        buku = _hitung_eksak(indeks.idx_buku[pos], indeks.n_buku)
+    else:
+        sketch_anggota = hll_gabung(indeks.hll_anggota[bucket_penuh]).copy()
+        sketch_buku = hll_gabung(indeks.hll_buku[bucket_penuh]).copy()
+        p = int(np.log2(indeks.hll_anggota.shape[1]))
+        hll_tambah(sketch_anggota, indeks.idx_anggota[pos_sebagian], p)
+        hll_tambah(sketch_buku, indeks.idx_buku[pos_sebagian], p)
+        anggota = min(int(round(hll_estimasi(sketch_anggota))), indeks.n_anggota)
+        buku = min(int(round(hll_estimasi(sketch_buku))), indeks.n_buku)
+
+    return {"peminjaman": n_peminjaman, "anggota": anggota, "buku": buku, "eksak": eksak}
+
+
+def format_kpi(nilai: int, eksak: bool) -> str:
+    """Angka KPI untuk kartu; nilai perkiraan diberi tanda ≈."""
+    return f"{nilai:,}" if eksak else f"≈{nilai:,}"
@@ -0,0 +1,286 @@
+"""
+kuantil.py
+Sebaran durasi peminjaman (kuartil, median, p90) per status, fakultas,
+atau kategori buku untuk kombinasi filter apa pun, tanpa memindai tabel
+peminjaman.
+
+Catatan:
+- Durasi (yang tidak kosong) disimpan terurut per bucket harian
+  (hari, status, fakultas, kategori) dalam format CSR seperti kpi.IndeksKpi.
+  Bucket harian umumnya jauh lebih kecil dari KLL_K, sehingga "sketch"
+  hariannya adalah nilai aslinya.
+- Setiap bucket bulanan (bulan, status, fakultas, kategori) punya sketch KLL
+  (sketch.py) beserta min/maks eksak. Bulan yang tercakup penuh oleh filter
+  tanggal cukup digabung sketch-nya; bulan di tepi rentang diambil dari
+  bucket hariannya.
+- Mode "eksak" memakai semua durasi bucket harian terpilih; mode "otomatis"
+  memakai eksak bila seleksi kecil (<= AMBANG_EKSAK durasi). Mode bisa diatur
+  lewat pengaturan `kuantil_mode` (lihat config.py).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from config import get_setting
+from db import load_model
+from kpi import _posisi_segmen
+from memori import daftarkan
+from model import STATUS_PEMINJAMAN, StarSchema, _take_kode
+from sketch import KLL_K, kll_kompres, kll_kuantil
+from tenant import per_tenant, tenant_aktif
+from timeseries import awal_periode, kunci_waktu
+
+# Seleksi dengan durasi sebanyak ini atau kurang dihitung eksak
+AMBANG_EKSAK = 50_000
+
+MODE_KUANTIL = ["otomatis", "perkiraan", "eksak"]
+
+# Kolom frame peminjaman untuk setiap dimensi pengelompokan
+DIMENSI_KUANTIL = {
+    "status": "status_peminjaman",
+    "fakultas": "nama_fakultas",
+    "kategori": "kategori_buku",
+}
+
+_Q = [0.25, 0.5, 0.75, 0.9]
+
+
+@dataclass
+class IndeksKuantil:
+    """Durasi per bucket harian (CSR) + sketch KLL per bucket bulanan (CSR)."""
+
+    fakultas: np.ndarray
+    kategori: np.ndarray
+    # per durasi (terurut per bucket harian)
+    durasi: np.ndarray
+    # per bucket harian; fakultas/kategori bergeser +1 (0 = tanpa fakultas/kategori)
+    offset_hari: np.ndarray
+    hari: np.ndarray
+    hari_bulan: np.ndarray
+    hari_status: np.ndarray
+    hari_fakultas: np.ndarray
+    hari_kategori: np.ndarray
+    # per bucket bulanan
+    offset_bulan: np.ndarray
+    sketch_nilai: np.ndarray
+    sketch_bobot: np.ndarray
+    bulan: np.ndarray
+    bulan_status: np.ndarray
+    bulan_fakultas: np.ndarray
+    bulan_kategori: np.ndarray
+    bulan_n: np.ndarray
+    bulan_min: np.ndarray
+    bulan_maks: np.ndarray
+    bulan_hari_awal: np.ndarray
+    bulan_hari_akhir: np.ndarray
+
+
+def _bucket_csr(kunci: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Urutan stabil per kunci, posisi awal setiap bucket, dan offset CSR."""
+    urutan = np.argsort(kunci, kind="stable")
+    _, awal = np.unique(kunci[urutan], return_index=True)
+    return urutan, awal, np.append(awal, len(kunci)).astype(np.int64)
+
+
+def bangun_indeks_kuantil(model: StarSchema, k: int = KLL_K) -> IndeksKuantil:
+    """Menyusun IndeksKuantil dari tabel fakta model (tanpa tanggal/durasi diabaikan)."""
+    f = model.fakta
+    durasi = pd.to_numeric(f["durasi_peminjaman"], errors="coerce").to_numpy(dtype=np.float64)
+    tgl = f["tgl_pinjam"].to_numpy()
+    ada = ~np.isnan(durasi) & ~np.isnat(tgl)
+    durasi = durasi[ada]
+    idx_anggota = f["idx_anggota"].to_numpy()[ada]
+    fak = _take_kode(model.prodi["idx_fakultas"], model.anggota["idx_prodi"].to_numpy()[idx_anggota]) + 1
+    kat = model.buku["idx_klasifikasi"].to_numpy()[f["idx_buku"].to_numpy()[ada]] + 1
+    status = f["kode_status"].to_numpy()[ada].astype(np.int64)
+    hari = kunci_waktu(tgl[ada], "hari")
+    bulan = kunci_waktu(tgl[ada], "bulan")
+
+    n_fak, n_kat, n_status = len(model.fakultas) + 1, len(model.klasifikasi) + 1, len(STATUS_PEMINJAMAN)
+    kombinasi = (status * n_fak + fak) * n_kat + kat
+    n_kombinasi = n_status * n_fak * n_kat
+
+    # ---- bucket harian: nilai asli ----
+    hari_awal = hari.min() if len(hari) else 0
+    urutan, awal, offset_hari = _bucket_csr((hari - hari_awal) * n_kombinasi + kombinasi)
+    durasi_hari = durasi[urutan]
+
+    # ---- bucket bulanan: sketch KLL (nilai asli bila <= k) ----
+    bulan_awal = bulan.min() if len(bulan) else 0
+    urutan_b, awal_b, offset_b = _bucket_csr((bulan - bulan_awal) * n_kombinasi + kombinasi)
+    durasi_b = durasi[urutan_b]
+    n_b = np.diff(offset_b)
+    kode_b = np.repeat(np.arange(len(n_b)), n_b)
+    kecil = n_b[kode_b] <= k
+    potongan = [(kode_b[kecil], durasi_b[kecil], np.ones(int(kecil.sum()), dtype=np.int64))]
+    for b in np.flatnonzero(n_b > k):
+        nilai, bobot = kll_kompres(durasi_b[offset_b[b]:offset_b[b + 1]], k=k, seed=int(b))
+        potongan.append((np.full(len(nilai), b), nilai, bobot))
+    kode_s = np.concatenate([p[0] for p in potongan])
+    urut_s = np.argsort(kode_s, kind="stable")
+
+    return IndeksKuantil(
+        fakultas=model.fakultas["nama_fakultas"].to_numpy(dtype=object),
+        kategori=model.klasifikasi["kategori_buku"].to_numpy(dtype=object),
+        durasi=durasi_hari,
+        offset_hari=offset_hari,
+        hari=hari[urutan][awal],
+        hari_bulan=bulan[urutan][awal],
+        hari_status=status[urutan][awal],
+        hari_fakultas=fak[urutan][awal],
+        hari_kategori=kat[urutan][awal],
+        offset_bulan=np.searchsorted(kode_s[urut_s], np.arange(len(n_b) + 1)),
+        sketch_nilai=np.concatenate([p[1] for p in potongan])[urut_s],
+        sketch_bobot=np.concatenate([p[2] for p in potongan])[urut_s],
+        bulan=bulan[urutan_b][awal_b],
+        bulan_status=status[urutan_b][awal_b],
+        bulan_fakultas=fak[urutan_b][awal_b],
+        bulan_kategori=kat[urutan_b][awal_b],
+        bulan_n=n_b,
+        bulan_min=np.minimum.reduceat(durasi_b, awal_b) if len(awal_b) else np.empty(0),
+        bulan_maks=np.maximum.reduceat(durasi_b, awal_b) if len(awal_b) else np.empty(0),
+        bulan_hari_awal=awal_periode(bulan[urutan_b][awal_b], "bulan").astype(np.int64),
+        bulan_hari_akhir=awal_periode(bulan[urutan_b][awal_b] + 1, "bulan").astype(np.int64) - 1,
+    )
+
+
+@per_tenant()
+def load_indeks_kuantil() -> IndeksKuantil:
+    """IndeksKuantil untuk model yang sedang dimuat (per tenant, dipakai bersama semua sesi)."""
+    indeks = bangun_indeks_kuantil(load_model())
+    daftarkan(f"indeks_kuantil [{tenant_aktif()}]", indeks)
+    return indeks
+
+
+def _kode_nama(nama: np.ndarray, pilihan: str | None) -> int | None:
+    """Kode bergeser (+1) untuk nama fakultas/kategori; -1 bila tidak ada."""
+    if pilihan is None:
+        return None
+    cocok = np.flatnonzero(nama == pilihan)
+    return int(cocok[0]) + 1 if len(cocok) else -1
+
+
+def _cocok(status, fak, kat, kode_status, kode_fak, kode_kat) -> np.ndarray:
+    pilih = np.ones(len(status), dtype=bool)
+    if kode_status is not None:
+        pilih &= status == kode_status
+    if kode_fak is not None:
+        pilih &= fak == kode_fak
+    if kode_kat is not None:
+        pilih &= kat == kode_kat
+    return pilih
+
+
+def _ringkas(grup: np.ndarray, nilai: np.ndarray, bobot: np.ndarray, label: np.ndarray) -> pd.DataFrame:
+    """Kuartil, median, p90 per kode grup dari nilai berbobot."""
+    baris = []
+    for g in np.unique(grup):
+        di_g = grup == g
+        q1, med, q3, p90 = kll_kuantil(nilai[di_g], bobot[di_g], _Q)
+        baris.append({
+            "grup": label[g], "n": int(bobot[di_g].sum()),
+            "q1": q1, "median": med, "q3": q3, "p90": p90,
+        })
+    return pd.DataFrame(baris, columns=["grup", "n", "q1", "median", "q3", "p90"])
+
+
+def ringkasan_durasi(
+    indeks: IndeksKuantil,
+    per: str = "status",
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fakultas: str | None = None,
+    kategori: str | None = None,
+    status: str | None = None,
+    mode: str | None = None,
+) -> pd.DataFrame:
+    """
+    Sebaran durasi per `per` ("status", "fakultas", "kategori") untuk filter
+    tanggal (inklusif), fakultas, kategori, dan status peminjaman (None = semua).
+
+    Hasil berkolom: grup, n, min, q1, median, q3, p90, maks, eksak (bool).
+    Min/maks selalu eksak; kuantil perkiraan memakai sketch KLL.
+    """
+    mode = mode or str(get_setting("kuantil_mode", "otomatis")).lower()
+    kode_status = None if status is None else (STATUS_PEMINJAMAN.index(status) if status in STATUS_PEMINJAMAN else -1)
+    kode_fak = _kode_nama(indeks.fakultas, fakultas)
+    kode_kat = _kode_nama(indeks.kategori, kategori)
+
+    h0 = kunci_waktu(np.datetime64(start_date, "D"), "hari") if start_date else None
+    h1 = kunci_waktu(np.datetime64(end_date, "D"), "hari") if end_date else None
+
+    # Bucket bulanan yang seluruh harinya masuk rentang cukup digabung sketch-nya
+    penuh = _cocok(indeks.bulan_status, indeks.bulan_fakultas, indeks.bulan_kategori, kode_status, kode_fak, kode_kat)
+    if h0 is not None:
+        penuh &= indeks.bulan_hari_awal >= h0
+    if h1 is not None:
+        penuh &= indeks.bulan_hari_akhir <= h1
+    bulan_penuh = np.unique(indeks.bulan[penuh])
+
+    hari = _cocok(indeks.hari_status, indeks.hari_fakultas, indeks.hari_kategori, kode_status, kode_fak, kode_kat)
+    if h0 is not None:
+        hari &= indeks.hari >= h0
+    if h1 is not None:
+        hari &= indeks.hari <= h1
+    n_total = int(np.diff(indeks.offset_hari)[hari].sum())
+
+    eksak = mode == "eksak" or (mode == "otomatis" and n_total <= AMBANG_EKSAK)
+    if not eksak:
+        # bulan penuh dari sketch, sisanya dari bucket harian
+        hari &= ~np.isin(indeks.hari_bulan, bulan_penuh)
+    b_hari = np.flatnonzero(hari)
+    n_hari = np.diff(indeks.offset_hari)[b_hari]
+    pos = _posisi_segmen(indeks.offset_hari, b_hari)
+    nilai = [indeks.durasi[pos]]
+    bobot = [np.ones(len(pos), dtype=np.int64)]
+    kode_grup = {
+        "status": (indeks.hari_status, indeks.bulan_status),
+        "fakultas": (indeks.hari_fakultas, indeks.bulan_fakultas),
+        "kategori": (indeks.hari_kategori, indeks.bulan_kategori),
+    }[per]
+    grup = [np.repeat(kode_grup[0][b_hari], n_hari)]
+
+    b_bulan = np.flatnonzero(penuh) if not eksak else np.empty(0, dtype=np.int64)
+    if len(b_bulan):
+        pos_s = _posisi_segmen(indeks.offset_bulan, b_bulan)
+        nilai.append(indeks.sketch_nilai[pos_s])
+        bobot.append(indeks.sketch_bobot[pos_s])
+        grup.append(np.repeat(kode_grup[1][b_bulan], np.diff(indeks.offset_bulan)[b_bulan]))
+
+    if per == "status":
+        label = np.asarray(STATUS_PEMINJAMAN, dtype=object)
+    else:
+        label = np.concatenate([[None], indeks.fakultas if per == "fakultas" else indeks.kategori])
+    nilai, bobot, grup = np.concatenate(nilai), np.concatenate(bobot), np.concatenate(grup)
+    if per != "status":
+        # seperti groupby, tanpa fakultas/kategori tidak ditampilkan
+        ada = grup > 0
+        nilai, bobot, grup = nilai[ada], bobot[ada], grup[ada]
+    hasil = _ringkas(grup, nilai, bobot, label)
+
+    # min/maks eksak: nilai bucket harian + min/maks bucket bulanan
+    ekstrem = pd.DataFrame({
+        "grup": np.concatenate([label[grup], label[kode_grup[1][b_bulan]], label[kode_grup[1][b_bulan]]]),
+        "nilai": np.concatenate([nilai, indeks.bulan_min[b_bulan], indeks.bulan_maks[b_bulan]]),
+    }).groupby("grup")["nilai"].agg(["min", "max"]).rename(columns={"max": "maks"})
+    hasil = hasil.join(ekstrem, on="grup")
+    hasil["eksak"] = eksak
+    return hasil[["grup", "n", "min", "q1", "median", "q3", "p90", "maks", "eksak"]]
+
+
+def ringkasan_durasi_dari_frame(df: pd.DataFrame, per: str = "status") -> pd.DataFrame:
+    """Sebaran durasi eksak per `per` dari DataFrame peminjaman apa pun."""
+    kolom = DIMENSI_KUANTIL[per]
+    data = df[[kolom, "durasi_peminjaman"]].dropna()
+    kode, label = pd.factorize(data[kolom], sort=True)
+    nilai = data["durasi_peminjaman"].to_numpy(dtype=np.float64)
+    hasil = _ringkas(kode, nilai, np.ones(len(nilai), dtype=np.int64), np.asarray(label, dtype=object))
+    ekstrem = data.groupby(kolom)["durasi_peminjaman"].agg(["min", "max"]).rename(columns={"max": "maks"})
+    hasil = hasil.join(ekstrem.astype(np.float64), on="grup")
+    hasil["eksak"] = True
+    return hasil[["grup", "n", "min", "q1", "median", "q3", "p90", "maks", "eksak"]]
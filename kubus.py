@@ -0,0 +1,271 @@
+"""
+kubus.py
+Kubus agregat peminjaman untuk filter silang antar grafik halaman Ringkasan.
+
+Catatan:
+- Jumlah peminjaman disimpan sebagai array padat [bulan, status, fakultas,
+  kategori]; total denda serta jumlah dan total durasi (yang tidak kosong)
+  sebagai [bulan, fakultas, kategori]. Ukurannya hanya (jumlah bulan x 4 x fakultas x
+  kategori), jauh lebih kecil dari tabel peminjaman.
+- Slot fakultas/kategori 0 berisi peminjaman tanpa fakultas/kategori (kode -1
+  di model); slot ini ikut di tren tetapi tidak ditampilkan di grafik per
+  fakultas/kategori (sama seperti groupby yang mengabaikan NaN).
+- Matriks fakultas x kategori (heatmap) juga diambil dari kubus: jumlah,
+  total denda, atau rata-rata durasi, dengan normalisasi per baris/kolom/
+  total dihitung di atas matriks kecil tersebut.
+- Seleksi (bulan, fakultas, kategori) cukup berupa mask per sumbu; setiap
+  grafik dihitung dengan menjumlahkan irisan kubus, tanpa menyentuh baris.
+  Seperti filter silang pada umumnya, grafik tidak difilter oleh seleksinya
+  sendiri.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from db import load_model
+from denda import _denda_int
+from memori import daftarkan
+from model import STATUS_PEMINJAMAN, StarSchema, _take_kode
+from tenant import per_tenant, tenant_aktif
+from timeseries import kunci_waktu, label_periode
+
+
+# Metrik matriks fakultas x kategori -> label nilai
+METRIK_MATRIKS = {
+    "jumlah": "Jumlah peminjaman",
+    "denda": "Total denda (Rp)",
+    "durasi": "Rata-rata durasi (hari)",
+}
+
+
+@dataclass
+class KubusPeminjaman:
+    """Agregat peminjaman per (bulan, status, fakultas, kategori)."""
+
+    bulan_awal: int
+    fakultas: np.ndarray
+    kategori: np.ndarray
+    jumlah: np.ndarray
+    denda_total: np.ndarray
+    durasi_total: np.ndarray
+    durasi_n: np.ndarray
+
+
+@dataclass
+class SeleksiSilang:
+    """Pilihan aktif dari grafik: rentang bulan (kunci) dan nama fakultas/kategori."""
+
+    bulan: tuple[int, int] | None = None
+    fakultas: frozenset = frozenset()
+    kategori: frozenset = frozenset()
+
+    def aktif(self) -> bool:
+        return self.bulan is not None or bool(self.fakultas) or bool(self.kategori)
+
+
+def bangun_kubus(model: StarSchema) -> KubusPeminjaman:
+    """Menyusun kubus dari tabel fakta model (baris tanpa tgl_pinjam diabaikan)."""
+    f = model.fakta
+    tgl = f["tgl_pinjam"].to_numpy()
+    ada = ~np.isnat(tgl)
+    idx_anggota = f["idx_anggota"].to_numpy()[ada]
+    idx_buku = f["idx_buku"].to_numpy()[ada]
+    fak = _take_kode(model.prodi["idx_fakultas"], model.anggota["idx_prodi"].to_numpy()[idx_anggota]) + 1
+    kat = model.buku["idx_klasifikasi"].to_numpy()[idx_buku] + 1
+    status = f["kode_status"].to_numpy()[ada].astype(np.int64)
+    bulan = kunci_waktu(tgl[ada], "bulan")
+    bulan_awal = int(bulan.min()) if len(bulan) else 0
+    n_bulan = int(bulan.max()) - bulan_awal + 1 if len(bulan) else 0
+
+    n_fak, n_kat, n_status = len(model.fakultas) + 1, len(model.klasifikasi) + 1, len(STATUS_PEMINJAMAN)
+    sel = (bulan - bulan_awal) * n_fak * n_kat + fak * n_kat + kat
+    n_sel = n_bulan * n_fak * n_kat
+    jumlah = np.bincount(
+        (((bulan - bulan_awal) * n_status + status) * n_fak + fak) * n_kat + kat,
+        minlength=n_sel * n_status,
+    ).reshape(n_bulan, n_status, n_fak, n_kat)
+
+    denda_total = np.zeros(n_sel, dtype=np.int64)
+    np.add.at(denda_total, sel, _denda_int(f["denda_buku"])[ada])
+
+    durasi = pd.to_numeric(f["durasi_peminjaman"], errors="coerce").to_numpy(dtype=np.float64)[ada]
+    isi = ~np.isnan(durasi)
+    durasi_total = np.bincount(sel[isi], weights=durasi[isi], minlength=n_sel).reshape(n_bulan, n_fak, n_kat)
+    durasi_n = np.bincount(sel[isi], minlength=n_sel).reshape(n_bulan, n_fak, n_kat)
+
+    tanpa = np.array([None], dtype=object)
+    return KubusPeminjaman(
+        bulan_awal=bulan_awal,
+        fakultas=np.concatenate([tanpa, model.fakultas["nama_fakultas"].to_numpy(dtype=object)]),
+        kategori=np.concatenate([tanpa, model.klasifikasi["kategori_buku"].to_numpy(dtype=object)]),
+        jumlah=jumlah,
+        denda_total=denda_total.reshape(n_bulan, n_fak, n_kat),
+        durasi_total=durasi_total,
+        durasi_n=durasi_n,
+    )
+
+
+@per_tenant()
+def load_kubus() -> KubusPeminjaman:
+    """KubusPeminjaman untuk model yang sedang dimuat (per tenant, dipakai bersama semua sesi)."""
+    kubus = bangun_kubus(load_model())
+    daftarkan(f"kubus_peminjaman [{tenant_aktif()}]", kubus)
+    return kubus
+
+
+def _mask_bulan(kubus: KubusPeminjaman, bulan: tuple[int, int] | None) -> np.ndarray:
+    kunci = np.arange(kubus.jumlah.shape[0]) + kubus.bulan_awal
+    if bulan is None:
+        return np.ones(len(kunci), dtype=bool)
+    return (kunci >= bulan[0]) & (kunci <= bulan[1])
+
+
+def _mask_nama(nama: np.ndarray, pilihan: frozenset) -> np.ndarray:
+    if not pilihan:
+        return np.ones(len(nama), dtype=bool)
+    return np.isin(nama, list(pilihan))
+
+
+def _iris(arr: np.ndarray, sumbu_mask: dict[int, np.ndarray]) -> np.ndarray:
+    for sumbu, mask in sumbu_mask.items():
+        arr = np.compress(mask, arr, axis=sumbu)
+    return arr
+
+
+def per_fakultas(kubus: KubusPeminjaman, seleksi: SeleksiSilang) -> pd.DataFrame:
+    """Jumlah peminjaman per fakultas (kolom nama_fakultas, jumlah), tanpa seleksi fakultas."""
+    irisan = _iris(kubus.jumlah, {0: _mask_bulan(kubus, seleksi.bulan), 3: _mask_nama(kubus.kategori, seleksi.kategori)})
+    jumlah = irisan.sum(axis=(0, 1, 3))[1:]
+    ada = jumlah > 0
+    return pd.DataFrame({"nama_fakultas": kubus.fakultas[1:][ada], "jumlah": jumlah[ada]}).sort_values(
+        "jumlah", ascending=False, ignore_index=True
+    )
+
+
+def per_kategori(kubus: KubusPeminjaman, seleksi: SeleksiSilang) -> pd.DataFrame:
+    """Jumlah peminjaman per kategori buku (kolom kategori_buku, jumlah), tanpa seleksi kategori."""
+    irisan = _iris(kubus.jumlah, {0: _mask_bulan(kubus, seleksi.bulan), 2: _mask_nama(kubus.fakultas, seleksi.fakultas)})
+    jumlah = irisan.sum(axis=(0, 1, 2))[1:]
+    ada = jumlah > 0
+    return pd.DataFrame({"kategori_buku": kubus.kategori[1:][ada], "jumlah": jumlah[ada]}).sort_values(
+        "jumlah", ascending=False, ignore_index=True
+    )
+
+
+def durasi_per_fakultas(kubus: KubusPeminjaman, seleksi: SeleksiSilang) -> pd.DataFrame:
+    """Rata-rata durasi per fakultas (kolom nama_fakultas, rata_durasi), tanpa seleksi fakultas."""
+    mask = {0: _mask_bulan(kubus, seleksi.bulan), 2: _mask_nama(kubus.kategori, seleksi.kategori)}
+    total = _iris(kubus.durasi_total, mask).sum(axis=(0, 2))[1:]
+    n = _iris(kubus.durasi_n, mask).sum(axis=(0, 2))[1:]
+    ada = n > 0
+    return pd.DataFrame({"nama_fakultas": kubus.fakultas[1:][ada], "rata_durasi": total[ada] / n[ada]}).sort_values(
+        "rata_durasi", ascending=False, ignore_index=True
+    )
+
+
+def tren_bulanan(kubus: KubusPeminjaman, seleksi: SeleksiSilang) -> pd.DataFrame:
+    """
+    Tren bulanan per status dalam format timeseries.agregat_waktu, difilter
+    fakultas/kategori terpilih (tanpa seleksi rentang bulan).
+    """
+    irisan = _iris(kubus.jumlah, {
+        2: _mask_nama(kubus.fakultas, seleksi.fakultas),
+        3: _mask_nama(kubus.kategori, seleksi.kategori),
+    }).sum(axis=(2, 3))
+    baris, kode = np.nonzero(irisan)
+    kunci = baris + kubus.bulan_awal
+    return pd.DataFrame({
+        "kunci": kunci,
+        "periode": label_periode(kunci, "bulan"),
+        "status_peminjaman": np.asarray(STATUS_PEMINJAMAN, dtype=object)[kode],
+        "jumlah": irisan[baris, kode],
+    })
+
+
+def matriks_fakultas_kategori(
+    kubus: KubusPeminjaman,
+    seleksi: SeleksiSilang | None = None,
+    metrik: str = "jumlah",
+    normalisasi: str | None = None,
+) -> pd.DataFrame:
+    """
+    Matriks padat fakultas (baris) x kategori buku (kolom) dari kubus,
+    dibatasi rentang bulan seleksi (bila ada).
+
+    - metrik: "jumlah" (peminjaman), "denda" (total denda), atau "durasi"
+      (rata-rata durasi; sel tanpa data bernilai NaN).
+    - normalisasi (hanya untuk jumlah/denda): "baris" -> persen per fakultas,
+      "kolom" -> persen per kategori, "total" -> persen dari seluruh matriks.
+    Fakultas/kategori yang seluruhnya kosong tidak ditampilkan.
+    """
+    if metrik not in METRIK_MATRIKS:
+        raise ValueError(f"Metrik tidak dikenal: {metrik!r}")
+    if normalisasi and (metrik == "durasi" or normalisasi not in ("baris", "kolom", "total")):
+        raise ValueError(f"Normalisasi {normalisasi!r} tidak berlaku untuk metrik {metrik!r}")
+
+    bulan = _mask_bulan(kubus, seleksi.bulan if seleksi else None)
+    n = _iris(kubus.jumlah, {0: bulan}).sum(axis=(0, 1))[1:, 1:]
+    if metrik == "jumlah":
+        nilai = n.astype(np.float64)
+    elif metrik == "denda":
+        nilai = _iris(kubus.denda_total, {0: bulan}).sum(axis=0)[1:, 1:].astype(np.float64)
+    else:
+        total = _iris(kubus.durasi_total, {0: bulan}).sum(axis=0)[1:, 1:]
+        n_durasi = _iris(kubus.durasi_n, {0: bulan}).sum(axis=0)[1:, 1:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            nilai = np.where(n_durasi > 0, total / n_durasi, np.nan)
+
+    if normalisasi:
+        pembagi = {
+            "baris": nilai.sum(axis=1, keepdims=True),
+            "kolom": nilai.sum(axis=0, keepdims=True),
+            "total": nilai.sum(),
+        }[normalisasi]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            nilai = np.where(pembagi > 0, nilai / pembagi * 100, 0.0)
+
+    baris, kolom = n.sum(axis=1) > 0, n.sum(axis=0) > 0
+    return pd.DataFrame(
+        nilai[np.ix_(baris, kolom)],
+        index=pd.Index(kubus.fakultas[1:][baris], name="nama_fakultas"),
+        columns=pd.Index(kubus.kategori[1:][kolom], name="kategori_buku"),
+    )
+
+
+def _titik(event) -> list[dict]:
+    return list(event["selection"]["points"]) if event else []
+
+
+def seleksi_dari_event(event_tren=None, event_fakultas=(), kategori=()) -> SeleksiSilang:
+    """
+    SeleksiSilang dari state st.plotly_chart(on_select=...):
+    - event_tren: titik/kotak pada grafik tren (sumbu x tanggal) -> rentang bulan;
+    - event_fakultas: event grafik dengan sumbu x nama fakultas (bisa lebih dari satu);
+    - kategori: nama kategori terpilih.
+    """
+    bulan = None
+    if event_tren:
+        x = [p["x"] for p in _titik(event_tren)]
+        for kotak in event_tren["selection"].get("box", []):
+            x.extend(kotak["x"])
+        if x:
+            bulan = rentang_bulan(x)
+    fakultas = frozenset(p["x"] for e in event_fakultas for p in _titik(e))
+    return SeleksiSilang(bulan=bulan, fakultas=fakultas, kategori=frozenset(kategori))
+
+
+def rentang_bulan(x) -> tuple[int, int]:
+    """Kunci bulan (inklusif) yang mencakup nilai tanggal hasil seleksi grafik tren."""
+    tgl = pd.to_datetime(pd.Series(x), format="mixed").to_numpy()
+    kunci = kunci_waktu(np.array([tgl.min(), tgl.max()]), "bulan")
+    return int(kunci[0]), int(kunci[1])
+
+
+def label_rentang(bulan: tuple[int, int]) -> str:
+    """Teks rentang bulan, mis. '2025-01 s.d. 2025-03'."""
+    awal, akhir = label_periode(np.array(bulan), "bulan")
+    return awal if awal == akhir else f"{awal} s.d. {akhir}"
@@ -0,0 +1,201 @@
+"""
+live.py
+Mode langsung: aktivitas peminjaman baru ditarik berkala dari MySQL dan
+digabungkan ke agregat in-memory tanpa memuat ulang model.
+
+Catatan:
+- Polling memakai kunci utama: SELECT ... WHERE id_peminjaman > id terakhir
+  yang sudah dilihat (range scan pada PRIMARY KEY), sehingga biayanya hanya
+  sebanding dengan jumlah baris baru.
+- Baris baru diubah ke format tabel fakta (kode posisi dimensi dari model
+  yang sedang dimuat) hanya untuk memperbarui agregat lalu dibuang; yang
+  disimpan hanya N_TERBARU baris terakhir untuk tabel feed. Model dan
+  indeks yang sudah di-cache tetap berupa snapshot; peminjaman oleh anggota
+  atau buku yang belum ada di snapshot baru ikut setelah model dimuat ulang.
+- Agregat kartu KPI (jumlah peminjaman, total denda, bitset anggota/buku)
+  dan tren bulanan per status diperbarui secara inkremental (O(baris baru)).
+- Feed dipakai bersama semua sesi (cache per tenant) dan dijaga lock:
+  poll_peminjaman mengubahnya di bawah lock (dua sesi tidak menambahkan
+  batch yang sama), dan sesi merender dari potret_langsung, salinan kartu,
+  tren, dan tabel feed yang diambil di bawah lock yang sama, sehingga tidak
+  pernah membaca agregat yang baru setengah diperbarui.
+- Hanya baris baru yang terdeteksi; perubahan status baris lama (mis.
+  pengembalian) ikut setelah model dimuat ulang.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from config import get_setting
+from db import baca_sql, load_model
+from denda import _denda_int
+from model import STATUS_PEMINJAMAN, StarSchema, _build_fakta
+from tenant import per_tenant
+from timeseries import kunci_waktu, label_periode
+
+# Interval polling default (detik)
+INTERVAL_LANGSUNG = 10
+
+# Baris maksimal per polling
+BATCH_LANGSUNG = 5_000
+
+# Jumlah peminjaman terbaru yang disimpan untuk tabel feed
+N_TERBARU = 20
+
+
+@dataclass
+class FeedLangsung:
+    """Agregat inkremental untuk kartu KPI dan tren bulanan mode langsung."""
+
+    id_terakhir: int
+    n_peminjaman: int
+    total_denda: int
+    anggota_aktif: np.ndarray
+    buku_dipinjam: np.ndarray
+    # tren bulanan: baris = bulan sejak bulan_awal, kolom = kode status
+    bulan_awal: int
+    jumlah_bulan: np.ndarray
+    terbaru: pd.DataFrame = field(default_factory=pd.DataFrame)
+    kunci: threading.Lock = field(default_factory=threading.Lock)
+
+
+def interval_langsung() -> int:
+    """Interval polling mode langsung (detik, pengaturan `interval_langsung`)."""
+    return int(get_setting("interval_langsung", INTERVAL_LANGSUNG))
+
+
+def bangun_feed(model: StarSchema) -> FeedLangsung:
+    """Menyusun agregat awal dari tabel fakta snapshot."""
+    f = model.fakta
+    anggota_aktif = np.zeros(len(model.anggota), dtype=bool)
+    anggota_aktif[f["idx_anggota"].to_numpy()] = True
+    buku_dipinjam = np.zeros(len(model.buku), dtype=bool)
+    buku_dipinjam[f["idx_buku"].to_numpy()] = True
+
+    feed = FeedLangsung(
+        id_terakhir=int(f["id_peminjaman"].max()) if len(f) else 0,
+        n_peminjaman=len(f),
+        total_denda=int(_denda_int(f["denda_buku"]).sum()),
+        anggota_aktif=anggota_aktif,
+        buku_dipinjam=buku_dipinjam,
+        bulan_awal=0,
+        jumlah_bulan=np.zeros((0, len(STATUS_PEMINJAMAN)), dtype=np.int64),
+    )
+    _tambah_tren(feed, f)
+    return feed
+
+
+@per_tenant()
+def load_feed() -> FeedLangsung:
+    """FeedLangsung untuk model yang sedang dimuat (per tenant, dipakai bersama semua sesi)."""
+    return bangun_feed(load_model())
+
+
+def _tambah_tren(feed: FeedLangsung, fakta: pd.DataFrame) -> None:
+    """Menambahkan baris fakta ke matriks tren bulanan (diperluas bila perlu)."""
+    tgl = fakta["tgl_pinjam"].to_numpy()
+    ada = ~pd.isna(tgl)
+    if not ada.any():
+        return
+    bulan = kunci_waktu(tgl[ada], "bulan")
+    kode = fakta["kode_status"].to_numpy()[ada].astype(np.int64)
+
+    if len(feed.jumlah_bulan) == 0:
+        feed.bulan_awal = int(bulan.min())
+    awal = min(feed.bulan_awal, int(bulan.min()))
+    akhir = max(feed.bulan_awal + len(feed.jumlah_bulan), int(bulan.max()) + 1)
+    if (awal, akhir) != (feed.bulan_awal, feed.bulan_awal + len(feed.jumlah_bulan)):
+        baru = np.zeros((akhir - awal, len(STATUS_PEMINJAMAN)), dtype=np.int64)
+        geser = feed.bulan_awal - awal
+        baru[geser:geser + len(feed.jumlah_bulan)] = feed.jumlah_bulan
+        feed.bulan_awal, feed.jumlah_bulan = awal, baru
+    np.add.at(feed.jumlah_bulan, (bulan - feed.bulan_awal, kode), 1)
+
+
+def tambah_peminjaman(feed: FeedLangsung, model: StarSchema, peminjaman: pd.DataFrame) -> int:
+    """
+    Menambahkan baris tabel peminjaman (hasil SELECT *) ke feed.
+    Mengembalikan jumlah baris yang masuk ke agregat.
+    """
+    if peminjaman.empty:
+        return 0
+    fakta = _build_fakta(peminjaman, model.anggota, model.buku, model.petugas)
+    feed.id_terakhir = max(feed.id_terakhir, int(peminjaman["id_peminjaman"].max()))
+    if fakta.empty:
+        return 0
+
+    feed.n_peminjaman += len(fakta)
+    feed.total_denda += int(_denda_int(fakta["denda_buku"]).sum())
+    feed.anggota_aktif[fakta["idx_anggota"].to_numpy()] = True
+    feed.buku_dipinjam[fakta["idx_buku"].to_numpy()] = True
+    _tambah_tren(feed, fakta)
+
+    ringkas = pd.DataFrame({
+        "id_peminjaman": fakta["id_peminjaman"].to_numpy(),
+        "tgl_pinjam": fakta["tgl_pinjam"].to_numpy(),
+        "nama_anggota": model.anggota["nama_anggota"].to_numpy()[fakta["idx_anggota"].to_numpy()],
+        "id_buku": model.buku["id_buku"].to_numpy()[fakta["idx_buku"].to_numpy()],
+        "status_peminjaman": np.asarray(STATUS_PEMINJAMAN, dtype=object)[fakta["kode_status"].to_numpy()],
+    })
+    feed.terbaru = pd.concat([ringkas.iloc[::-1], feed.terbaru]).head(N_TERBARU).reset_index(drop=True)
+    return len(fakta)
+
+
+def poll_peminjaman(feed: FeedLangsung, model: StarSchema, batas: int = BATCH_LANGSUNG) -> int:
+    """Menarik peminjaman dengan id di atas id terakhir dan menambahkannya ke feed."""
+    with feed.kunci:
+        baru = baca_sql(
+            "SELECT * FROM peminjaman WHERE id_peminjaman > %s ORDER BY id_peminjaman LIMIT %s",
+            (feed.id_terakhir, int(batas)),
+        )
+        return tambah_peminjaman(feed, model, baru)
+
+
+@dataclass(frozen=True)
+class PotretLangsung:
+    """Isi feed pada satu saat, untuk dirender tanpa lock."""
+
+    kpi: dict
+    tren: pd.DataFrame
+    terbaru: pd.DataFrame
+    id_terakhir: int
+
+
+def potret_langsung(feed: FeedLangsung) -> PotretLangsung:
+    """Salinan konsisten kartu KPI, tren bulanan, dan tabel feed (diambil di bawah feed.kunci)."""
+    with feed.kunci:
+        return PotretLangsung(
+            kpi=_kpi_langsung(feed),
+            tren=_tren_langsung(feed),
+            # feed.terbaru selalu diganti objek baru, tidak diubah in-place
+            terbaru=feed.terbaru,
+            id_terakhir=feed.id_terakhir,
+        )
+
+
+def _kpi_langsung(feed: FeedLangsung) -> dict:
+    """Nilai kartu KPI terkini: peminjaman, anggota, buku, denda (semua eksak)."""
+    return {
+        "peminjaman": feed.n_peminjaman,
+        "anggota": int(np.count_nonzero(feed.anggota_aktif)),
+        "buku": int(np.count_nonzero(feed.buku_dipinjam)),
+        "denda": feed.total_denda,
+        "eksak": True,
+    }
+
+
+def _tren_langsung(feed: FeedLangsung) -> pd.DataFrame:
+    """Tren bulanan per status dalam format timeseries.agregat_waktu."""
+    baris, kode = np.nonzero(feed.jumlah_bulan)
+    kunci = baris + feed.bulan_awal
+    return pd.DataFrame({
+        "kunci": kunci,
+        "periode": label_periode(kunci, "bulan"),
+        "status_peminjaman": np.asarray(STATUS_PEMINJAMAN, dtype=object)[kode],
+        "jumlah": feed.jumlah_bulan[baris, kode],
+    })
@@ -0,0 +1,185 @@
+"""
+memori.py
+Pencatatan pemakaian memori dan cache bersama berbatas (LRU) untuk dashboard.
+
+Catatan:
+- st.cache_data mengembalikan salinan (hasil unpickle) ke setiap sesi; untuk
+  DataFrame besar yang hanya dibaca, N sesi berarti N salinan. Loader yang
+  konsumennya tidak memodifikasi data memakai `cache_bersama`: satu objek per
+  proses dipakai bersama semua sesi (seperti st.cache_resource), dengan
+  Copy-on-Write pandas aktif sehingga perubahan kolom di sisi konsumen
+  membuat salinan kolom itu saja, bukan mengubah objek bersama.
+- Total ukuran entri cache_bersama dibatasi `cache_budget_mb` (config.py);
+  bila terlampaui, entri yang paling lama tidak dipakai (LRU) dibuang dan
+  akan dibangun ulang saat diminta lagi.
+- Objek cache lain (model, indeks) bisa didaftarkan dengan `daftarkan`
+  agar ikut dilaporkan (tidak ikut dibuang).
+- Per sesi dicatat ukuran isi st.session_state dan DataFrame yang dibentuk
+  halaman (`catat_sesi`), dilaporkan oleh `laporan_sesi`.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import get_setting
+from tenant import tenant_aktif
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # pandas >= 3 selalu Copy-on-Write
+    pd.set_option("mode.copy_on_write", True)
+
+# Batas default total cache bersama (MB)
+BUDGET_MB = 512
+
+_KUNCI_SESI = "_memori_sesi"
+
+
+def ukuran_objek(obj, _dilihat: set | None = None) -> int:
+    """Perkiraan ukuran (byte) DataFrame/array/dataclass/koleksi beserta isinya."""
+    dilihat = _dilihat if _dilihat is not None else set()
+    if id(obj) in dilihat:
+        return 0
+    dilihat.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return sum(ukuran_objek(getattr(obj, f.name), dilihat) for f in dataclasses.fields(obj))
+    if isinstance(obj, dict):
+        return sum(ukuran_objek(v, dilihat) for v in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(ukuran_objek(v, dilihat) for v in obj)
+    return 0
+
+
+def budget_byte() -> int:
+    """Batas total cache bersama (byte), dari pengaturan `cache_budget_mb`."""
+    return int(float(get_setting("cache_budget_mb", BUDGET_MB)) * 1024 * 1024)
+
+
+class RegistriCache:
+    """Entri cache bersama (LRU berbatas) dan objek terdaftar untuk laporan."""
+
+    def __init__(self):
+        self.kunci = threading.RLock()
+        # kunci -> (nama, objek, ukuran, waktu terakhir dipakai)
+        self.entri: OrderedDict = OrderedDict()
+        self.terdaftar: dict = {}
+        self.dibuang = 0
+
+    def ambil(self, kunci):
+        with self.kunci:
+            if kunci not in self.entri:
+                return None
+            nama, obj, ukuran, _ = self.entri.pop(kunci)
+            self.entri[kunci] = (nama, obj, ukuran, time.time())
+            return obj
+
+    def simpan(self, kunci, nama: str, obj, budget: int) -> None:
+        with self.kunci:
+            self.entri[kunci] = (nama, obj, ukuran_objek(obj), time.time())
+            self.entri.move_to_end(kunci)
+            # buang entri terlama; entri terbaru selalu dipertahankan
+            while len(self.entri) > 1 and self.total() > budget:
+                self.entri.popitem(last=False)
+                self.dibuang += 1
+
+    def total(self) -> int:
+        return sum(e[2] for e in self.entri.values())
+
+    def kosongkan(self) -> None:
+        with self.kunci:
+            self.entri.clear()
+
+
+@st.cache_resource
+def registri() -> RegistriCache:
+    """Registri cache bersama satu proses (dipakai semua sesi)."""
+    return RegistriCache()
+
+
+def cache_bersama(fungsi):
+    """
+    Dekorator: hasil `fungsi(*args)` disimpan sekali per proses (per tenant)
+    di registri LRU berbatas dan dikembalikan tanpa salinan. Argumen harus hashable.
+    Hanya untuk loader yang hasilnya tidak dimodifikasi in-place.
+    """
+    @functools.wraps(fungsi)
+    def pembungkus(*args, **kwargs):
+        reg = registri()
+        kunci = (tenant_aktif(), fungsi.__module__, fungsi.__qualname__, args, tuple(sorted(kwargs.items())))
+        obj = reg.ambil(kunci)
+        if obj is None:
+            obj = fungsi(*args, **kwargs)
+            reg.simpan(kunci, fungsi.__name__, obj, budget_byte())
+        return obj
+
+    # .clear() hanya membuang entri fungsi ini (semua tenant), bukan seluruh registri
+    pembungkus.clear = lambda: buang_entri(fungsi)
+    return pembungkus
+
+
+def buang_entri(fungsi, tenant: str | None = None) -> int:
+    """
+    Membuang entri cache_bersama milik `fungsi` untuk satu tenant (None: semua
+    tenant); mengembalikan jumlahnya.
+    """
+    reg = registri()
+    with reg.kunci:
+        kunci = [
+            k for k in reg.entri
+            if (tenant is None or k[0] == tenant) and k[1] == fungsi.__module__ and k[2] == fungsi.__qualname__
+        ]
+        for k in kunci:
+            del reg.entri[k]
+    return len(kunci)
+
+
+def daftarkan(nama: str, obj) -> None:
+    """Mendaftarkan objek cache lain (mis. model, indeks) agar ikut dilaporkan."""
+    reg = registri()
+    with reg.kunci:
+        if nama not in reg.terdaftar or reg.terdaftar[nama][0] is not obj:
+            reg.terdaftar[nama] = (obj, ukuran_objek(obj))
+
+
+def laporan_cache() -> pd.DataFrame:
+    """Ukuran setiap entri cache bersama dan objek terdaftar."""
+    reg = registri()
+    with reg.kunci:
+        baris = [
+            {"entri": nama, "jenis": "bersama (LRU)", "mb": ukuran / 2**20, "terakhir_dipakai": pd.Timestamp(t, unit="s")}
+            for nama, _, ukuran, t in reg.entri.values()
+        ] + [
+            {"entri": nama, "jenis": "resource", "mb": ukuran / 2**20, "terakhir_dipakai": pd.NaT}
+            for nama, (_, ukuran) in reg.terdaftar.items()
+        ]
+    return pd.DataFrame(baris, columns=["entri", "jenis", "mb", "terakhir_dipakai"])
+
+
+def catat_sesi(nama: str, obj) -> None:
+    """Mencatat ukuran objek milik sesi ini (mis. hasil filter) untuk laporan."""
+    st.session_state.setdefault(_KUNCI_SESI, {})[nama] = ukuran_objek(obj)
+
+
+def laporan_sesi() -> pd.DataFrame:
+    """Ukuran objek yang dipegang sesi ini: isi session_state dan catat_sesi."""
+    baris = [
+        {"objek": f"session_state[{k!r}]", "mb": ukuran_objek(v) / 2**20}
+        for k, v in st.session_state.items()
+        if k != _KUNCI_SESI
+    ]
+    baris += [{"objek": nama, "mb": b / 2**20} for nama, b in st.session_state.get(_KUNCI_SESI, {}).items()]
+    return pd.DataFrame(baris, columns=["objek", "mb"])
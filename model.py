@@ -0,0 +1,308 @@
+"""
+model.py
+Model data in-memory berbentuk star schema untuk dashboard Seperlima.
+
+Catatan:
+- Tabel dimensi (fakultas, program studi, anggota, judul, klasifikasi, buku,
+  petugas, pengarang) disimpan apa adanya, sehingga setiap string hanya ada
+  satu kali di memori.
+- Tabel fakta peminjaman hanya berisi kolom numerik/tanggal dan kode posisi
+  (idx_*) ke baris dimensi.
+- DataFrame "gabungan" (detail peminjaman, anggota, buku, buku-pengarang)
+  dibentuk saat dibutuhkan dengan take vektor pada kode posisi, sehingga JOIN
+  tidak lagi dikerjakan oleh MySQL.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Urutan tabel dasar yang dibutuhkan untuk membangun model
+TABEL_DASAR = [
+    "fakultas",
+    "program_studi",
+    "anggota",
+    "judul",
+    "klasifikasi",
+    "buku",
+    "pengarang",
+    "buku_pengarang",
+    "petugas",
+    "peminjaman",
+]
+
+# Kategori status peminjaman (kode int8 pada tabel fakta), urutan sama dengan
+# enum kolom peminjaman.status_peminjaman
+STATUS_PEMINJAMAN = ["Sedang dipinjam", "Selesai", "Hilang", "Rusak"]
+
+
+@dataclass
+class StarSchema:
+    """Kumpulan tabel dimensi dan tabel fakta peminjaman."""
+
+    fakultas: pd.DataFrame
+    prodi: pd.DataFrame
+    anggota: pd.DataFrame
+    judul: pd.DataFrame
+    klasifikasi: pd.DataFrame
+    buku: pd.DataFrame
+    pengarang: pd.DataFrame
+    buku_pengarang: pd.DataFrame
+    petugas: pd.DataFrame
+    fakta: pd.DataFrame
+    # Sidik jari isi tabel anggota (+ prodi/fakultas); berubah bila data anggota berubah
+    versi_anggota: str = ""
+    # Penanda unik per pembangunan model (kunci cache view turunan)
+    dibangun: int = field(default_factory=time.monotonic_ns)
+
+
+# ============================================================
+# Utilitas kode posisi
+# ============================================================
+
+def _kode_posisi(id_dimensi: pd.Series, foreign_key: pd.Series) -> np.ndarray:
+    """
+    Mengubah foreign key menjadi posisi baris pada tabel dimensi.
+    Nilai yang tidak ditemukan (atau NULL) menjadi -1.
+    """
+    return pd.Index(id_dimensi).get_indexer(foreign_key).astype(np.int32)
+
+
+def _take(values, kode: np.ndarray) -> np.ndarray:
+    """
+    Take vektor dengan dukungan kode -1 (hasilnya None/NaN, seperti LEFT JOIN).
+    Untuk kolom string, hasilnya hanya berisi referensi ke objek string yang
+    sama pada dimensi (tidak ada salinan string baru).
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iub":
+        if (kode < 0).any():
+            arr = arr.astype(np.float64)
+        else:
+            return arr[kode]
+    kosong = np.array([None], dtype=object) if arr.dtype == object else np.array([np.nan]).astype(arr.dtype)
+    return np.concatenate([arr, kosong])[kode]
+
+
+def _take_kode(kode_dimensi, kode: np.ndarray) -> np.ndarray:
+    """Merangkai kode posisi (mis. anggota -> prodi -> fakultas), -1 tetap -1."""
+    arr = np.asarray(kode_dimensi, dtype=np.int32)
+    return np.concatenate([arr, np.array([-1], dtype=np.int32)])[kode]
+
+
+# ============================================================
+# Pembangunan model
+# ============================================================
+
+def build_star_schema(tabel: dict[str, pd.DataFrame]) -> StarSchema:
+    """
+    Membangun star schema dari tabel-tabel dasar hasil SELECT * (lihat TABEL_DASAR).
+    """
+    fakultas = tabel["fakultas"].reset_index(drop=True)
+
+    prodi = tabel["program_studi"].reset_index(drop=True)
+    prodi["idx_fakultas"] = _kode_posisi(fakultas["id_fakultas"], prodi["id_fakultas"])
+
+    anggota = tabel["anggota"].rename(columns={"status": "status_anggota"}).reset_index(drop=True)
+    anggota["idx_prodi"] = _kode_posisi(prodi["id_prodi"], anggota["id_prodi"])
+
+    judul = tabel["judul"].reset_index(drop=True)
+    klasifikasi = tabel["klasifikasi"].reset_index(drop=True)
+    pengarang = tabel["pengarang"].reset_index(drop=True)
+    petugas = tabel["petugas"].reset_index(drop=True)
+
+    buku = (
+        tabel["buku"].rename(columns={"status": "status_buku"})
+        .sort_values("id_buku")
+        .reset_index(drop=True)
+    )
+    buku["idx_judul"] = _kode_posisi(judul["id_judul"], buku["id_judul"])
+    buku["idx_klasifikasi"] = _kode_posisi(klasifikasi["id_klasifikasi"], buku["id_klasifikasi"])
+
+    bp = tabel["buku_pengarang"].reset_index(drop=True)
+    bp["idx_buku"] = _kode_posisi(buku["id_buku"], bp["id_buku"])
+    bp["idx_pengarang"] = _kode_posisi(pengarang["id_pengarang"], bp["id_pengarang"])
+
+    # kode_pengarang per buku (pengganti GROUP_CONCAT ... ORDER BY urutan_pengarang)
+    bp_valid = bp[bp["idx_pengarang"] >= 0].sort_values(["idx_buku", "urutan_pengarang"])
+    kode_per_buku = (
+        pd.Series(_take(pengarang["kode_pengarang"], bp_valid["idx_pengarang"].to_numpy()),
+                  index=bp_valid["idx_buku"].to_numpy())
+        .groupby(level=0)
+        .agg(", ".join)
+    )
+    buku["kode_pengarang"] = kode_per_buku.reindex(range(len(buku))).to_numpy()
+
+    fakta = _build_fakta(tabel["peminjaman"], anggota, buku, petugas)
+
+    return StarSchema(
+        fakultas=fakultas,
+        prodi=prodi,
+        anggota=anggota,
+        judul=judul,
+        klasifikasi=klasifikasi,
+        buku=buku,
+        pengarang=pengarang,
+        buku_pengarang=bp,
+        petugas=petugas,
+        fakta=fakta,
+        versi_anggota=_sidik_jari(tabel["anggota"], tabel["program_studi"], tabel["fakultas"]),
+    )
+
+
+def _sidik_jari(*tabel: pd.DataFrame) -> str:
+    """Hash isi beberapa tabel kecil, dipakai sebagai kunci versi cache."""
+    return "-".join(
+        f"{len(df)}:{int(pd.util.hash_pandas_object(df, index=False).sum()) & 0xFFFFFFFFFFFF:x}"
+        for df in tabel
+    )
+
+
+def _build_fakta(
+    peminjaman: pd.DataFrame,
+    anggota: pd.DataFrame,
+    buku: pd.DataFrame,
+    petugas: pd.DataFrame,
+) -> pd.DataFrame:
+    """Tabel fakta peminjaman: hanya angka, tanggal, dan kode posisi dimensi."""
+    fakta = pd.DataFrame({
+        "id_peminjaman": peminjaman["id_peminjaman"].to_numpy(),
+        "tgl_pinjam": pd.to_datetime(peminjaman["tgl_pinjam"]).to_numpy(),
+        "tgl_kembali": pd.to_datetime(peminjaman["tgl_kembali"]).to_numpy(),
+        "durasi_peminjaman": peminjaman["durasi_peminjaman"].to_numpy(),
+        "denda_buku": peminjaman["denda_buku"].to_numpy(),
+        "idx_anggota": _kode_posisi(anggota["id_anggota"], peminjaman["id_anggota"]),
+        "idx_buku": _kode_posisi(buku["id_buku"], peminjaman["id_buku"]),
+        "idx_petugas": _kode_posisi(petugas["id_petugas"], peminjaman["id_petugas"]),
+    })
+    fakta["kode_status"] = _kode_status(peminjaman, fakta["tgl_kembali"])
+
+    # JOIN (bukan LEFT JOIN) ke anggota, buku, dan petugas
+    valid = (
+        (fakta["idx_anggota"] >= 0)
+        & (fakta["idx_buku"] >= 0)
+        & (fakta["idx_petugas"] >= 0)
+    )
+    valid &= _take_kode(buku["idx_judul"], fakta["idx_buku"].to_numpy()) >= 0
+    valid &= _take_kode(buku["idx_klasifikasi"], fakta["idx_buku"].to_numpy()) >= 0
+    return fakta[valid.to_numpy()].reset_index(drop=True)
+
+
+def _kode_status(peminjaman: pd.DataFrame, tgl_kembali: pd.Series) -> np.ndarray:
+    """
+    Kode STATUS_PEMINJAMAN dari kolom enum status_peminjaman yang tersimpan.
+    Nilai kosong/tidak dikenal (atau tabel lama tanpa kolom tersebut)
+    diturunkan dari tgl_kembali: NULL = Sedang dipinjam, terisi = Selesai.
+    """
+    turunan = tgl_kembali.notna().to_numpy().astype(np.int8)
+    if "status_peminjaman" not in peminjaman.columns:
+        return turunan
+    kode = pd.Categorical(peminjaman["status_peminjaman"], categories=STATUS_PEMINJAMAN).codes
+    return np.where(kode >= 0, kode, turunan).astype(np.int8)
+
+
+# ============================================================
+# View gabungan (dibentuk saat dibutuhkan)
+# ============================================================
+
+def _kolom_anggota(model: StarSchema, idx_anggota: np.ndarray) -> dict:
+    """Kolom anggota + program studi + fakultas untuk posisi anggota tertentu."""
+    ang = model.anggota
+    idx_prodi = ang["idx_prodi"].to_numpy()[idx_anggota]
+    idx_fak = _take_kode(model.prodi["idx_fakultas"], idx_prodi)
+    return {
+        "id_anggota": ang["id_anggota"].to_numpy()[idx_anggota],
+        "no_identitas": ang["no_identitas"].to_numpy()[idx_anggota],
+        "status_anggota": ang["status_anggota"].to_numpy()[idx_anggota],
+        "nama_anggota": ang["nama_anggota"].to_numpy()[idx_anggota],
+        "email": ang["email"].to_numpy()[idx_anggota],
+        "nama_prodi": _take(model.prodi["nama_prodi"], idx_prodi),
+        "jenjang": _take(model.prodi["jenjang"], idx_prodi),
+        "nama_fakultas": _take(model.fakultas["nama_fakultas"], idx_fak),
+    }
+
+
+def view_peminjaman_detail(model: StarSchema) -> pd.DataFrame:
+    """
+    Setara hasil JOIN peminjaman + anggota + prodi + fakultas + buku + judul
+    + klasifikasi + petugas (kolom sama seperti query lama di db.py).
+    """
+    f = model.fakta
+    idx_buku = f["idx_buku"].to_numpy()
+    idx_petugas = f["idx_petugas"].to_numpy()
+    buku = model.buku
+    idx_judul = buku["idx_judul"].to_numpy()[idx_buku]
+    idx_klas = buku["idx_klasifikasi"].to_numpy()[idx_buku]
+
+    kolom = {
+        "id_peminjaman": f["id_peminjaman"].to_numpy(),
+        "tgl_pinjam": f["tgl_pinjam"].to_numpy(),
+        "tgl_kembali": f["tgl_kembali"].to_numpy(),
+        "durasi_peminjaman": f["durasi_peminjaman"].to_numpy(),
+        "denda_buku": f["denda_buku"].to_numpy(),
+        "status_peminjaman": np.asarray(STATUS_PEMINJAMAN, dtype=object)[f["kode_status"].to_numpy()],
+    }
+    kolom.update(_kolom_anggota(model, f["idx_anggota"].to_numpy()))
+    kolom.update({
+        "id_buku": buku["id_buku"].to_numpy()[idx_buku],
+        "id_judul": model.judul["id_judul"].to_numpy()[idx_judul],
+        "judul": model.judul["judul"].to_numpy()[idx_judul],
+        "kategori_buku": model.klasifikasi["kategori_buku"].to_numpy()[idx_klas],
+        "tahun_terbit": buku["tahun_terbit"].to_numpy()[idx_buku],
+        "isbn": buku["isbn"].to_numpy()[idx_buku],
+        "status_buku": buku["status_buku"].to_numpy()[idx_buku],
+        "eksemplar": buku["eksemplar"].to_numpy()[idx_buku],
+        "id_petugas": model.petugas["id_petugas"].to_numpy()[idx_petugas],
+        "nama_petugas": model.petugas["nama_petugas"].to_numpy()[idx_petugas],
+    })
+    return pd.DataFrame(kolom)
+
+
+def view_anggota(model: StarSchema) -> pd.DataFrame:
+    """Setara anggota LEFT JOIN program_studi LEFT JOIN fakultas."""
+    return pd.DataFrame(_kolom_anggota(model, np.arange(len(model.anggota))))
+
+
+def view_buku(model: StarSchema) -> pd.DataFrame:
+    """Setara query koleksi buku (judul, klasifikasi, kode_pengarang, dst.)."""
+    buku = model.buku
+    idx_judul = buku["idx_judul"].to_numpy()
+    idx_klas = buku["idx_klasifikasi"].to_numpy()
+    valid = (idx_judul >= 0) & (idx_klas >= 0)
+    pos = np.flatnonzero(valid)
+    idx_judul = idx_judul[pos]
+    idx_klas = idx_klas[pos]
+    return pd.DataFrame({
+        "id_buku": buku["id_buku"].to_numpy()[pos],
+        "kode_judul": model.judul["kode_judul"].to_numpy()[idx_judul],
+        "judul": model.judul["judul"].to_numpy()[idx_judul],
+        "kode_klasifikasi": model.klasifikasi["kode_klasifikasi"].to_numpy()[idx_klas],
+        "kategori_buku": model.klasifikasi["kategori_buku"].to_numpy()[idx_klas],
+        "kode_pengarang": buku["kode_pengarang"].to_numpy()[pos],
+        "tahun_terbit": buku["tahun_terbit"].to_numpy()[pos],
+        "isbn": buku["isbn"].to_numpy()[pos],
+        "status_buku": buku["status_buku"].to_numpy()[pos],
+        "eksemplar": buku["eksemplar"].to_numpy()[pos],
+    })
+
+
+def view_buku_pengarang(model: StarSchema) -> pd.DataFrame:
+    """Setara relasi buku_pengarang JOIN buku, judul, dan pengarang."""
+    bp = model.buku_pengarang
+    idx_buku = bp["idx_buku"].to_numpy()
+    idx_peng = bp["idx_pengarang"].to_numpy()
+    idx_judul = _take_kode(model.buku["idx_judul"], idx_buku)
+    pos = np.flatnonzero((idx_buku >= 0) & (idx_peng >= 0) & (idx_judul >= 0))
+    idx_judul = idx_judul[pos]
+    return pd.DataFrame({
+        "id_buku_pengarang": bp["id_buku_pengarang"].to_numpy()[pos],
+        "id_buku": bp["id_buku"].to_numpy()[pos],
+        "id_pengarang": bp["id_pengarang"].to_numpy()[pos],
+        "urutan_pengarang": bp["urutan_pengarang"].to_numpy()[pos],
+        "judul": model.judul["judul"].to_numpy()[idx_judul],
+        "nama_pengarang": model.pengarang["nama_pengarang"].to_numpy()[idx_peng[pos]],
+    })
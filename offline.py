@@ -0,0 +1,286 @@
+"""
+offline.py
+Mode offline: dashboard berjalan tanpa server MySQL, memakai file dump
+mysqldump yang ikut di repo (seperlima_0000.sql).
+
+Catatan:
+- Dump dibaca secara streaming (baris per baris) dengan encoding yang
+  dideteksi dari BOM (UTF-16 LE/BE, UTF-8), sehingga dump besar tidak perlu
+  dimuat utuh ke memori. Parser mengenali CREATE TABLE (nama & tipe kolom)
+  dan INSERT multi-baris `VALUES (...),(...)` termasuk escape string MySQL.
+  Seperti keluaran mysqldump, satu pernyataan diasumsikan berakhir dengan
+  ';' di akhir baris (newline di dalam string selalu di-escape).
+- Hasil parse disimpan sebagai Parquet per tabel (penyimpanan kolom lokal)
+  bersama manifest berisi SHA-256 dump; dump hanya di-parse ulang bila
+  isinya berubah.
+- Query loader db.py dijalankan oleh DuckDB di atas file Parquet tersebut
+  (placeholder %s diterjemahkan ke ?), sehingga semua loader dan query
+  status tetap memakai SQL yang sama dengan jalur MySQL. Kolom virtual
+  id_buku_terbuka (status.py) disediakan lewat view.
+- Aktif bila pengaturan `offline` diisi: "1"/"true" memakai dump bawaan,
+  atau path ke file dump lain. Semua tenant membaca dump yang sama dan
+  mode ini hanya-baca.
+
+Contoh:
+    SEPERLIMA_OFFLINE=1 streamlit run app.py
+    python offline.py --bangun            # parse dump ke .cache/offline
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from config import get_setting
+
+try:
+    import duckdb
+except ImportError:  # dependensi opsional
+    duckdb = None
+
+DUMP_BAWAAN = Path(__file__).resolve().parent / "seperlima_0000.sql"
+FOLDER_BAWAAN = Path(__file__).resolve().parent / ".cache" / "offline"
+
+_NILAI_BENAR = ("1", "true", "ya", "yes", "on")
+
+# Tipe kolom MySQL (kata pertama definisi) -> jenis konversi
+_TIPE_INTEGER = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint", "year"}
+_TIPE_PECAHAN = {"decimal", "numeric", "float", "double", "real"}
+_TIPE_WAKTU = {"date", "datetime", "timestamp"}
+
+_RE_CREATE = re.compile(r"CREATE TABLE `([^`]+)`")
+_RE_KOLOM = re.compile(r"^\s*`([^`]+)`\s+(\w+)")
+_RE_INSERT = re.compile(r"INSERT INTO `([^`]+)`\s*(?:\(([^)]*)\))?\s*VALUES\s*", re.IGNORECASE)
+_RE_TOKEN = re.compile(
+    r"""
+    '((?:[^'\\]|\\.|'')*)'      # string ber-quote
+    | (NULL)\b                  # NULL
+    | ([^,()'\s]+)              # angka / literal lain
+    | ([(),])                   # pemisah
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_RE_ESCAPE = re.compile(r"\\(.)|''", re.DOTALL)
+_ESCAPE = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+
+
+def sumber_dump() -> Path | None:
+    """Path dump untuk mode offline, atau None bila mode offline tidak aktif."""
+    nilai = get_setting("offline", None)
+    if not nilai:
+        return None
+    teks = str(nilai).strip()
+    if teks.lower() in _NILAI_BENAR:
+        return DUMP_BAWAAN
+    if teks.lower() in ("0", "false", "tidak", "no", "off"):
+        return None
+    return Path(teks)
+
+
+def mode_offline() -> bool:
+    """True bila loader db.py membaca dari dump lokal, bukan MySQL."""
+    return sumber_dump() is not None
+
+
+def _encoding(path: Path) -> str:
+    with open(path, "rb") as f:
+        awal = f.read(4)
+    if awal.startswith(codecs.BOM_UTF16_LE) or awal.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+    if awal.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    return "utf-8"
+
+
+def sidik_dump(path: Path) -> str:
+    """SHA-256 isi dump (dibaca per blok)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for blok in iter(lambda: f.read(1 << 20), b""):
+            h.update(blok)
+    return h.hexdigest()
+
+
+def _pernyataan(path: Path):
+    """Pernyataan SQL lengkap dari dump, dibaca streaming baris per baris."""
+    sisa: list[str] = []
+    with open(path, encoding=_encoding(path), newline="") as f:
+        for baris in f:
+            if not sisa and (baris.startswith("--") or not baris.strip()):
+                continue
+            sisa.append(baris)
+            if baris.rstrip().endswith(";"):
+                yield "".join(sisa)
+                sisa = []
+
+
+def _buka_escape(teks: str) -> str:
+    return _RE_ESCAPE.sub(lambda m: "'" if m.group(0) == "''" else _ESCAPE.get(m.group(1), m.group(1)), teks)
+
+
+def _baris_values(teks: str):
+    """Tuple nilai (str/None) dari bagian VALUES (...),(...) sebuah INSERT."""
+    baris: list | None = None
+    for m in _RE_TOKEN.finditer(teks):
+        string, null, literal, pemisah = m.groups()
+        if pemisah == "(":
+            baris = []
+        elif pemisah == ")":
+            yield baris
+            baris = None
+        elif baris is None or pemisah == ",":
+            continue
+        elif string is not None:
+            baris.append(_buka_escape(string))
+        elif null:
+            baris.append(None)
+        else:
+            baris.append(literal)
+
+
+def parse_dump(path: Path) -> dict[str, pd.DataFrame]:
+    """Semua tabel dalam dump sebagai DataFrame bertipe sesuai CREATE TABLE."""
+    skema: dict[str, list[tuple[str, str]]] = {}
+    data: dict[str, dict[str, list]] = {}
+    for sql in _pernyataan(path):
+        awal = sql.lstrip()
+        if awal.startswith("CREATE TABLE"):
+            nama = _RE_CREATE.search(awal).group(1)
+            skema[nama] = [
+                (m.group(1), m.group(2).lower())
+                for m in map(_RE_KOLOM.match, awal.splitlines()[1:])
+                if m
+            ]
+            data[nama] = {k: [] for k, _ in skema[nama]}
+        elif awal.startswith("INSERT"):
+            m = _RE_INSERT.match(awal)
+            nama = m.group(1)
+            kolom = (
+                [k.strip(" `") for k in m.group(2).split(",")]
+                if m.group(2)
+                else [k for k, _ in skema[nama]]
+            )
+            tujuan = [data[nama][k] for k in kolom]
+            for nilai in _baris_values(awal[m.end():]):
+                for daftar, v in zip(tujuan, nilai):
+                    daftar.append(v)
+            # kolom yang tidak disebut di INSERT bernilai NULL
+            panjang = max(len(d) for d in data[nama].values())
+            for d in data[nama].values():
+                d.extend([None] * (panjang - len(d)))
+
+    return {nama: _bentuk_tabel(data[nama], skema[nama]) for nama in skema}
+
+
+def _bentuk_tabel(data: dict[str, list], kolom: list[tuple[str, str]]) -> pd.DataFrame:
+    df = {}
+    for nama, tipe in kolom:
+        seri = pd.Series(data[nama], dtype=object)
+        if tipe in _TIPE_INTEGER:
+            seri = pd.to_numeric(seri)
+            df[nama] = seri.astype("int64") if seri.notna().all() else seri.astype("float64")
+        elif tipe in _TIPE_PECAHAN:
+            df[nama] = pd.to_numeric(seri).astype("float64")
+        elif tipe in _TIPE_WAKTU:
+            df[nama] = pd.to_datetime(seri, errors="coerce")
+        else:
+            df[nama] = seri.astype("str").where(seri.notna(), None)
+    return pd.DataFrame(df)
+
+
+def bangun_penyimpanan(dump: Path, folder: Path) -> Path:
+    """
+    Memastikan folder berisi Parquet per tabel untuk isi dump saat ini;
+    parse ulang hanya bila SHA-256 dump berbeda dari manifest.
+    """
+    sidik = sidik_dump(dump)
+    manifest = folder / "manifest.json"
+    if manifest.exists():
+        isi = json.loads(manifest.read_text())
+        if isi.get("sha256") == sidik and all((folder / f"{t}.parquet").exists() for t in isi["tabel"]):
+            return folder
+
+    folder.mkdir(parents=True, exist_ok=True)
+    tabel = parse_dump(dump)
+    for nama, df in tabel.items():
+        df.to_parquet(folder / f"{nama}.parquet", index=False)
+    manifest.write_text(json.dumps({"sumber": str(dump), "sha256": sidik, "tabel": sorted(tabel)}, indent=2))
+    return folder
+
+
+class KoneksiOffline:
+    """Koneksi baca ke penyimpanan Parquet lewat DuckDB (satu cursor per query)."""
+
+    def __init__(self, folder: Path):
+        if duckdb is None:
+            raise RuntimeError("Mode offline membutuhkan paket duckdb.")
+        self.folder = folder
+        self.kunci = threading.Lock()
+        self.db = duckdb.connect(database=":memory:")
+        tabel = json.loads((folder / "manifest.json").read_text())["tabel"]
+        for nama in tabel:
+            sumber = f"read_parquet('{(folder / f'{nama}.parquet').as_posix()}')"
+            if nama == "peminjaman":
+                # kolom virtual id_buku_terbuka (lihat status.INDEKS_STATUS)
+                sumber = (
+                    "(SELECT *, CASE WHEN status_peminjaman = 'Sedang dipinjam' "
+                    f"THEN id_buku END AS id_buku_terbuka FROM {sumber})"
+                )
+            self.db.execute(f'CREATE VIEW "{nama}" AS SELECT * FROM {sumber}')
+
+    def frame(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """Menjalankan query bergaya MySQL (%s) dan mengembalikan DataFrame."""
+        sql = re.sub(r"INTERVAL\s+%s", "INTERVAL (%s)", sql).replace("%s", "?")
+        with self.kunci:
+            cur = self.db.cursor()
+        try:
+            return cur.execute(sql, list(params or ())).df()
+        finally:
+            cur.close()
+
+    def close(self) -> None:
+        # koneksi dipakai bersama; close() dari pemanggil diabaikan
+        pass
+
+
+@st.cache_resource
+def _koneksi(dump: str, folder: str, versi: tuple) -> KoneksiOffline:
+    return KoneksiOffline(bangun_penyimpanan(Path(dump), Path(folder)))
+
+
+def koneksi_offline() -> KoneksiOffline:
+    """
+    Koneksi offline untuk dump aktif. Bila waktu ubah/ukuran dump berubah,
+    koneksi dibuat ulang dan SHA-256 dicek terhadap manifest.
+    """
+    dump = sumber_dump()
+    folder = Path(get_setting("offline_dir", FOLDER_BAWAAN))
+    info = dump.stat()
+    return _koneksi(str(dump), str(folder), (info.st_mtime_ns, info.st_size))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bangun", action="store_true", help="parse dump ke penyimpanan Parquet (bila berubah)")
+    parser.add_argument("--dump", default=str(DUMP_BAWAAN), help="file dump mysqldump")
+    parser.add_argument("--folder", default=str(FOLDER_BAWAAN), help="folder penyimpanan Parquet")
+    args = parser.parse_args()
+
+    if args.bangun:
+        folder = bangun_penyimpanan(Path(args.dump), Path(args.folder))
+        for nama in json.loads((folder / "manifest.json").read_text())["tabel"]:
+            print(f"{nama:<20}{len(pd.read_parquet(folder / f'{nama}.parquet')):>10} baris")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+status.py
+Query status peminjaman langsung ke MySQL memakai kolom enum
+peminjaman.status_peminjaman ('Sedang dipinjam', 'Selesai', 'Hilang', 'Rusak').
+
+Catatan:
+- Filter dan pengelompokan selalu pada kolom enum yang tersimpan (bukan
+  CASE WHEN tgl_kembali IS NULL per baris), sehingga MySQL bisa memakai indeks.
+- INDEKS_STATUS berisi DDL pendukung:
+  * indeks gabungan (status_peminjaman, tgl_pinjam) untuk rekap per status
+    dan pencarian peminjaman terbuka yang melewati batas waktu (range scan);
+  * indeks (tgl_kembali, tgl_pinjam) untuk peminjaman terbuka: kondisi
+    tgl_kembali IS NULL memakai akses ref pada kolom pertama (setara indeks
+    atas ekspresi "tgl_kembali IS NULL"), lalu range pada tgl_pinjam
+    (dipakai terlambat.py);
+  * kolom virtual id_buku_terbuka (id_buku hanya untuk peminjaman yang masih
+    berjalan, selain itu NULL) beserta indeksnya, untuk cek "buku ini sedang
+    dipinjam?" tanpa memindai riwayat peminjaman.
+  DDL dipasang sekali oleh admin: `python status.py --pasang-indeks`.
+- Hasil query di-cache singkat (TTL) karena status berubah sepanjang hari.
+  Query dijalankan lewat db.baca_sql (replika, batas waktu, pemutus sirkuit);
+  DDL indeks selalu ke server utama.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from db import baca_sql, get_connection
+from model import STATUS_PEMINJAMAN
+from tenant import per_tenant
+
+# Masa pinjam standar (hari); lewat dari ini peminjaman terbuka dianggap terlambat
+BATAS_PINJAM_HARI = 7
+
+# Umur cache hasil query status (detik)
+TTL_STATUS = 60
+
+# (nama indeks/kolom, DDL) dipasang berurutan
+INDEKS_STATUS = [
+    (
+        "idx_peminjaman_status_tgl",
+        "ALTER TABLE peminjaman ADD INDEX idx_peminjaman_status_tgl (status_peminjaman, tgl_pinjam)",
+    ),
+    (
+        "idx_peminjaman_terbuka",
+        "ALTER TABLE peminjaman ADD INDEX idx_peminjaman_terbuka (tgl_kembali, tgl_pinjam)",
+    ),
+    (
+        "id_buku_terbuka",
+        "ALTER TABLE peminjaman ADD COLUMN id_buku_terbuka INT AS "
+        "(IF(status_peminjaman = 'Sedang dipinjam', id_buku, NULL)) VIRTUAL",
+    ),
+    (
+        "idx_peminjaman_buku_terbuka",
+        "ALTER TABLE peminjaman ADD INDEX idx_peminjaman_buku_terbuka (id_buku_terbuka)",
+    ),
+]
+
+
+def _query(sql: str, params: tuple = (), cadangan: str | None = None) -> pd.DataFrame:
+    return baca_sql(sql, params, cadangan=cadangan)
+
+
+def pasang_indeks_status(conn) -> list[str]:
+    """Memasang DDL INDEKS_STATUS yang belum ada; mengembalikan nama yang dipasang."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT index_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'peminjaman'
+        UNION
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'peminjaman'
+        """
+    )
+    sudah_ada = {baris[0] for baris in cur.fetchall()}
+    dipasang = []
+    for nama, ddl in INDEKS_STATUS:
+        if nama not in sudah_ada:
+            cur.execute(ddl)
+            dipasang.append(nama)
+    cur.close()
+    return dipasang
+
+
+@per_tenant(st.cache_data(ttl=TTL_STATUS))
+def rekap_status(start_date: date | None = None, end_date: date | None = None) -> pd.DataFrame:
+    """
+    Jumlah peminjaman dan total denda per status_peminjaman (semua status
+    enum selalu muncul, termasuk yang berjumlah 0).
+    """
+    sql = "SELECT status_peminjaman, COUNT(*) AS jumlah, COALESCE(SUM(denda_buku), 0) AS total_denda FROM peminjaman"
+    params: tuple = ()
+    if start_date is not None and end_date is not None:
+        sql += " WHERE tgl_pinjam >= %s AND tgl_pinjam < %s + INTERVAL 1 DAY"
+        params = (start_date, end_date)
+    sql += " GROUP BY status_peminjaman"
+    hasil = _query(sql, params, cadangan="rekap_status" if not params else None).set_index("status_peminjaman")
+    return (
+        hasil.reindex(STATUS_PEMINJAMAN, fill_value=0)
+        .rename_axis("status_peminjaman")
+        .reset_index()
+        .astype({"jumlah": "int64", "total_denda": "int64"})
+    )
+
+
+@per_tenant(st.cache_data(ttl=TTL_STATUS))
+def jumlah_terlambat(masa_pinjam_hari: int = BATAS_PINJAM_HARI) -> int:
+    """
+    Jumlah peminjaman terbuka (belum kembali) yang dipinjam sebelum
+    CURDATE() - `masa_pinjam_hari` hari; predikat sama dengan
+    terlambat._QUERY_TERBUKA, sehingga kartu Ringkasan cocok dengan monitor
+    keterlambatan. Batas dihitung di Python (awal hari ini) agar juga
+    berlaku di mode offline.
+    """
+    batas = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=int(masa_pinjam_hari))
+    hasil = _query(
+        "SELECT COUNT(*) AS jumlah FROM peminjaman "
+        "WHERE tgl_kembali IS NULL AND tgl_pinjam < %s AND status_peminjaman = 'Sedang dipinjam'",
+        (batas,),
+        cadangan=f"jumlah_terlambat:{int(masa_pinjam_hari)}",
+    )
+    return int(hasil["jumlah"].iloc[0])
+
+
+@per_tenant(st.cache_data(ttl=TTL_STATUS))
+def daftar_per_status(status: str, batas: int = 500) -> pd.DataFrame:
+    """
+    Peminjaman dengan status tertentu (terbaru dulu, maks. `batas` baris),
+    dilengkapi nama anggota dan judul buku.
+    """
+    if status not in STATUS_PEMINJAMAN:
+        raise ValueError(f"Status peminjaman tidak dikenal: {status!r}")
+    return _query(
+        """
+        SELECT p.id_peminjaman, p.tgl_pinjam, p.tgl_kembali, p.denda_buku,
+               a.nama_anggota, j.judul, p.id_buku
+        FROM peminjaman p
+        JOIN anggota a ON p.id_anggota = a.id_anggota
+        JOIN buku b ON p.id_buku = b.id_buku
+        JOIN judul j ON b.id_judul = j.id_judul
+        WHERE p.status_peminjaman = %s
+        ORDER BY p.tgl_pinjam DESC
+        LIMIT %s
+        """,
+        (status, int(batas)),
+        cadangan=f"daftar_per_status:{status}:{int(batas)}",
+    )
+
+
+@per_tenant(st.cache_data(ttl=TTL_STATUS))
+def buku_sedang_dipinjam() -> set:
+    """id_buku yang saat ini sedang dipinjam (dari indeks kolom id_buku_terbuka)."""
+    hasil = _query(
+        "SELECT DISTINCT id_buku_terbuka FROM peminjaman WHERE id_buku_terbuka IS NOT NULL",
+        cadangan="buku_sedang_dipinjam",
+    )
+    return set(hasil["id_buku_terbuka"].tolist())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pasang-indeks", action="store_true", help="pasang DDL indeks/kolom status yang belum ada")
+    args = parser.parse_args()
+
+    if args.pasang_indeks:
+        conn = get_connection(tulis=True)
+        dipasang = pasang_indeks_status(conn)
+        conn.close()
+        print("Dipasang: " + (", ".join(dipasang) if dipasang else "(semua sudah ada)"))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
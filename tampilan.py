@@ -0,0 +1,79 @@
+"""
+tampilan.py
+Pipeline filter tanpa salinan antara untuk tabel yang ditampilkan halaman
+(Buku, Anggota).
+
+Catatan:
+- Semua predikat (pencarian teks, filter nilai sama) dievaluasi sebagai mask
+  boolean numpy atas kolom DataFrame sumber yang di-cache, lalu digabung
+  menjadi SATU array posisi baris.
+- DataFrame hasil dibentuk sekali (iloc baris + kolom sekaligus) hanya untuk
+  baris dan kolom yang ditampilkan, bukan copy -> filter -> reorder kolom ->
+  filter berulang yang masing-masing mengalokasikan frame baru.
+- Tabel panjang (monitor keterlambatan, eksemplar tidak dipinjam) ditampilkan
+  per halaman berukuran UKURAN_HALAMAN baris.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from engine import SEMUA
+
+# Baris per halaman untuk tabel panjang
+UKURAN_HALAMAN = 25
+
+
+def posisi_cocok(
+    df: pd.DataFrame,
+    cari: dict[str, str] | None = None,
+    sama: dict[str, object] | None = None,
+) -> np.ndarray | None:
+    """
+    Posisi baris yang lolos semua predikat:
+    - cari {kolom: teks}: kolom mengandung teks (tanpa beda huruf besar/kecil);
+    - sama {kolom: nilai}: kolom sama dengan nilai ("(Semua)" = tanpa filter).
+    Teks kosong/"(Semua)" diabaikan. None berarti semua baris (tanpa filter).
+    """
+    mask = None
+    for kolom, teks in (cari or {}).items():
+        if teks:
+            cocok = df[kolom].str.contains(teks, case=False, na=False).to_numpy()
+            mask = cocok if mask is None else mask & cocok
+    for kolom, nilai in (sama or {}).items():
+        if nilai != SEMUA:
+            cocok = df[kolom].to_numpy() == nilai
+            mask = cocok if mask is None else mask & cocok
+    return None if mask is None else np.flatnonzero(mask)
+
+
+def bentuk_tampilan(
+    df: pd.DataFrame,
+    posisi: np.ndarray | None = None,
+    kolom: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    DataFrame untuk ditampilkan: baris `posisi` (None = semua) dan `kolom`
+    yang ada (urutan mengikuti daftar), dibentuk dengan satu kali iloc.
+    Tanpa filter baris maupun kolom, DataFrame sumber dikembalikan apa adanya.
+    """
+    idx_kolom = None
+    if kolom is not None:
+        ada = [c for c in kolom if c in df.columns]
+        if ada != list(df.columns):
+            idx_kolom = df.columns.get_indexer(ada)
+    if posisi is None and idx_kolom is None:
+        return df
+    baris = slice(None) if posisi is None else posisi
+    return df.iloc[baris, slice(None) if idx_kolom is None else idx_kolom]
+
+
+def halaman(df: pd.DataFrame, nomor: int, ukuran: int = UKURAN_HALAMAN) -> pd.DataFrame:
+    """Potongan DataFrame untuk halaman ke-`nomor` (mulai 1)."""
+    awal = (max(nomor, 1) - 1) * ukuran
+    return df.iloc[awal:awal + ukuran]
+
+
+def jumlah_halaman(n: int, ukuran: int = UKURAN_HALAMAN) -> int:
+    return max(1, -(-n // ukuran))
@@ -0,0 +1,103 @@
+"""
+tenant.py
+Dukungan beberapa perpustakaan cabang (tenant) dalam satu proses Streamlit.
+
+Catatan:
+- Daftar tenant diambil dari pengaturan `tenants` (config.py):
+  * st.secrets tabel [tenants.<nama>] berisi parameter koneksi yang berbeda
+    dari default (host, database, user, password, ...);
+  * atau teks "pusat,cabang_a" (mis. SEPERLIMA_TENANTS): setiap nama menjadi
+    nama database pada server default.
+  Tanpa pengaturan, hanya ada satu tenant "seperlima" (perilaku lama).
+- Tenant aktif per sesi disimpan di st.session_state["tenant"].
+- `per_tenant` membungkus st.cache_resource / st.cache_data sehingga kunci
+  cache selalu memuat nama tenant: model, indeks, dan hasil query setiap
+  cabang terpisah, tetapi tetap dipakai bersama oleh sesi pada cabang yang sama.
+  Selama fungsi yang di-cache berjalan, tenant_aktif() mengembalikan tenant
+  kunci cache tersebut (contextvar), sehingga `loader.untuk_tenant(nama)`
+  dari sesi cabang lain tetap memuat data cabang `nama`.
+"""
+
+from __future__ import annotations
+
+import functools
+from contextvars import ContextVar
+
+import streamlit as st
+
+from config import get_setting
+
+TENANT_DEFAULT = "seperlima"
+
+_KUNCI_SESI = "tenant"
+
+# Tenant yang sedang dimuat oleh fungsi per_tenant (menimpa tenant sesi)
+_tenant_dimuat: ContextVar[str | None] = ContextVar("tenant_dimuat", default=None)
+
+
+def daftar_tenant() -> dict[str, dict]:
+    """{nama tenant: parameter koneksi tambahan} sesuai pengaturan `tenants`."""
+    nilai = get_setting("tenants", None)
+    if not nilai:
+        return {TENANT_DEFAULT: {}}
+    if isinstance(nilai, str):
+        return {nama.strip(): {"database": nama.strip()} for nama in nilai.split(",") if nama.strip()}
+    return {str(nama): dict(param) for nama, param in dict(nilai).items()}
+
+
+def tenant_aktif() -> str:
+    """
+    Nama tenant untuk sesi ini (default: tenant pertama). Di dalam fungsi
+    per_tenant: tenant kunci cache yang sedang dimuat.
+    """
+    dimuat = _tenant_dimuat.get()
+    if dimuat is not None:
+        return dimuat
+    tenant = daftar_tenant()
+    try:
+        pilihan = st.session_state.get(_KUNCI_SESI)
+    except Exception:
+        # di luar sesi Streamlit (skrip/benchmark)
+        pilihan = None
+    return pilihan if pilihan in tenant else next(iter(tenant))
+
+
+def pilih_tenant(nama: str) -> None:
+    """Mengganti tenant aktif untuk sesi ini."""
+    if nama not in daftar_tenant():
+        raise ValueError(f"Tenant tidak dikenal: {nama!r}")
+    st.session_state[_KUNCI_SESI] = nama
+
+
+def per_tenant(cache=st.cache_resource):
+    """
+    Dekorator: seperti `cache` (st.cache_resource atau st.cache_data(...)),
+    tetapi nama tenant aktif selalu menjadi bagian kunci cache.
+    `.untuk_tenant(nama, ...)` memanggil/memuat cache tenant tertentu dan
+    `.untuk_tenant.clear(nama)` membuang cache tenant itu saja.
+    """
+    def dekorator(fungsi):
+        def _inti(tenant: str, *args, **kwargs):
+            # fungsi dan loader lain yang dipanggilnya membaca tenant ini
+            token = _tenant_dimuat.set(tenant)
+            try:
+                return fungsi(*args, **kwargs)
+            finally:
+                _tenant_dimuat.reset(token)
+
+        # nama & sumber fungsi asli dipakai Streamlit untuk membedakan cache
+        _inti.__module__ = fungsi.__module__
+        _inti.__name__ = fungsi.__name__
+        _inti.__qualname__ = fungsi.__qualname__
+        _inti.__wrapped__ = fungsi
+        tersimpan = cache(_inti)
+
+        @functools.wraps(fungsi)
+        def pembungkus(*args, **kwargs):
+            return tersimpan(tenant_aktif(), *args, **kwargs)
+
+        pembungkus.clear = tersimpan.clear
+        pembungkus.untuk_tenant = tersimpan
+        return pembungkus
+
+    return dekorator
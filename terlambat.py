@@ -0,0 +1,132 @@
+"""
+terlambat.py
+Pemantauan peminjaman terlambat (masih dipinjam melewati masa pinjam).
+
+Catatan:
+- Hanya peminjaman terbuka yang dibaca dari MySQL: WHERE tgl_kembali IS NULL
+  AND tgl_pinjam < batas. Dengan indeks (tgl_kembali, tgl_pinjam) (lihat
+  status.INDEKS_STATUS) kondisi IS NULL menjadi akses ref pada kolom pertama
+  dan tgl_pinjam menjadi range, sehingga biaya query tidak bergantung pada
+  banyaknya riwayat peminjaman yang sudah selesai.
+- Hari keterlambatan dan proyeksi denda dihitung vektor (numpy) menurut
+  kebijakan pinjam yang bisa diatur (config.py):
+  masa_pinjam_hari, denda_per_hari, denda_maks (0 = tanpa batas).
+- Daftar kerja dibagi per halaman (tampilan.halaman) dan bisa difilter per fakultas / petugas;
+  halaman monitor memuat ulang data setiap `refresh_terlambat` detik.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import get_setting
+from db import baca_sql
+from status import BATAS_PINJAM_HARI
+from tenant import per_tenant
+
+# Tarif denda default (rupiah per hari keterlambatan), sesuai data contoh
+DENDA_PER_HARI = 2_000
+
+# Interval muat ulang monitor (detik)
+REFRESH_DETIK = 60
+
+_QUERY_TERBUKA = """
+    SELECT
+        p.id_peminjaman,
+        p.tgl_pinjam,
+        a.nama_anggota,
+        a.email,
+        j.judul,
+        p.id_buku,
+        f.nama_fakultas,
+        pt.nama_petugas
+    FROM peminjaman p
+    JOIN anggota a ON p.id_anggota = a.id_anggota
+    LEFT JOIN program_studi ps ON a.id_prodi = ps.id_prodi
+    LEFT JOIN fakultas f ON ps.id_fakultas = f.id_fakultas
+    JOIN buku b ON p.id_buku = b.id_buku
+    JOIN judul j ON b.id_judul = j.id_judul
+    JOIN petugas pt ON p.id_petugas = pt.id_petugas
+    WHERE p.tgl_kembali IS NULL
+      AND p.tgl_pinjam < %s
+      AND p.status_peminjaman = 'Sedang dipinjam'
+"""
+
+
+@dataclass(frozen=True)
+class KebijakanPinjam:
+    """Aturan masa pinjam dan denda keterlambatan."""
+
+    masa_pinjam_hari: int = BATAS_PINJAM_HARI
+    denda_per_hari: int = DENDA_PER_HARI
+    denda_maks: int = 0
+
+
+def kebijakan_aktif() -> KebijakanPinjam:
+    """Kebijakan pinjam dari pengaturan (lihat config.py)."""
+    return KebijakanPinjam(
+        masa_pinjam_hari=int(get_setting("masa_pinjam_hari", BATAS_PINJAM_HARI)),
+        denda_per_hari=int(get_setting("denda_per_hari", DENDA_PER_HARI)),
+        denda_maks=int(get_setting("denda_maks", 0)),
+    )
+
+
+def refresh_detik() -> int:
+    """Interval muat ulang monitor keterlambatan (detik)."""
+    return int(get_setting("refresh_terlambat", REFRESH_DETIK))
+
+
+def hitung_keterlambatan(
+    tgl_pinjam,
+    kebijakan: KebijakanPinjam,
+    sekarang: datetime | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (hari_terlambat, proyeksi_denda) int64 untuk array tgl_pinjam.
+    Hari terlambat dihitung per tanggal kalender; belum terlambat = 0.
+    """
+    hari_ini = np.datetime64(sekarang or datetime.now(), "D")
+    tgl = np.asarray(tgl_pinjam, dtype="datetime64[D]")
+    lama = (hari_ini - tgl).astype(np.int64)
+    hari_terlambat = np.maximum(lama - kebijakan.masa_pinjam_hari, 0)
+    denda = hari_terlambat * np.int64(kebijakan.denda_per_hari)
+    if kebijakan.denda_maks > 0:
+        denda = np.minimum(denda, kebijakan.denda_maks)
+    return hari_terlambat, denda
+
+
+@per_tenant(st.cache_data(ttl=refresh_detik()))
+def _peminjaman_terbuka_sebelum(batas: datetime) -> pd.DataFrame:
+    return baca_sql(_QUERY_TERBUKA, (batas,), cadangan="peminjaman_terbuka")
+
+
+def load_terlambat(kebijakan: KebijakanPinjam | None = None, sekarang: datetime | None = None) -> pd.DataFrame:
+    """
+    Peminjaman terbuka yang sudah melewati masa pinjam, beserta kolom
+    hari_terlambat dan proyeksi_denda; urut dari yang paling lama terlambat.
+    """
+    kebijakan = kebijakan or kebijakan_aktif()
+    sekarang = sekarang or datetime.now()
+    # batas dibulatkan ke awal hari agar kunci cache stabil sepanjang hari
+    batas = datetime.combine(sekarang.date(), datetime.min.time()) - timedelta(days=kebijakan.masa_pinjam_hari)
+    df = _peminjaman_terbuka_sebelum(batas).copy()
+    hari, denda = hitung_keterlambatan(df["tgl_pinjam"].to_numpy(), kebijakan, sekarang)
+    df["hari_terlambat"] = hari
+    df["proyeksi_denda"] = denda
+    df = df[df["hari_terlambat"] > 0]
+    return df.sort_values(["hari_terlambat", "id_peminjaman"], ascending=[False, True]).reset_index(drop=True)
+
+
+def ringkasan_terlambat(df: pd.DataFrame, kolom: str) -> pd.DataFrame:
+    """Jumlah peminjaman terlambat dan total proyeksi denda per `kolom`."""
+    return (
+        df.groupby(df[kolom].fillna("(Tidak diketahui)"))
+        .agg(jumlah=("id_peminjaman", "size"), proyeksi_denda=("proyeksi_denda", "sum"))
+        .sort_values("jumlah", ascending=False)
+        .reset_index()
+    )
@@ -0,0 +1,272 @@
+"""
+timeseries.py
+Utilitas pengelompokan waktu (time bucketing) untuk grafik tren peminjaman.
+
+Catatan:
+- Setiap tanggal diubah menjadi kunci integer per periode langsung dari
+  datetime64 (tanpa membuat string per baris dan tanpa df.copy()).
+- Label periode (string) hanya dibuat untuk kunci unik, yaitu O(jumlah periode).
+- Granularitas yang didukung: hari, minggu, bulan, semester, tahun.
+- Karena kunci berurutan tanpa lubang, seri padat, jendela bergulir, dan
+  perbandingan tahun lalu cukup memakai operasi indeks/cumsum NumPy.
+- Seri panjang diturunkan resolusinya dengan LTTB sehingga satu grafik
+  tidak pernah mengirim lebih dari MAKS_TITIK titik ke browser.
+
+Definisi kunci:
+- hari     : jumlah hari sejak 1970-01-01
+- minggu   : nomor minggu (Senin sebagai awal minggu) sejak 1970
+- bulan    : tahun*12 + (bulan-1)
+- semester : semester akademik (Ganjil = Agustus-Januari, Genap = Februari-Juli)
+- tahun    : tahun
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+GRANULARITAS = ["hari", "minggu", "bulan", "semester", "tahun"]
+
+# Batas titik per trace yang dikirim ke browser
+MAKS_TITIK = 400
+
+# Selisih kunci untuk periode yang sama satu tahun sebelumnya
+# (hari memakai 365 dan minggu 52, tahun kabisat diabaikan)
+_LAG_TAHUN = {"hari": 365, "minggu": 52, "bulan": 12, "semester": 2, "tahun": 1}
+
+# 1970-01-01 adalah hari Kamis; +3 menggeser awal minggu ke hari Senin
+_GESER_SENIN = 3
+# Semester ganjil dimulai bulan Agustus (indeks bulan 7, 0 = Januari)
+_AWAL_GANJIL = 7
+
+
+def kunci_waktu(tgl, granularitas: str = "bulan") -> np.ndarray:
+    """
+    Kunci integer per periode untuk array datetime64 (tanpa NaT).
+    Lihat definisi kunci di docstring modul.
+    """
+    tgl = np.asarray(tgl)
+    if granularitas == "hari":
+        return tgl.astype("datetime64[D]").astype(np.int64)
+    if granularitas == "minggu":
+        return (tgl.astype("datetime64[D]").astype(np.int64) + _GESER_SENIN) // 7
+
+    bulan = tgl.astype("datetime64[M]").astype(np.int64) + 1970 * 12
+    if granularitas == "bulan":
+        return bulan
+    if granularitas == "semester":
+        return (bulan - _AWAL_GANJIL) // 6
+    if granularitas == "tahun":
+        return bulan // 12
+    raise ValueError(f"Granularitas tidak dikenal: {granularitas!r}")
+
+
+def awal_periode(kunci: np.ndarray, granularitas: str = "bulan") -> np.ndarray:
+    """Tanggal awal (datetime64[D]) dari setiap kunci periode."""
+    kunci = np.asarray(kunci, dtype=np.int64)
+    if granularitas == "hari":
+        return kunci.astype("datetime64[D]")
+    if granularitas == "minggu":
+        return (kunci * 7 - _GESER_SENIN).astype("datetime64[D]")
+
+    if granularitas == "bulan":
+        bulan = kunci
+    elif granularitas == "semester":
+        bulan = kunci * 6 + _AWAL_GANJIL
+    elif granularitas == "tahun":
+        bulan = kunci * 12
+    else:
+        raise ValueError(f"Granularitas tidak dikenal: {granularitas!r}")
+    return (bulan - 1970 * 12).astype("datetime64[M]").astype("datetime64[D]")
+
+
+def label_periode(kunci: np.ndarray, granularitas: str = "bulan") -> list[str]:
+    """Label teks untuk kunci periode (mis. '2025-01', '2024/2025 Ganjil')."""
+    kunci = np.asarray(kunci, dtype=np.int64)
+    if granularitas == "hari":
+        return [str(d) for d in awal_periode(kunci, "hari")]
+    if granularitas == "minggu":
+        return [f"Minggu {d}" for d in awal_periode(kunci, "minggu")]
+    if granularitas == "bulan":
+        return [f"{k // 12}-{k % 12 + 1:02d}" for k in kunci]
+    if granularitas == "semester":
+        label = []
+        for k in kunci:
+            bulan = k * 6 + _AWAL_GANJIL
+            tahun, idx_bulan = divmod(bulan, 12)
+            if idx_bulan == _AWAL_GANJIL:
+                label.append(f"{tahun}/{tahun + 1} Ganjil")
+            else:
+                label.append(f"{tahun - 1}/{tahun} Genap")
+        return label
+    if granularitas == "tahun":
+        return [str(k) for k in kunci]
+    raise ValueError(f"Granularitas tidak dikenal: {granularitas!r}")
+
+
+def agregat_waktu(
+    df: pd.DataFrame,
+    granularitas: str = "bulan",
+    grup: str | None = None,
+    kolom_tgl: str = "tgl_pinjam",
+) -> pd.DataFrame:
+    """
+    Jumlah baris per periode (dan per nilai kolom `grup` bila diberikan).
+
+    Hasil berkolom: kunci, periode, [grup], jumlah — urut berdasarkan kunci.
+    Baris dengan tanggal atau grup kosong diabaikan (seperti groupby).
+    """
+    tgl = df[kolom_tgl].to_numpy()
+    valid = ~np.isnat(tgl)
+    kunci = kunci_waktu(tgl[valid], granularitas)
+
+    kolom_hasil = ["kunci", "periode"] + ([grup] if grup else []) + ["jumlah"]
+    if kunci.size == 0:
+        return pd.DataFrame(columns=kolom_hasil)
+
+    k_min = kunci.min()
+    offset = kunci - k_min
+
+    if grup is None:
+        jumlah = np.bincount(offset)
+        pos = np.flatnonzero(jumlah)
+        kunci_unik = pos + k_min
+        return pd.DataFrame({
+            "kunci": kunci_unik,
+            "periode": label_periode(kunci_unik, granularitas),
+            "jumlah": jumlah[pos],
+        })
+
+    kode, nilai_grup = pd.factorize(df[grup].to_numpy()[valid], sort=True)
+    ada = kode >= 0
+    n_grup = max(len(nilai_grup), 1)
+    jumlah = np.bincount(offset[ada] * n_grup + kode[ada])
+    pos = np.flatnonzero(jumlah)
+    kunci_unik = pos // n_grup + k_min
+    label = dict(zip(np.unique(kunci_unik), label_periode(np.unique(kunci_unik), granularitas)))
+    return pd.DataFrame({
+        "kunci": kunci_unik,
+        "periode": [label[k] for k in kunci_unik],
+        grup: np.asarray(nilai_grup)[pos % n_grup],
+        "jumlah": jumlah[pos],
+    })
+
+
+def total_per_periode(agregat: pd.DataFrame) -> pd.DataFrame:
+    """Menjumlahkan hasil agregat_waktu per periode (mengabaikan kolom grup)."""
+    if agregat.empty:
+        return agregat[["kunci", "periode", "jumlah"]]
+    return (
+        agregat.groupby(["kunci", "periode"], sort=True)["jumlah"]
+        .sum()
+        .reset_index()
+    )
+
+
+def periode_puncak(agregat: pd.DataFrame) -> pd.Series | None:
+    """Baris periode dengan jumlah tertinggi (periode paling awal bila seri)."""
+    total = total_per_periode(agregat)
+    if total.empty:
+        return None
+    return total.loc[total["jumlah"].idxmax()]
+
+
+# ============================================================
+# Seri padat, jendela bergulir, dan perbandingan tahun lalu
+# ============================================================
+
+def seri_padat(agregat: pd.DataFrame, grup: str | None = None) -> pd.DataFrame:
+    """
+    Mengubah hasil agregat_waktu menjadi tabel lebar: indeks kunci lengkap
+    (periode tanpa transaksi bernilai 0), kolom per nilai grup atau 'jumlah'.
+    """
+    if agregat.empty:
+        return pd.DataFrame()
+    if grup is None:
+        lebar = agregat.set_index("kunci")[["jumlah"]]
+    else:
+        lebar = agregat.pivot(index="kunci", columns=grup, values="jumlah")
+    rentang = np.arange(agregat["kunci"].min(), agregat["kunci"].max() + 1)
+    return lebar.reindex(rentang, fill_value=0).fillna(0).astype(np.int64)
+
+
+def jendela_bergulir(
+    df: pd.DataFrame,
+    jendela: int,
+    grup: str | None = None,
+    kolom_tgl: str = "tgl_pinjam",
+) -> pd.DataFrame:
+    """
+    Jumlah peminjaman dalam `jendela` hari terakhir untuk setiap hari
+    (tabel lebar berindeks kunci hari, lihat seri_padat).
+    """
+    harian = seri_padat(agregat_waktu(df, "hari", grup=grup, kolom_tgl=kolom_tgl), grup)
+    if harian.empty:
+        return harian
+    kumulatif = np.cumsum(harian.to_numpy(), axis=0)
+    bergulir = kumulatif.copy()
+    bergulir[jendela:] -= kumulatif[:-jendela]
+    return pd.DataFrame(bergulir, index=harian.index, columns=harian.columns)
+
+
+def bandingkan_tahun_lalu(df: pd.DataFrame, granularitas: str = "bulan", kolom_tgl: str = "tgl_pinjam") -> pd.DataFrame:
+    """
+    Jumlah per periode beserta jumlah pada periode yang sama tahun sebelumnya.
+    Hasil berkolom: jumlah, tahun_lalu, pertumbuhan_pct (indeks kunci).
+    """
+    padat = seri_padat(agregat_waktu(df, granularitas, kolom_tgl=kolom_tgl))
+    if padat.empty:
+        return pd.DataFrame(columns=["jumlah", "tahun_lalu", "pertumbuhan_pct"])
+    lag = _LAG_TAHUN[granularitas]
+    jumlah = padat["jumlah"].to_numpy()
+    tahun_lalu = np.zeros_like(jumlah)
+    if lag < len(jumlah):
+        tahun_lalu[lag:] = jumlah[:-lag]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pertumbuhan = np.where(tahun_lalu > 0, (jumlah - tahun_lalu) / tahun_lalu * 100, np.nan)
+    return pd.DataFrame(
+        {"jumlah": jumlah, "tahun_lalu": tahun_lalu, "pertumbuhan_pct": pertumbuhan},
+        index=padat.index,
+    )
+
+
+# ============================================================
+# Penurunan resolusi (LTTB)
+# ============================================================
+
+def lttb_indeks(y: np.ndarray, n_keluar: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: memilih n_keluar posisi dari seri y
+    (x dianggap berjarak sama) yang paling mempertahankan bentuk grafik.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_keluar or n_keluar < 3:
+        return np.arange(n)
+
+    batas = np.linspace(1, n - 1, n_keluar - 1).astype(np.int64)
+    indeks = np.empty(n_keluar, dtype=np.int64)
+    indeks[0], indeks[-1] = 0, n - 1
+    a = 0
+    for i in range(n_keluar - 2):
+        awal, akhir = batas[i], batas[i + 1]
+        b_awal = batas[i + 1]
+        b_akhir = batas[i + 2] if i + 2 < len(batas) else n
+        rata_x = (b_awal + b_akhir - 1) / 2
+        rata_y = y[b_awal:b_akhir].mean()
+        x = np.arange(awal, akhir)
+        luas = np.abs((a - rata_x) * (y[awal:akhir] - y[a]) - (a - x) * (rata_y - y[a]))
+        a = awal + int(np.argmax(luas))
+        indeks[i + 1] = a
+    return indeks
+
+
+def turunkan_resolusi(lebar: pd.DataFrame, maks_titik: int = MAKS_TITIK) -> pd.DataFrame:
+    """
+    Memilih maksimal `maks_titik` baris dari tabel lebar. Indeks dipilih LTTB
+    dari total semua kolom, lalu dipakai bersama oleh semua kolom agar area
+    bertumpuk tetap sejajar.
+    """
+    if len(lebar) <= maks_titik:
+        return lebar
+    return lebar.iloc[lttb_indeks(lebar.sum(axis=1).to_numpy(), maks_titik)]
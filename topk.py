@@ -0,0 +1,148 @@
+"""
+topk.py
+Perhitungan top-k judul buku berdasarkan jumlah peminjaman.
+
+Catatan:
+- Penghitungan memakai kode integer (id_judul / posisi judul) dengan
+  np.bincount lalu np.argpartition, bukan groupby + sort atas string judul.
+  Dua judul berbeda dengan teks yang sama tidak lagi tergabung.
+- Untuk filter tanggal/fakultas/kategori, dipakai bucket (bulan, fakultas,
+  kategori) dari kpi.IndeksKpi. Setiap bucket menyimpan daftar (judul, jumlah)
+  terurut menurun, sehingga top-k satu bucket cukup O(k) dan gabungan
+  beberapa bucket O(jumlah pasangan judul-bucket), bukan O(jumlah baris).
+- k bebas; sisa peminjaman di luar top-k bisa ditampilkan sebagai "Lainnya".
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from db import load_model
+from kpi import IndeksKpi, _posisi_segmen, load_indeks_kpi, pilih_bucket
+from memori import daftarkan
+from model import StarSchema
+from tenant import per_tenant, tenant_aktif
+
+LABEL_LAINNYA = "Lainnya"
+
+
+@dataclass
+class IndeksTopK:
+    """Jumlah peminjaman per (bucket, judul), terurut menurun di tiap bucket."""
+
+    id_judul: np.ndarray
+    judul: np.ndarray
+    # per baris peminjaman (urutan sama dengan IndeksKpi)
+    idx_judul: np.ndarray
+    # per bucket (CSR)
+    offset: np.ndarray
+    entri_judul: np.ndarray
+    entri_jumlah: np.ndarray
+
+
+def top_k(jumlah: np.ndarray, k: int) -> np.ndarray:
+    """Kode dengan jumlah terbesar (maks. k, jumlah > 0), urut menurun."""
+    kandidat = np.flatnonzero(jumlah)
+    if len(kandidat) > k:
+        kandidat = kandidat[np.argpartition(-jumlah[kandidat], k - 1)[:k]]
+    return kandidat[np.lexsort((kandidat, -jumlah[kandidat]))]
+
+
+def bangun_indeks_topk(model: StarSchema, indeks: IndeksKpi) -> IndeksTopK:
+    """Menyusun daftar (judul, jumlah) per bucket dari IndeksKpi."""
+    idx_judul = model.buku["idx_judul"].to_numpy()[indeks.idx_buku]
+    n_judul = len(model.judul)
+    kode_bucket = np.repeat(np.arange(len(indeks.offset) - 1), np.diff(indeks.offset))
+
+    pasangan, jumlah = np.unique(kode_bucket.astype(np.int64) * n_judul + idx_judul, return_counts=True)
+    entri_bucket = pasangan // n_judul
+    entri_judul = pasangan % n_judul
+    # urut per bucket, lalu jumlah menurun
+    urutan = np.lexsort((entri_judul, -jumlah, entri_bucket))
+    entri_bucket = entri_bucket[urutan]
+    offset = np.searchsorted(entri_bucket, np.arange(len(indeks.offset)))
+
+    return IndeksTopK(
+        id_judul=model.judul["id_judul"].to_numpy(),
+        judul=model.judul["judul"].to_numpy(),
+        idx_judul=idx_judul,
+        offset=offset,
+        entri_judul=entri_judul[urutan],
+        entri_jumlah=jumlah[urutan],
+    )
+
+
+@per_tenant()
+def load_indeks_topk() -> IndeksTopK:
+    """IndeksTopK untuk model yang sedang dimuat (per tenant, dipakai bersama semua sesi)."""
+    indeks = bangun_indeks_topk(load_model(), load_indeks_kpi())
+    daftarkan(f"indeks_topk [{tenant_aktif()}]", indeks)
+    return indeks
+
+
+def _hasil_top(id_judul, judul, jumlah, total: int, lainnya: bool) -> pd.DataFrame:
+    """DataFrame hasil top-k (+ baris 'Lainnya'); teks judul kembar diberi id."""
+    judul = np.asarray(judul, dtype=object)
+    kembar = pd.Series(judul).duplicated(keep=False).to_numpy()
+    if kembar.any():
+        judul = judul.copy()
+        judul[kembar] = [f"{j} [{i}]" for j, i in zip(judul[kembar], np.asarray(id_judul)[kembar])]
+    hasil = pd.DataFrame({"id_judul": id_judul, "judul": judul, "jumlah": np.asarray(jumlah, dtype=np.int64)})
+    sisa = int(total - hasil["jumlah"].sum())
+    if lainnya and sisa > 0:
+        hasil.loc[len(hasil)] = [-1, LABEL_LAINNYA, sisa]
+    return hasil
+
+
+def top_k_judul(
+    indeks: IndeksKpi,
+    indeks_topk: IndeksTopK,
+    k: int = 5,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    fakultas: str | None = None,
+    kategori: str | None = None,
+    lainnya: bool = False,
+) -> pd.DataFrame:
+    """Top-k judul untuk filter tanggal, fakultas, dan kategori (None = semua)."""
+    bucket_penuh, pos_sebagian = pilih_bucket(indeks, start_date, end_date, fakultas, kategori)
+
+    if len(bucket_penuh) == 1 and len(pos_sebagian) == 0:
+        # satu bucket: daftar terurut sudah tersedia
+        b = bucket_penuh[0]
+        awal = indeks_topk.offset[b]
+        top = indeks_topk.entri_judul[awal:min(awal + k, indeks_topk.offset[b + 1])]
+        jumlah_top = indeks_topk.entri_jumlah[awal:awal + len(top)]
+        total = indeks.offset[b + 1] - indeks.offset[b]
+    else:
+        n_judul = len(indeks_topk.id_judul)
+        pos_entri = _posisi_segmen(indeks_topk.offset, bucket_penuh)
+        jumlah = np.bincount(
+            indeks_topk.entri_judul[pos_entri],
+            weights=indeks_topk.entri_jumlah[pos_entri],
+            minlength=n_judul,
+        ).astype(np.int64)
+        jumlah += np.bincount(indeks_topk.idx_judul[pos_sebagian], minlength=n_judul)
+        top = top_k(jumlah, k)
+        jumlah_top = jumlah[top]
+        total = jumlah.sum()
+
+    return _hasil_top(indeks_topk.id_judul[top], indeks_topk.judul[top], jumlah_top, total, lainnya)
+
+
+def top_k_judul_dari_frame(df: pd.DataFrame, k: int = 5, lainnya: bool = False) -> pd.DataFrame:
+    """Top-k judul dari DataFrame peminjaman apa pun (kolom id_judul & judul)."""
+    id_judul = df["id_judul"].to_numpy()
+    if len(id_judul) == 0:
+        return _hasil_top([], [], [], 0, lainnya)
+    jumlah = np.bincount(id_judul)
+    top = top_k(jumlah, k)
+    # teks judul diambil dari kemunculan pertama setiap id terpilih
+    pos = np.flatnonzero(np.isin(id_judul, top))
+    unik, pertama = np.unique(id_judul[pos], return_index=True)
+    judul = dict(zip(unik, df["judul"].to_numpy()[pos[pertama]]))
+    return _hasil_top(top, [judul[i] for i in top], jumlah[top], len(id_judul), lainnya)
@@ -0,0 +1,180 @@
+"""
+utilisasi.py
+Pemanfaatan koleksi: peminjaman per eksemplar dan eksemplar yang belum
+pernah dipinjam (bahan pertimbangan pengadaan dan penyiangan).
+
+Catatan:
+- Setiap baris tabel buku adalah satu eksemplar; judul memiliki satu atau
+  lebih eksemplar (buku.id_judul).
+- Jumlah peminjaman dan tanggal pinjam terakhir per eksemplar dihitung
+  sekali dari tabel fakta dengan np.bincount / np.maximum.at atas kode posisi
+  buku (idx_buku), lalu dijumlahkan per judul dengan bincount atas idx_judul.
+- "Belum pernah dipinjam" adalah anti-join buku terhadap peminjaman: eksemplar
+  dengan jumlah peminjaman 0. Hasilnya disimpan sebagai array posisi buku
+  (terurut per kategori), sehingga filter kategori cukup memotong array dan
+  tabel halaman hanya membentuk baris untuk halaman yang ditampilkan.
+- Indeks dibangun sekali per versi data (tenant + waktu model dibangun).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from db import load_model
+from memori import daftarkan
+from model import StarSchema, _take
+from tampilan import UKURAN_HALAMAN
+from tenant import tenant_aktif
+
+# Hari (sejak epoch) untuk eksemplar yang belum pernah dipinjam
+_TANPA_PINJAM = np.iinfo(np.int64).min
+
+
+@dataclass
+class IndeksUtilisasi:
+    """Sirkulasi per eksemplar dan per judul."""
+
+    # per eksemplar (posisi model.buku)
+    pinjam_buku: np.ndarray
+    terakhir_buku: np.ndarray
+    # per judul (posisi model.judul)
+    eksemplar_judul: np.ndarray
+    beredar_judul: np.ndarray
+    pinjam_judul: np.ndarray
+    terakhir_judul: np.ndarray
+    # posisi eksemplar dengan 0 peminjaman, terurut per (kategori, id_buku)
+    tidak_dipinjam: np.ndarray
+    kategori_tidak_dipinjam: np.ndarray
+
+
+def bangun_indeks_utilisasi(model: StarSchema) -> IndeksUtilisasi:
+    """Menyusun IndeksUtilisasi dari tabel fakta dan tabel buku model."""
+    n_buku, n_judul = len(model.buku), len(model.judul)
+    idx_buku = model.fakta["idx_buku"].to_numpy()
+    pinjam_buku = np.bincount(idx_buku, minlength=n_buku)
+
+    tgl = model.fakta["tgl_pinjam"].to_numpy()
+    ada = ~np.isnat(tgl)
+    terakhir_buku = np.full(n_buku, _TANPA_PINJAM, dtype=np.int64)
+    np.maximum.at(terakhir_buku, idx_buku[ada], tgl[ada].astype("datetime64[D]").astype(np.int64))
+
+    idx_judul = model.buku["idx_judul"].to_numpy()
+    punya_judul = idx_judul >= 0
+    j = idx_judul[punya_judul]
+    terakhir_judul = np.full(n_judul, _TANPA_PINJAM, dtype=np.int64)
+    np.maximum.at(terakhir_judul, j, terakhir_buku[punya_judul])
+
+    # anti-join: eksemplar (berjudul & berklasifikasi, seperti view_buku) tanpa
+    # peminjaman, dikelompokkan per kategori
+    kat_buku = model.buku["idx_klasifikasi"].to_numpy()
+    tidak = np.flatnonzero((pinjam_buku == 0) & punya_judul & (kat_buku >= 0))
+    kat = kat_buku[tidak]
+    urutan = np.lexsort((tidak, kat))
+
+    return IndeksUtilisasi(
+        pinjam_buku=pinjam_buku,
+        terakhir_buku=terakhir_buku,
+        eksemplar_judul=np.bincount(j, minlength=n_judul),
+        beredar_judul=np.bincount(j, weights=pinjam_buku[punya_judul] > 0, minlength=n_judul).astype(np.int64),
+        pinjam_judul=np.bincount(j, weights=pinjam_buku[punya_judul], minlength=n_judul).astype(np.int64),
+        terakhir_judul=terakhir_judul,
+        tidak_dipinjam=tidak[urutan],
+        kategori_tidak_dipinjam=kat[urutan],
+    )
+
+
+@st.cache_resource(max_entries=8)
+def _utilisasi_versi(tenant: str, dibangun: int) -> IndeksUtilisasi:
+    indeks = bangun_indeks_utilisasi(load_model())
+    daftarkan(f"indeks_utilisasi [{tenant}]", indeks)
+    return indeks
+
+
+def load_indeks_utilisasi() -> IndeksUtilisasi:
+    """IndeksUtilisasi untuk versi model yang sedang dimuat (tenant aktif)."""
+    return _utilisasi_versi(tenant_aktif(), load_model().dibangun)
+
+
+def _tanggal(hari: np.ndarray) -> np.ndarray:
+    """Hari sejak epoch -> datetime64; tanpa peminjaman menjadi NaT."""
+    hasil = hari.astype("datetime64[D]").astype("datetime64[ns]")
+    hasil[hari == _TANPA_PINJAM] = np.datetime64("NaT")
+    return hasil
+
+
+def utilisasi_judul(model: StarSchema, indeks: IndeksUtilisasi) -> pd.DataFrame:
+    """
+    Sirkulasi per judul yang memiliki eksemplar: eksemplar, eksemplar_beredar
+    (pernah dipinjam), peminjaman, pinjam_per_eksemplar (rasio perputaran),
+    dan terakhir_dipinjam; terurut dari permintaan per eksemplar tertinggi.
+    """
+    pos = np.flatnonzero(indeks.eksemplar_judul)
+    eksemplar = indeks.eksemplar_judul[pos]
+    hasil = pd.DataFrame({
+        "id_judul": model.judul["id_judul"].to_numpy()[pos],
+        "kode_judul": model.judul["kode_judul"].to_numpy()[pos],
+        "judul": model.judul["judul"].to_numpy()[pos],
+        "eksemplar": eksemplar,
+        "eksemplar_beredar": indeks.beredar_judul[pos],
+        "peminjaman": indeks.pinjam_judul[pos],
+        "pinjam_per_eksemplar": indeks.pinjam_judul[pos] / eksemplar,
+        "terakhir_dipinjam": _tanggal(indeks.terakhir_judul[pos]),
+    })
+    return hasil.sort_values(
+        ["pinjam_per_eksemplar", "peminjaman"], ascending=False, kind="stable", ignore_index=True
+    )
+
+
+def utilisasi_kategori(model: StarSchema, indeks: IndeksUtilisasi) -> pd.DataFrame:
+    """Eksemplar beredar vs belum pernah dipinjam dan peminjaman per eksemplar, per kategori."""
+    kat = model.buku["idx_klasifikasi"].to_numpy()
+    ada = (kat >= 0) & (model.buku["idx_judul"].to_numpy() >= 0)
+    n_kat = len(model.klasifikasi)
+    eksemplar = np.bincount(kat[ada], minlength=n_kat)
+    tidak = np.bincount(indeks.kategori_tidak_dipinjam, minlength=n_kat)
+    pinjam = np.bincount(kat[ada], weights=indeks.pinjam_buku[ada], minlength=n_kat)
+    pos = np.flatnonzero(eksemplar)
+    return pd.DataFrame({
+        "kategori_buku": model.klasifikasi["kategori_buku"].to_numpy()[pos],
+        "eksemplar": eksemplar[pos],
+        "beredar": eksemplar[pos] - tidak[pos],
+        "belum_pernah_dipinjam": tidak[pos],
+        "pinjam_per_eksemplar": pinjam[pos] / eksemplar[pos],
+    }).sort_values("pinjam_per_eksemplar", ascending=False, ignore_index=True)
+
+
+def posisi_tidak_dipinjam(model: StarSchema, indeks: IndeksUtilisasi, kategori: str | None = None) -> np.ndarray:
+    """Posisi eksemplar yang belum pernah dipinjam (opsional satu kategori)."""
+    if kategori is None:
+        return indeks.tidak_dipinjam
+    cocok = np.flatnonzero(model.klasifikasi["kategori_buku"].to_numpy() == kategori)
+    if len(cocok) == 0:
+        return indeks.tidak_dipinjam[:0]
+    # kategori_tidak_dipinjam terurut -> cukup potong rentangnya
+    awal, akhir = np.searchsorted(indeks.kategori_tidak_dipinjam, [cocok[0], cocok[0] + 1])
+    return indeks.tidak_dipinjam[awal:akhir]
+
+
+def halaman_tidak_dipinjam(
+    model: StarSchema,
+    posisi: np.ndarray,
+    nomor: int,
+    ukuran: int = UKURAN_HALAMAN,
+) -> pd.DataFrame:
+    """Tabel eksemplar belum pernah dipinjam untuk halaman ke-`nomor` (mulai 1)."""
+    awal = (max(nomor, 1) - 1) * ukuran
+    pos = posisi[awal:awal + ukuran]
+    buku = model.buku
+    idx_judul = buku["idx_judul"].to_numpy()[pos]
+    return pd.DataFrame({
+        "id_buku": buku["id_buku"].to_numpy()[pos],
+        "judul": _take(model.judul["judul"], idx_judul),
+        "kategori_buku": _take(model.klasifikasi["kategori_buku"], buku["idx_klasifikasi"].to_numpy()[pos]),
+        "tahun_terbit": buku["tahun_terbit"].to_numpy()[pos],
+        "status_buku": buku["status_buku"].to_numpy()[pos],
+        "eksemplar": buku["eksemplar"].to_numpy()[pos],
+    })